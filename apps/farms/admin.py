@@ -1,22 +1,44 @@
-from django.contrib import admin
-from django.db import models
-from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
-from django.db.models.functions import Coalesce
-from django.urls import reverse
+import math
+from urllib.parse import urlencode
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db.models import Q
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
-from apps.farms.models import Farm, CropType, Field, Crop, FarmAsset, Expense, Output
+from apps.farms.analytics import DIMENSIONS, METRICS, CropSnapshot
+from apps.farms.forms import CropForm, ExpenseBatchForm, ExpenseRowFormSet, HarvestActionForm
+from apps.farms.imports import ExpenseImporter, OutputImporter
+from apps.farms.models import (
+    Farm, CropType, Field, Crop, CropSummary, FarmAsset, Expense, ExpenseDaily, Output, OutputDateBucket, SeasonCube,
+    CubeRefresh,
+)
 from apps.users.models import User
 
-from farm_management_system.admin import ReadOnlyModelAdmin
-from django.contrib.admin.filters import RelatedFieldListFilter
+from farm_management_system.actions import BulkUpdateMixin
+from farm_management_system.admin import ReadOnlyModelAdmin, str_select_related
+from farm_management_system.autocomplete import AutocompleteMixin
+from farm_management_system.date_buckets import DateBucketMixin
+from farm_management_system.exports import ExportMixin
+from farm_management_system.filters import CachedRelatedFieldListFilter, RangeListFilter
+from farm_management_system.imports import ImportMixin
+from farm_management_system.inlines import PaginatedInline
+from farm_management_system.keyset import KeysetMixin
+from farm_management_system.search import FullTextSearchMixin
 
 
 class ProfitFilter(admin.SimpleListFilter):
     title = _('By Profit')
     parameter_name = 'profit'
+    # The profits are float sums, so crops within half a paisa of zero count as balanced.
+    tolerance = 0.005
 
     def lookups(self, request, model_admin):
         return (
@@ -26,44 +48,58 @@ class ProfitFilter(admin.SimpleListFilter):
         )
 
     def queryset(self, request, queryset):
-        """Return the filtered queryset"""
+        """Return the filtered queryset, crops without a summary yet count as balanced"""
 
         if self.value() == 'profitable':
-            return queryset.filter(total_output__gt=F('total_expense'))
+            return queryset.filter(summary__net_profit__gte=self.tolerance)
         elif self.value() == 'loss':
-            return queryset.filter(total_output__lt=F('total_expense'))
+            return queryset.filter(summary__net_profit__lte=-self.tolerance)
         elif self.value() == 'balanced':
-            return queryset.filter(total_output=F('total_expense'))
+            return queryset.filter(Q(summary__isnull=True) | Q(
+                summary__net_profit__gt=-self.tolerance, summary__net_profit__lt=self.tolerance))
         else:
             return queryset
 
 
-class FieldFilter(RelatedFieldListFilter):
+class FieldFilter(CachedRelatedFieldListFilter):
+    choices_models = (Farm, )
 
-    def field_choices(self, field, request, model_admin):
+    def choices_queryset(self, field, request, model_admin):
         farm_fields = Field.objects.all()
         if not request.user.is_superuser:
             farm_fields = farm_fields.filter(farm__owner=request.user)
-        return field.get_choices(include_blank=False, limit_choices_to={'pk__in': farm_fields})
+        return farm_fields
 
 
-class CropFilter(RelatedFieldListFilter):
+class CropFilter(CachedRelatedFieldListFilter):
+    # The owner of a crop follows its farm.
+    choices_models = (Farm, )
 
-    def field_choices(self, field, request, model_admin):
-        crops = Crop.objects.all()
+    def choices_queryset(self, field, request, model_admin):
+        crops = Crop.objects.select_related(*str_select_related(Crop))
         if not request.user.is_superuser:
-            crops = crops.filter(field__farm__owner=request.user)
-        return field.get_choices(include_blank=False, limit_choices_to={'pk__in': crops})
+            crops = crops.filter(owner=request.user)
+        return crops
 
 
-class ExpenseInlineAdmin(admin.TabularInline):
+OWNER_FILTER = ('owner', CachedRelatedFieldListFilter)
+FARM_FILTER = ('farm', CachedRelatedFieldListFilter)
+
+
+class ExpenseInlineAdmin(PaginatedInline):
     model = Expense
     extra = 0
+    autocomplete_fields = ['spent_by', 'added_by']
+    ordering = ('-expense_date', '-pk')
 
 
-class FarmAdmin(ReadOnlyModelAdmin):
+class FarmAdmin(AutocompleteMixin, ReadOnlyModelAdmin):
     list_display = ('name', 'owner')
 
+    search_fields = ['^name']
+
+    autocomplete_fields = ['owner']
+
     class Meta:
         model = Farm
 
@@ -80,18 +116,27 @@ class FarmAdmin(ReadOnlyModelAdmin):
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
-class CropTypeAdmin(ReadOnlyModelAdmin):
+class CropTypeAdmin(AutocompleteMixin, ReadOnlyModelAdmin):
     list_display = ['id', 'name', 'description']
 
+    search_fields = ['^name']
+
     class Meta:
         model = CropType
 
 
-class FieldAdmin(ReadOnlyModelAdmin):
+class FieldAdmin(AutocompleteMixin, BulkUpdateMixin, ReadOnlyModelAdmin):
     list_display = ('farm', 'name', 'location', 'is_own_property', 'has_electricity_tubewell', 'has_canal_irrigation',
                     'total_acres', 'landlord_name', 'landlord_number', 'lease_per_acre', 'lease_start', 'lease_end',
                     'is_active')
 
+    search_fields = ['^name']
+
+    autocomplete_fields = ['farm']
+
+    actions = ['deactivate_expired_leases']
+    bulk_update_fields = ['is_active']
+
     class Meta:
         model = Field
 
@@ -106,47 +151,102 @@ class FieldAdmin(ReadOnlyModelAdmin):
             kwargs['queryset'] = Farm.objects.filter(owner=request.user)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
+    def deactivate_expired_leases(self, request, queryset):
+        """
+        Deactivate the selected fields whose lease has ended. Lease accruals skip inactive fields
+        from then on, the months already booked are kept.
+        """
+        self.update_rows(
+            request, queryset.filter(is_active=True, lease_end__lt=timezone.localdate()), is_active=False)
 
-class CropAdmin(ReadOnlyModelAdmin):
+    deactivate_expired_leases.short_description = _('Deactivate selected fields whose lease has ended')
+
+
+class CropAdmin(AutocompleteMixin, BulkUpdateMixin, ExportMixin, ReadOnlyModelAdmin):
     list_display = ['field', '_crop', 'total_expenses', '_total_output', '_net_profit', '_expense_per_acre',
                     '_output_per_acre', '_net_profit_per_acre', 'breed', 'total_acres',  'date_sowing',
                     'date_harvesting']
 
-    list_filter = [('field', FieldFilter), 'crop_type', 'season', 'date_sowing', ProfitFilter]
+    list_filter = [('field', FieldFilter), ('crop_type', CachedRelatedFieldListFilter), 'season', 'date_sowing',
+                   ProfitFilter, ('summary__net_profit', RangeListFilter),
+                   ('summary__net_profit_per_acre', RangeListFilter)]
 
     ordering = ('-date_sowing', )
 
+    list_select_related = ('crop_type', 'summary')
+
+    search_fields = ['^crop_type__name', '^field__name', '^breed']
+
+    autocomplete_fields = ['field', 'crop_type']
+
+    export_columns = ['id', 'field', 'crop_type', 'season', 'breed', 'total_acres', 'date_sowing', 'date_harvesting',
+                      'total_expense', 'total_output', 'net_profit', 'expense_per_acre',
+                      'output_per_acre', 'net_profit_per_acre']
+
     inlines = [ExpenseInlineAdmin]
 
+    form = CropForm
+    actions = ExportMixin.actions + ['mark_harvested']
+    bulk_update_fields = ['date_harvesting']
+    action_form = HarvestActionForm
+
     class Meta:
         model = Crop
 
     def get_list_filter(self, request):
-        list_filter = super().get_list_filter(request)
-        if request.user.is_superuser:
-            if 'field__farm__owner' not in list_filter:
-                list_filter.append('field__farm__owner')
-        else:
-            if 'field__farm__owner' in list_filter:
-                list_filter.remove('field__farm__owner')
+        list_filter = list(super().get_list_filter(request))
+        if request.user.is_superuser and OWNER_FILTER not in list_filter:
+            list_filter.append(OWNER_FILTER)
         return list_filter
 
+    performance_ranked = 20
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('performance/', self.admin_site.admin_view(self.performance_view), name='%s_%s_performance' % info),
+        ] + super().get_urls()
+
+    def performance_view(self, request):
+        """Per acre statistics of the crops grouped by the chosen dimensions, and the crops ranking lowest."""
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        by = [name for name in DIMENSIONS if name in request.GET.getlist('by')] or ['crop_type']
+        metric = request.GET.get('metric') if request.GET.get('metric') in METRICS else 'profit_per_acre'
+        snapshot = CropSnapshot(self.get_queryset(request))
+
+        groups = snapshot.grouped(by)
+        for group in groups:
+            group['cells'] = [
+                (stats['mean'], *stats['quantiles'], math.sqrt(stats['variance'])) if stats else None
+                for stats in (group[name] for name in METRICS)
+            ]
+
+        # The crops in the lowest percentiles of their crop type for the chosen metric.
+        lowest = snapshot.lowest_ranked(metric, self.performance_ranked)
+        crops = Crop.objects.select_related(*str_select_related(Crop)).in_bulk([pk for pk, value, rank in lowest])
+        ranked = [(crops[pk], value, rank) for pk, value, rank in lowest]
+
+        opts = self.model._meta
+        context = dict(
+            self.admin_site.each_context(request),
+            title=_('Crop performance'),
+            opts=opts,
+            dimensions=[(name, title, name in by) for name, title in DIMENSIONS.items()],
+            metrics=list(METRICS.items()),
+            metric=metric,
+            metric_title=METRICS[metric],
+            by_titles=[DIMENSIONS[name] for name in by],
+            groups=groups,
+            ranked=ranked,
+            crops=len(snapshot),
+        )
+        return TemplateResponse(request, 'admin/crop_performance.html', context)
+
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         if not request.user.is_superuser:
-            queryset = queryset.filter(field__farm__owner=request.user)
-
-        total_output = Crop.objects.filter(pk=OuterRef('pk')).annotate(
-            total_output=Sum(
-                F('crop_outputs__total_mann') * F('crop_outputs__rate_per_mann'),
-                output_field=models.FloatField()
-            ))
-        total_expense = Crop.objects.filter(pk=OuterRef('pk')).annotate(total_expense=Sum('crop_expenses__amount'))
-
-        queryset = queryset.annotate(
-            total_output=Coalesce(Subquery(total_output.values('total_output'), output_field=IntegerField()), 0),
-            total_expense=Coalesce(Subquery(total_expense.values('total_expense'), output_field=IntegerField()), 0)
-        )
+            queryset = queryset.filter(owner=request.user)
         return queryset
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
@@ -154,50 +254,122 @@ class CropAdmin(ReadOnlyModelAdmin):
             kwargs['queryset'] = Field.objects.filter(farm__owner=request.user)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
+    def mark_harvested(self, request, queryset):
+        """
+        Set the harvest date chosen next to the action, today by default, on the crops not yet
+        harvested. No summary or rollup holds the harvest date, the lease months not booked yet
+        are shared out by it when they are accrued.
+        """
+        try:
+            date = forms.DateField(required=False).clean(request.POST.get('date_harvesting'))
+        except ValidationError as e:
+            self.message_user(request, ' '.join(e.messages), messages.ERROR)
+            return
+        date = date or timezone.localdate()
+        self.update_rows(
+            request, queryset.filter(date_harvesting__isnull=True, date_sowing__lte=date), date_harvesting=date)
+
+    mark_harvested.short_description = _('Mark selected crops sown by the date as harvested')
+
     def _total_output(self, obj):
         url = reverse(f'admin:farms_output_changelist')
         url += f'?crop__id__exact={obj.id}'
-        return format_html('<a href="{}">{}</a>', url, obj.total_output)
+        return format_html('<a href="{}">{}</a>', url, self.crop_summary(obj).total_output)
     _total_output.short_description = _('Total Output')
+    _total_output.admin_order_field = 'summary__total_output'
 
     def total_expenses(self, obj):
         url = reverse(f'admin:farms_expense_changelist')
         url += f'?crop__id__exact={obj.id}'
-        return format_html('<a href="{}">{}</a>', url, obj.total_expense)
+        return format_html('<a href="{}">{}</a>', url, self.crop_summary(obj).total_expense)
 
     total_expenses.short_description = _("Total Expenses")
+    total_expenses.admin_order_field = 'summary__total_expense'
+
+    # The metrics are stored on the summary, see CropSummaryManager.update_metrics(). The per acre
+    # ones are empty for crops without acres.
+
+    def crop_summary(self, obj):
+        """
+        The summary of the crop from the left join of list_select_related, or the values of an empty
+        one for crops whose summary is missing, before rebuild_crop_summaries has run.
+        """
+        try:
+            return obj.summary
+        except CropSummary.DoesNotExist:
+            summary = CropSummary(crop=obj)
+            if not obj.total_acres:
+                summary.expense_per_acre = summary.output_per_acre = summary.net_profit_per_acre = None
+            return summary
+
+    def total_expense(self, obj):
+        return self.crop_summary(obj).total_expense
+
+    total_expense.short_description = _('Total expense')
+
+    def total_output(self, obj):
+        return self.crop_summary(obj).total_output
+
+    total_output.short_description = _('Total output')
+
+    def net_profit(self, obj):
+        return round(self.crop_summary(obj).net_profit, 2)
+
+    net_profit.short_description = _('Net Profit')
+
+    def expense_per_acre(self, obj):
+        value = self.crop_summary(obj).expense_per_acre
+        return None if value is None else round(value, 2)
+
+    expense_per_acre.short_description = _("Expenses per acre")
+
+    def output_per_acre(self, obj):
+        value = self.crop_summary(obj).output_per_acre
+        return None if value is None else round(value, 2)
+
+    output_per_acre.short_description = _("Output per acre")
+
+    def net_profit_per_acre(self, obj):
+        value = self.crop_summary(obj).net_profit_per_acre
+        return None if value is None else round(value, 2)
+
+    net_profit_per_acre.short_description = _('Profit per acre')
 
     def _net_profit(self, obj):
-        profit = obj.total_output - obj.total_expense
+        profit = self.net_profit(obj)
         color = 'red' if profit < 0 else 'green'
         profit = "{:.2f}".format(profit)
         profit = mark_safe(f'<span style="color: {color};">{profit}</span>')
         return profit
 
     _net_profit.short_description = _('Net Profit')
+    _net_profit.admin_order_field = 'summary__net_profit'
 
     def _expense_per_acre(self, obj):
-        per_acre_expenses = obj.total_expense / obj.total_acres
-        per_acre_expenses = "{:.2f}".format(per_acre_expenses)
-        return per_acre_expenses
+        value = self.expense_per_acre(obj)
+        return None if value is None else "{:.2f}".format(value)
 
     _expense_per_acre.short_description = _("Expenses per acre")
+    _expense_per_acre.admin_order_field = 'summary__expense_per_acre'
 
     def _output_per_acre(self, obj):
-        per_acre_output = obj.total_output / obj.total_acres
-        per_acre_output = "{:.2f}".format(per_acre_output)
-        return per_acre_output
+        value = self.output_per_acre(obj)
+        return None if value is None else "{:.2f}".format(value)
 
     _output_per_acre.short_description = _("Output per acre")
+    _output_per_acre.admin_order_field = 'summary__output_per_acre'
 
     def _net_profit_per_acre(self, obj):
-        profit = (obj.total_output - obj.total_expense) / obj.total_acres
+        profit = self.net_profit_per_acre(obj)
+        if profit is None:
+            return None
         color = 'red' if profit < 0 else 'green'
         profit = "{:.2f}".format(profit)
         profit = mark_safe(f'<span style="color: {color};">{profit}</span>')
         return profit
 
     _net_profit_per_acre.short_description = _('Profit per acre')
+    _net_profit_per_acre.admin_order_field = 'summary__net_profit_per_acre'
 
     def _crop(self, obj):
         return f"{obj.crop_type}({obj.get_season_display()})"
@@ -208,6 +380,8 @@ class CropAdmin(ReadOnlyModelAdmin):
 class FarmAssetAdmin(ReadOnlyModelAdmin):
     list_display = ['farm', 'name', 'date_purchased', 'is_bought_new', 'purchase_cost']
 
+    autocomplete_fields = ['farm']
+
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         if not request.user.is_superuser:
@@ -223,23 +397,71 @@ class FarmAssetAdmin(ReadOnlyModelAdmin):
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
-class ExpenseAdmin(ReadOnlyModelAdmin):
+class ExpenseAdmin(DateBucketMixin, ExportMixin, FullTextSearchMixin, ImportMixin, KeysetMixin, ReadOnlyModelAdmin):
     list_display = ['crop', '_expense_type', 'amount', 'expense_date', 'notes', 'spent_by', 'added_by']
 
-    list_filter = [('crop', CropFilter), 'spent_by', 'expense_type']
+    list_filter = [('crop', CropFilter), ('spent_by', CachedRelatedFieldListFilter), 'expense_type']
+
+    search_fields = ['@notes']
+
+    autocomplete_fields = ['crop', 'spent_by', 'added_by']
+
+    keyset_field = 'expense_date'
+
+    date_hierarchy = 'expense_date'
+    date_buckets = ExpenseDaily.objects
+    date_bucket_filters = ('crop__id__exact', 'spent_by__id__exact', 'expense_type__exact', 'farm__id__exact')
+
+    export_columns = ['id', 'crop', 'expense_type', 'amount', 'expense_date', 'notes', 'spent_by', 'added_by']
+
+    importer_class = ExpenseImporter
 
     class Meta:
         model = Expense
 
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('bulk-entry/', self.admin_site.admin_view(self.bulk_entry_view), name='%s_%s_bulk_entry' % info),
+        ] + super().get_urls()
+
+    def bulk_entry_view(self, request):
+        """
+        A grid of expenses for one crop or field, validated together and inserted in one transaction
+        by ExpenseBatchForm.save(), which updates the summaries and rollups once for the batch.
+        """
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        opts = self.model._meta
+        form = ExpenseBatchForm(request.user, self.admin_site, request.POST or None)
+        rows = ExpenseRowFormSet(request.POST or None, prefix='rows')
+        if request.method == 'POST' and form.is_valid() and rows.is_valid():
+            expenses = form.expenses(rows)
+            if expenses:
+                form.save(expenses)
+                self.message_user(request, _('Added %(count)s %(name)s.') % {
+                    'count': len(expenses), 'name': opts.verbose_name_plural})
+                return HttpResponseRedirect(reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'))
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title=_('Add %s') % opts.verbose_name_plural,
+            opts=opts,
+            form=form,
+            rows=rows,
+            media=self.media + form.media + rows.media,
+        )
+        return TemplateResponse(request, 'admin/expense_bulk_entry.html', context)
+
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         if not request.user.is_superuser:
-            queryset = queryset.filter(crop__field__farm__owner=request.user)
+            queryset = queryset.filter(owner=request.user)
         return queryset
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == 'crop' and not request.user.is_superuser:
-            kwargs['queryset'] = Crop.objects.filter(field__farm__owner=request.user)
+            kwargs['queryset'] = Crop.objects.filter(owner=request.user)
         elif db_field.name == 'spent_by' and not request.user.is_superuser:
             kwargs['queryset'] = User.objects.filter(pk=request.user.pk)
         elif db_field.name == 'added_by' and not request.user.is_superuser:
@@ -250,22 +472,30 @@ class ExpenseAdmin(ReadOnlyModelAdmin):
         return obj.get_expense_type_display()
 
     def get_list_filter(self, request):
-        list_filter = super().get_list_filter(request)
-        if request.user.is_superuser:
-            if 'crop__field__farm' not in list_filter:
-                list_filter.append('crop__field__farm')
-        else:
-            if 'crop__field__farm' in list_filter:
-                list_filter.remove('crop__field__farm')
+        list_filter = list(super().get_list_filter(request))
+        if request.user.is_superuser and FARM_FILTER not in list_filter:
+            list_filter.append(FARM_FILTER)
         return list_filter
 
     _expense_type.short_description = _("Type")
 
 
-class OutputAdmin(ReadOnlyModelAdmin):
+class OutputAdmin(DateBucketMixin, ExportMixin, FullTextSearchMixin, ImportMixin, ReadOnlyModelAdmin):
     list_display = ['crop', 'total_mann', 'rate_per_mann', 'sold_date', 'notes', '_total_output']
 
-    list_filter = [('crop', CropFilter), ('crop__field', FieldFilter)]
+    list_filter = [('crop', CropFilter), ('field', FieldFilter)]
+
+    search_fields = ['@notes']
+
+    autocomplete_fields = ['crop']
+
+    date_hierarchy = 'sold_date'
+    date_buckets = OutputDateBucket.objects
+    date_bucket_filters = ('crop__id__exact', 'field__id__exact', 'farm__id__exact')
+
+    export_columns = ['id', 'crop', 'total_mann', 'rate_per_mann', '_total_output', 'sold_date', 'notes']
+
+    importer_class = OutputImporter
 
     class Meta:
         model = Output
@@ -273,22 +503,18 @@ class OutputAdmin(ReadOnlyModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         if not request.user.is_superuser:
-            queryset = queryset.filter(crop__field__farm__owner=request.user)
+            queryset = queryset.filter(owner=request.user)
         return queryset
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == 'crop' and not request.user.is_superuser:
-            kwargs['queryset'] = Crop.objects.filter(field__farm__owner=request.user)
+            kwargs['queryset'] = Crop.objects.filter(owner=request.user)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
     def get_list_filter(self, request):
-        list_filter = super().get_list_filter(request)
-        if request.user.is_superuser:
-            if 'crop__field__farm' not in list_filter:
-                list_filter.append('crop__field__farm')
-        else:
-            if 'crop__field__farm' in list_filter:
-                list_filter.remove('crop__field__farm')
+        list_filter = list(super().get_list_filter(request))
+        if request.user.is_superuser and FARM_FILTER not in list_filter:
+            list_filter.append(FARM_FILTER)
         return list_filter
 
     def _total_output(self, obj):
@@ -297,6 +523,130 @@ class OutputAdmin(ReadOnlyModelAdmin):
     _total_output.short_description = _("Total Output")
 
 
+class SeasonCubeAdmin(admin.ModelAdmin):
+    """
+    Analytics dashboard over the SeasonCube: totals grouped by one dimension, narrowed by the
+    values chosen for the others. Clicking a value drills down into it, grouping by the next
+    dimension. Every page is answered from the cube, which is refreshed from the changed rows
+    by the refresh button and the refresh_season_cube command.
+    """
+    # Dimensions in drill down order, with the cube column each one is grouped on.
+    dimensions = [
+        ('year', 'year', _('Year')),
+        ('season', 'season', _('Season')),
+        ('farm', 'farm_id', _('Farm')),
+        ('field', 'field_id', _('Field')),
+        ('crop_type', 'crop_type_id', _('Crop type')),
+        ('expense_type', 'expense_type', _('Expense type')),
+    ]
+    labelled_models = {'farm': Farm, 'field': Field, 'crop_type': CropType}
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [path('', self.admin_site.admin_view(self.changelist_view), name='%s_%s_changelist' % info)]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Whoever may open the crops may read their totals.
+        return request.user.has_perm('farms.change_crop') or request.user.has_perm('farms.can_view_crop')
+
+    def has_refresh_permission(self, request):
+        return request.user.has_perm('farms.change_seasoncube')
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        opts = self.model._meta
+        if request.method == 'POST':
+            if not self.has_refresh_permission(request):
+                raise PermissionDenied
+            # Owners only recompute their own fields, a superuser every changed one.
+            fields = SeasonCube.objects.refresh(owner=None if request.user.is_superuser else request.user)
+            self.message_user(request, _('Recomputed the analytics of %(count)s fields.') % {'count': fields})
+            return HttpResponseRedirect(request.get_full_path())
+
+        names = [name for name, column, title in self.dimensions]
+        group_by = request.GET.get('by') if request.GET.get('by') in names else names[0]
+        chosen = {
+            name: self.key(name, request.GET[name]) for name in names if request.GET.get(name) and name != group_by}
+        # Values of the wrong type are ignored, as the changelists ignore unknown parameters.
+        chosen = {name: value for name, value in chosen.items() if value is not None}
+        queryset = SeasonCube.objects.all()
+        if not request.user.is_superuser:
+            queryset = queryset.filter(owner=request.user)
+        for name, column, title in self.dimensions:
+            if name in chosen:
+                queryset = queryset.filter(**{column: chosen[name]})
+        # The cells without an expense type hold the totals, the others split the expenses by type.
+        by_type = group_by == 'expense_type' or 'expense_type' in chosen
+        if not by_type:
+            queryset = queryset.filter(expense_type='')
+        elif 'expense_type' not in chosen:
+            queryset = queryset.exclude(expense_type='')
+
+        column = dict((name, column) for name, column, title in self.dimensions)[group_by]
+        rows = list(SeasonCube.objects.totals(queryset, column))
+        labels = self.labels(group_by, [row[column] for row in rows])
+        remaining = [name for name in names if name != group_by and name not in chosen]
+        drill_down = remaining[0] if remaining else None
+        for row in rows:
+            row['label'] = labels.get(row[column], row[column])
+            if drill_down:
+                row['url'] = '?' + urlencode({**chosen, group_by: row[column], 'by': drill_down})
+        total = next(SeasonCube.objects.totals(queryset), None)
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title=_('Season analytics'),
+            opts=opts,
+            rows=rows,
+            total=total,
+            by_type=by_type,
+            group_by=dict((name, title) for name, column, title in self.dimensions)[group_by],
+            groupings=[
+                (title, '?' + urlencode({**chosen, 'by': name}), name == group_by)
+                for name, column, title in self.dimensions if name not in chosen
+            ],
+            chosen=[
+                (title, self.labels(name, [chosen[name]]).get(chosen[name], chosen[name]),
+                 '?' + urlencode({**{key: value for key, value in chosen.items() if key != name}, 'by': name}))
+                for name, column, title in self.dimensions if name in chosen
+            ],
+            last_refresh=CubeRefresh.objects.order_by('-started').first(),
+            can_refresh=self.has_refresh_permission(request),
+            **(extra_context or {}),
+        )
+        return TemplateResponse(request, 'admin/season_analytics.html', context)
+
+    def key(self, name, value):
+        """Turn a query string value into the type the cube column holds, None if it cannot."""
+        if name in self.labelled_models or name == 'year':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+        return value
+
+    def labels(self, name, values):
+        if name in self.labelled_models:
+            model = self.labelled_models[name]
+            objects = model.objects.filter(pk__in=values)
+            relations = str_select_related(model)
+            if relations:
+                objects = objects.select_related(*relations)
+            return {obj.pk: str(obj) for obj in objects}
+        if name == 'season':
+            return dict(Crop.SEASON_CHOICES)
+        if name == 'expense_type':
+            return dict(Expense.EXPENSE_TYPE_CHOICES)
+        return {}
+
+
 admin.site.register(Farm, FarmAdmin)
 admin.site.register(CropType, CropTypeAdmin)
 admin.site.register(Field, FieldAdmin)
@@ -304,3 +654,4 @@ admin.site.register(Crop, CropAdmin)
 admin.site.register(FarmAsset, FarmAssetAdmin)
 admin.site.register(Expense, ExpenseAdmin)
 admin.site.register(Output, OutputAdmin)
+admin.site.register(SeasonCube, SeasonCubeAdmin)
@@ -0,0 +1,99 @@
+"""
+Allocation of the acres of the fields to their crops over time.
+
+A crop holds its total_acres of its field from its sowing date until its harvest date, when
+they are free to sow again, and for good while it is not harvested. Crops are swept per field
+in sowing order, keeping the crops still in the ground in a heap by harvest date, so the acres
+in use are known at every sowing, where they can only have grown, in O(log n) per crop. The
+(field, date_sowing) index serves the crops of one field in that order.
+"""
+import datetime
+import heapq
+from itertools import groupby
+
+from django.db.models import Q
+
+from apps.farms.models import Crop
+
+# Acres are floats, sums of fractions may miss the field's total by rounding.
+TOLERANCE = 1e-6
+
+
+def occupied_until(date_harvesting):
+    return date_harvesting or datetime.date.max
+
+
+class AcreSweep:
+    """The acres of a field in use as its crops are sown, fed in sowing order."""
+
+    def __init__(self):
+        self.growing = []
+        self.acres = 0
+
+    def sow(self, crop_id, acres, date_sowing, date_harvesting):
+        """Add a crop, dropping those harvested by its sowing, and return the acres now in use."""
+        while self.growing and self.growing[0][0] <= date_sowing:
+            self.acres -= heapq.heappop(self.growing)[2]
+        heapq.heappush(self.growing, (occupied_until(date_harvesting), crop_id, acres))
+        self.acres += acres
+        return self.acres
+
+    def crop_ids(self):
+        return sorted(crop_id for end, crop_id, acres in self.growing)
+
+
+def peak_use(field, acres, date_sowing, date_harvesting, exclude=None):
+    """
+    The most acres of field in use while a crop of acres occupies it from date_sowing to
+    date_harvesting, with the date and the other crops in the ground then. Only the crops of the
+    field sown before the harvest and not harvested by the sowing are read, exclude skips the
+    crop being changed.
+    """
+    crops = Crop.objects.filter(field=field).filter(
+        Q(date_harvesting__isnull=True) | Q(date_harvesting__gt=date_sowing))
+    if date_harvesting:
+        crops = crops.filter(date_sowing__lt=date_harvesting)
+    if exclude is not None:
+        crops = crops.exclude(pk=exclude)
+    # Crops sown earlier count from date_sowing on, which keeps the sowing order.
+    rows = [(max(sowing, date_sowing), pk, crop_acres, harvesting) for pk, crop_acres, sowing, harvesting
+            in crops.order_by('date_sowing', 'pk').values_list('pk', 'total_acres', 'date_sowing', 'date_harvesting')]
+
+    sweep, peak = AcreSweep(), (acres, date_sowing, [])
+    for day, day_rows in groupby(rows, key=lambda row: row[0]):
+        for start, pk, crop_acres, harvesting in day_rows:
+            in_use = acres + sweep.sow(pk, crop_acres, start, harvesting)
+        if in_use > peak[0]:
+            peak = (in_use, day, sweep.crop_ids())
+    return peak
+
+
+def audit(crops=None):
+    """
+    Stream the crops of every field in one pass in (field, sowing) order and yield, per field
+    and season (year of sowing and Crop.season), a dict of the field, its total_acres, the year,
+    the season, the peak acres in use at the sowings of that season's crops, the date of the
+    peak and the crops in the ground then. Each field's sweep is dropped once it is reported.
+    """
+    crops = Crop.objects.all() if crops is None else crops
+    rows = crops.order_by('field_id', 'date_sowing', 'pk').values_list(
+        'field_id', 'field__name', 'field__total_acres', 'date_sowing', 'pk', 'season', 'total_acres',
+        'date_harvesting').iterator()
+    for (field_id, name, field_acres), field_rows in groupby(rows, key=lambda row: row[:3]):
+        sweep, seasons = AcreSweep(), {}
+        for date_sowing, day_rows in groupby(field_rows, key=lambda row: row[3]):
+            sown = set()
+            for *field, date_sowing, crop_id, season, acres, date_harvesting in day_rows:
+                in_use = sweep.sow(crop_id, acres, date_sowing, date_harvesting)
+                sown.add((date_sowing.year, season))
+            for key in sown:
+                if key not in seasons or in_use > seasons[key]['peak_acres']:
+                    seasons[key] = {
+                        'field_id': field_id, 'field': name, 'field_acres': field_acres, 'year': key[0],
+                        'season': key[1], 'peak_acres': in_use, 'date': date_sowing, 'crop_ids': sweep.crop_ids(),
+                    }
+        yield from (seasons[key] for key in sorted(seasons))
+
+
+def is_over_allocated(row):
+    return row['peak_acres'] > row['field_acres'] + TOLERANCE
@@ -0,0 +1,227 @@
+"""
+Crop performance analytics over a columnar snapshot of crops, expenses and outputs.
+
+The snapshot is loaded with two queries: the crops with the expense and output totals their
+CropSummary keeps, and the output mann of every crop, grouped in the database. Each attribute
+is held as one NumPy array indexed by row, with the text columns dictionary encoded, so a
+metric of every crop is one vectorised expression. Grouped statistics and percentile ranks sort all the values once by
+group and value, and reduce each group with bincount() and the group boundaries.
+
+NumPy is imported by the functions using it, so loading the admin does not import it.
+"""
+from django.db.models import Sum
+from django.db.models.functions import ExtractYear
+from django.utils.translation import gettext_lazy as _
+
+from apps.farms.models import Crop, CropType, Output
+
+METRICS = {
+    'cost_per_acre': _('Expenses per acre'),
+    'revenue_per_acre': _('Output per acre'),
+    'profit_per_acre': _('Profit per acre'),
+    'yield_per_acre': _('Yield per acre (mann)'),
+    'break_even_price': _('Break-even price per mann'),
+}
+
+DIMENSIONS = {
+    'crop_type': _('Crop type'),
+    'breed': _('breed'),
+    'season': _('Season'),
+    'year': _('Year'),
+}
+
+ENCODED = ('crop_type', 'breed', 'season')
+
+
+def divide(numerators, denominators):
+    """Element wise division, NaN where the denominator is not positive."""
+    import numpy as np
+    result = np.full(len(numerators), np.nan)
+    np.divide(numerators, denominators, out=result, where=denominators > 0)
+    return result
+
+
+def quantile(ordered, fraction):
+    """Linearly interpolated quantile of sorted values, as numpy.quantile() computes it."""
+    position = (len(ordered) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def sorted_groups(column, groups, size):
+    """
+    The rows of column where it is defined, sorted by group and then value, with the group of
+    each, and the count and first position of every one of size groups in that order.
+    """
+    import numpy as np
+    rows = np.flatnonzero(~np.isnan(column))
+    rows = rows[np.lexsort((column[rows], groups[rows]))]
+    count = np.bincount(groups[rows], minlength=size)
+    return rows, groups[rows], count, np.cumsum(count) - count
+
+
+class CropSnapshot:
+    """
+    Columns of every crop of a queryset: ids, dictionary encoded crop type, breed and season,
+    sowing year, acres, and the sums of its expenses, output revenue and output mann.
+    """
+
+    def __init__(self, crops=None):
+        import numpy as np
+        crops = Crop.objects.all() if crops is None else crops
+        rows = list(crops.order_by('pk').values_list(
+            'pk', 'crop_type_id', 'breed', 'season', 'total_acres', ExtractYear('date_sowing'),
+            'summary__total_expense', 'summary__total_output'))
+        ids, crop_types, breeds, seasons, acres, years, expenses, revenues = zip(*rows) if rows else ((), ) * 8
+        self.ids = np.array(ids, dtype=np.int64)
+        self.acres = np.array(acres, dtype=float)
+        self.year = np.array(years, dtype=np.int64)
+        # Crops without a summary row yet read as NaN, and have no expenses or outputs summed.
+        self.expense = np.nan_to_num(np.array(expenses, dtype=float))
+        self.revenue = np.nan_to_num(np.array(revenues, dtype=float))
+        # The distinct values of each encoded column in order, a row holds the index of its value.
+        self.values = {}
+        for name, column in zip(ENCODED, (crop_types, breeds, seasons)):
+            self.values[name], codes = np.unique(np.array(column, dtype=object), return_inverse=True)
+            setattr(self, name, codes.astype(np.int64))
+
+        self.mann = np.zeros(len(self.ids))
+        mann = np.array(list(Output.objects.filter(crop__in=crops.values('pk')).values('crop_id').annotate(
+            mann=Sum('total_mann')).order_by().values_list('crop_id', 'mann')), dtype=float).reshape(-1, 2)
+        self.mann[np.searchsorted(self.ids, mann[:, 0].astype(np.int64))] = mann[:, 1]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def metric(self, name):
+        """Return the array of a METRICS value for every crop, NaN where it is undefined."""
+        if name == 'cost_per_acre':
+            return divide(self.expense, self.acres)
+        if name == 'revenue_per_acre':
+            return divide(self.revenue, self.acres)
+        if name == 'profit_per_acre':
+            return divide(self.revenue - self.expense, self.acres)
+        if name == 'yield_per_acre':
+            return divide(self.mann, self.acres)
+        if name == 'break_even_price':
+            return divide(self.expense, self.mann)
+        raise ValueError(f'Unknown metric {name}.')
+
+    def group_rows(self, by):
+        """The group number of every row and the by dimensions' codes of each group, in code order."""
+        import numpy as np
+        keys, groups = np.unique(
+            np.stack([getattr(self, name) for name in by], axis=1), axis=0, return_inverse=True)
+        return groups.reshape(-1), keys
+
+    def decode(self, name, code):
+        return int(code) if name == 'year' else self.values[name][code]
+
+    def labels(self, name):
+        """Display labels of the codes of a dimension."""
+        if name == 'crop_type':
+            names = dict(CropType.objects.filter(pk__in=list(self.values['crop_type'])).values_list('pk', 'name'))
+            return {code: names.get(pk, pk) for code, pk in enumerate(self.values['crop_type'])}
+        if name == 'season':
+            seasons = dict(Crop.SEASON_CHOICES)
+            return {code: seasons.get(value, value) for code, value in enumerate(self.values['season'])}
+        if name == 'breed':
+            return dict(enumerate(self.values['breed']))
+        return {}
+
+    def grouped(self, by=('crop_type', ), metrics=tuple(METRICS), quantiles=(0.25, 0.5, 0.75)):
+        """
+        Statistics of every metric per group of crops sharing the by dimensions: count, acres, and
+        for each metric the sum, mean, population variance, minimum, maximum and the quantiles,
+        skipping the crops where it is undefined. Returns a list of dicts ordered by the group labels.
+        """
+        import numpy as np
+        if not len(self):
+            return []
+        groups, keys = self.group_rows(by)
+        crops = np.bincount(groups, minlength=len(keys))
+        acres = np.bincount(groups, weights=self.acres, minlength=len(keys))
+        statistics = {name: self.statistics(self.metric(name), groups, len(keys), quantiles) for name in metrics}
+        labels = {name: self.labels(name) for name in by}
+        results = []
+        for number, key in enumerate(keys.tolist()):
+            result = {
+                'key': {name: self.decode(name, code) for name, code in zip(by, key)},
+                'labels': [labels[name].get(code, code) for name, code in zip(by, key)],
+                'crops': int(crops[number]),
+                'acres': float(acres[number]),
+            }
+            for name in metrics:
+                result[name] = statistics[name][number]
+            results.append(result)
+        results.sort(key=lambda result: [str(label) for label in result['labels']])
+        return results
+
+    @staticmethod
+    def statistics(column, groups, size, quantiles):
+        """The statistics of column in each of size groups, None for groups where it is never defined."""
+        import numpy as np
+        rows, groups, count, start = sorted_groups(column, groups, size)
+        ordered = column[rows]
+        filled = np.flatnonzero(count)
+        count, start = count[filled], start[filled]
+        total = np.bincount(groups, weights=ordered, minlength=size)[filled]
+        mean = total / count
+        deviations = (ordered - np.repeat(mean, count)) ** 2
+        variance = np.bincount(groups, weights=deviations, minlength=size)[filled] / count
+        last = start + count - 1
+        cuts = []
+        for fraction in quantiles:
+            position = start + (count - 1) * fraction
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, last)
+            cuts.append(ordered[low] + (ordered[high] - ordered[low]) * (position - low))
+
+        results = [None] * size
+        for index, group in enumerate(filled.tolist()):
+            results[group] = {
+                'count': int(count[index]),
+                'sum': float(total[index]),
+                'mean': float(mean[index]),
+                'variance': float(variance[index]),
+                'min': float(ordered[start[index]]),
+                'max': float(ordered[last[index]]),
+                'quantiles': [float(cut[index]) for cut in cuts],
+            }
+        return results
+
+    def percentile_ranks(self, metric, within=('crop_type', )):
+        """
+        Percentile rank (0 to 100, ties sharing the mean rank) of every crop's metric among the
+        crops of its group, NaN where the metric is undefined.
+        """
+        import numpy as np
+        column = self.metric(metric)
+        ranks = np.full(len(column), np.nan)
+        if not len(self):
+            return ranks
+        groups, keys = self.group_rows(within)
+        rows, groups, count, start = sorted_groups(column, groups, len(keys))
+        ordered = column[rows]
+        # Runs of equal values in a group, every value of a run has the same values below and through it.
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (groups[1:] != groups[:-1]) | (ordered[1:] != ordered[:-1])
+        run = np.cumsum(first) - 1
+        run_start = np.flatnonzero(first)
+        run_end = np.append(run_start[1:], len(rows))
+        below = run_start[run] - start[groups]
+        through = run_end[run] - start[groups]
+        ranks[rows] = 100 * (below + through) / 2 / count[groups]
+        return ranks
+
+    def lowest_ranked(self, metric, count, within=('crop_type', )):
+        """
+        (crop id, metric, percentile rank) of the count crops ranking lowest in their group,
+        lowest first, leaving out the crops where the metric is undefined.
+        """
+        import numpy as np
+        ranks = self.percentile_ranks(metric, within)
+        defined = np.flatnonzero(~np.isnan(ranks))
+        lowest = defined[np.argsort(ranks[defined], kind='stable')][:count]
+        return list(zip(self.ids[lowest].tolist(), self.metric(metric)[lowest].tolist(), ranks[lowest].tolist()))
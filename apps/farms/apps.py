@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.core import checks
 from django.utils.translation import ugettext_lazy as _
 
 
 class FarmConfig(AppConfig):
     name = 'apps.farms'
     verbose_name = _("Farms")
+
+    def ready(self):
+        from apps.farms import signals  # noqa
+        from farm_management_system.search import check_full_text_triggers
+
+        # Reads the database, so only run by check --tag database and the tests.
+        checks.register(check_full_text_triggers, checks.Tags.database)
@@ -1,3 +1,161 @@
+from django import forms
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AdminDateWidget, AutocompleteSelect
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _, gettext_lazy
+
+from apps.farms.allocation import TOLERANCE, peak_use
+from apps.farms.models import Crop, CropSummary, Expense, Field, apply_to_rollups
+from apps.users.models import User
+
+
+class HarvestActionForm(ActionForm):
+    """
+    The changelist action form of the crops, with the date the mark_harvested action sets. It is
+    parsed by the action, a date field would turn a typo into Django's "No action selected".
+    """
+    date_harvesting = forms.CharField(
+        required=False, label=gettext_lazy('Harvested on'),
+        widget=forms.TextInput(attrs={'placeholder': 'YYYY-MM-DD', 'size': 10}))
+
+
+class CropForm(forms.ModelForm):
+    """The crop admin form, refusing crops that need more acres than their field has free."""
+
+    class Meta:
+        model = Crop
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        field, acres = cleaned_data.get('field'), cleaned_data.get('total_acres')
+        date_sowing, date_harvesting = cleaned_data.get('date_sowing'), cleaned_data.get('date_harvesting')
+        if field is None or acres is None or date_sowing is None or 'date_harvesting' in self.errors:
+            return cleaned_data
+        if date_harvesting and date_harvesting < date_sowing:
+            self.add_error('date_harvesting', _('The harvest cannot be before the sowing.'))
+            return cleaned_data
+        if acres > field.total_acres + TOLERANCE:
+            self.add_error('total_acres', _('%(field)s only has %(total)g acres.') % {
+                'field': field, 'total': field.total_acres})
+            return cleaned_data
+        in_use, date, crop_ids = peak_use(field, acres, date_sowing, date_harvesting, exclude=self.instance.pk)
+        if in_use > field.total_acres + TOLERANCE:
+            crops = Crop.objects.select_related('crop_type', 'field').filter(pk__in=crop_ids).order_by('date_sowing')
+            self.add_error('total_acres', _(
+                'Only %(free)g of the %(total)g acres of %(field)s are free on %(date)s, %(crops)s are in the ground.'
+            ) % {'free': max(field.total_acres - (in_use - acres), 0), 'total': field.total_acres, 'field': field,
+                 'date': date, 'crops': ', '.join(map(str, crops))})
+        return cleaned_data
+
+
+class ExpenseRowForm(forms.ModelForm):
+    """One row of the expense grid, the crop and users come from the ExpenseBatchForm."""
+
+    class Meta:
+        model = Expense
+        fields = ('expense_type', 'amount', 'expense_date', 'notes')
+        widgets = {
+            'amount': forms.NumberInput(attrs={'class': 'vIntegerField'}),
+            'expense_date': AdminDateWidget,
+            'notes': forms.TextInput(attrs={'class': 'vTextField'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Rows left at their initial values are blank and skipped.
+        self.fields['expense_date'].initial = timezone.localdate
+
+
+ExpenseRowFormSet = forms.formset_factory(ExpenseRowForm, extra=40)
+
+
+class ExpenseBatchForm(forms.Form):
+    """
+    The crop, or the field, and the users a grid of ExpenseRowForms is entered for. Against a
+    field, every row goes to the crop last sown on the field on or before its date.
+    """
+    crop = forms.ModelChoiceField(Crop.objects.none(), required=False, label=gettext_lazy('Crop'))
+    field = forms.ModelChoiceField(Field.objects.none(), required=False, label=gettext_lazy('Field'))
+    spent_by = forms.ModelChoiceField(User.objects.none(), label=gettext_lazy('Expend by'))
+    added_by = forms.ModelChoiceField(User.objects.none(), label=gettext_lazy('Added by'))
+
+    def __init__(self, user, admin_site, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        crops = Crop.objects.select_related('crop_type', 'field')
+        fields = Field.objects.all()
+        users = User.objects.all()
+        # The same scoping as ExpenseAdmin.formfield_for_foreignkey().
+        if not user.is_superuser:
+            crops = crops.filter(owner=user)
+            fields = fields.filter(farm__owner=user)
+            users = users.filter(pk=user.pk)
+        self.fields['crop'].queryset = crops
+        self.fields['field'].queryset = fields
+        self.fields['spent_by'].queryset = self.fields['added_by'].queryset = users
+        self.fields['spent_by'].initial = self.fields['added_by'].initial = user.pk
+        relations = {
+            'crop': Expense._meta.get_field('crop'), 'field': Crop._meta.get_field('field'),
+            'spent_by': Expense._meta.get_field('spent_by'), 'added_by': Expense._meta.get_field('added_by'),
+        }
+        for name, model_field in relations.items():
+            widget = AutocompleteSelect(model_field.remote_field, admin_site, choices=self.fields[name].choices)
+            widget.is_required = self.fields[name].required
+            self.fields[name].widget = widget
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if bool(cleaned_data.get('crop')) == bool(cleaned_data.get('field')) and not self.errors:
+            raise forms.ValidationError(_('Choose either a crop or a field.'))
+        return cleaned_data
+
+    def expenses(self, rows):
+        """
+        Unsaved expenses of the rows that were filled in, with their crop, owner and farm set.
+        Rows without a crop get an error and make the result empty.
+        """
+        crop, field = self.cleaned_data['crop'], self.cleaned_data['field']
+        sowings = []
+        if field:
+            sowings = list(Crop.objects.filter(field=field).select_related('field').order_by('date_sowing', 'pk'))
+        expenses = []
+        for row in rows:
+            if not row.has_changed():
+                continue
+            expense = row.instance
+            if field:
+                date = row.cleaned_data['expense_date']
+                sown = [sowing for sowing in sowings if sowing.date_sowing <= date]
+                if not sown:
+                    row.add_error('expense_date', _('No crop sown on %(field)s by %(date)s.') % {
+                        'field': field, 'date': date})
+                    continue
+                crop = sown[-1]
+            expense.crop_id = crop.pk
+            expense.owner_id = crop.owner_id
+            expense.farm_id = crop.field.farm_id
+            expense.spent_by = self.cleaned_data['spent_by']
+            expense.added_by = self.cleaned_data['added_by']
+            expenses.append(expense)
+        if not expenses and rows.is_valid():
+            self.add_error(None, _('Fill in at least one expense.'))
+        return expenses if rows.is_valid() else []
+
+    def save(self, expenses):
+        """
+        Insert expenses with one bulk_create() and add the whole batch to the summaries of their
+        crops and to the daily and monthly rollups once, in one transaction.
+        """
+        with transaction.atomic():
+            Expense.objects.bulk_create(expenses)
+            # bulk_create() sends no pre_save or post_save, so the signal handlers that update the
+            # summaries and rollups one expense at a time never run, the deltas are applied here.
+            CropSummary.objects.add(expenses=expenses)
+            apply_to_rollups(expenses)
+        return expenses
+
+
 # import datetime
 #
 # from django.contrib.auth import forms
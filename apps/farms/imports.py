@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.dateparse import parse_date
+from django.utils.translation import gettext as _, override
+from modeltranslation.utils import build_localized_fieldname
+
+from apps.farms.models import Crop, CropSummary, Expense, Output, OutputDateBucket, apply_to_rollups
+from apps.users.models import User
+from farm_management_system.imports import CsvImporter
+
+
+class CropLookup:
+    """
+    Resolves a crop from its id, or from its field and crop type names (in any language) and
+    a date, picking the crop of that type last sown on the field on or before the date.
+    """
+
+    def __init__(self, crops):
+        name_fields = ['crop_type__name'] + [
+            'crop_type__' + build_localized_fieldname('name', code) for code, name in settings.LANGUAGES]
+        self.owners = {}
+        self.farms = {}
+        self.fields = {}
+        self.field_ids = defaultdict(set)
+        self.sowings = defaultdict(list)
+        rows = crops.order_by('date_sowing', 'pk').values_list(
+            'pk', 'owner_id', 'field__farm_id', 'date_sowing', 'field_id', 'field__name', *name_fields)
+        for pk, owner_id, farm_id, date_sowing, field_id, field_name, *crop_type_names in rows:
+            field_name = field_name.strip().lower()
+            self.owners[pk] = owner_id
+            self.farms[pk] = farm_id
+            self.fields[pk] = field_id
+            self.field_ids[field_name].add(field_id)
+            for crop_type_name in {name.strip().lower() for name in crop_type_names if name}:
+                self.sowings[field_name, crop_type_name].append((date_sowing, pk))
+
+    def resolve(self, row, date_column, errors):
+        if row.get('crop'):
+            try:
+                crop_id = int(row['crop'])
+            except ValueError:
+                crop_id = None
+            if crop_id not in self.owners:
+                errors['crop'] = [_('No crop with id %s.') % row['crop']]
+            return crop_id
+
+        field_name, crop_type_name = row.get('field', '').lower(), row.get('crop_type', '').lower()
+        if not field_name or not crop_type_name:
+            errors['crop'] = [_('Give the crop id, or the field and crop_type names.')]
+            return None
+        if len(self.field_ids[field_name]) > 1:
+            errors['field'] = [_('Several fields are named %s, give the crop id instead.') % row['field']]
+            return None
+        try:
+            date = parse_date(row.get(date_column, ''))
+        except ValueError:
+            date = None
+        if date is None:
+            # The date column reports its own error.
+            return None
+        crop_id = None
+        for date_sowing, pk in self.sowings[field_name, crop_type_name]:
+            if date_sowing > date:
+                break
+            crop_id = pk
+        if crop_id is None:
+            errors['crop'] = [_('No %(crop_type)s crop sown on %(field)s by %(date)s.') % {
+                'crop_type': row['crop_type'], 'field': row['field'], 'date': date}]
+        return crop_id
+
+
+class FarmRecordImporter(CsvImporter):
+    """Shared scoping of the crops and users an owner may import rows for."""
+    date_column = None
+
+    def load_lookups(self):
+        crops = Crop.objects.all()
+        users = User.objects.all()
+        if not self.user.is_superuser:
+            crops = crops.filter(owner=self.user)
+            users = users.filter(pk=self.user.pk)
+        self.crops = CropLookup(crops)
+        self.users = {username.lower(): pk for username, pk in users.values_list('username', 'pk')}
+
+    def user_id(self, row, column, errors, default=None):
+        if not row.get(column):
+            if default is None:
+                errors[column] = [_('This field is required.')]
+            return default
+        user_id = self.users.get(row[column].lower())
+        if user_id is None:
+            errors[column] = [_('No user %s.') % row[column]]
+        return user_id
+
+
+class ExpenseImporter(FarmRecordImporter):
+    model = Expense
+    columns = ('crop', 'field', 'crop_type', 'expense_type', 'amount', 'expense_date', 'notes', 'spent_by',
+               'added_by')
+    required_columns = ('expense_type', 'amount', 'expense_date', 'spent_by')
+    date_column = 'expense_date'
+    column_choices = {'expense_type': Expense.EXPENSE_TYPE_CHOICES}
+
+    def load_lookups(self):
+        super().load_lookups()
+        # Types may be given by their code or by their label in any language.
+        self.expense_types = {}
+        for code, label in self.column_choices['expense_type']:
+            self.expense_types[code] = code
+            for language, name in settings.LANGUAGES:
+                with override(language):
+                    self.expense_types[str(label).lower()] = code
+
+    def row_values(self, row, errors):
+        crop_id = self.crops.resolve(row, self.date_column, errors)
+        return {
+            'crop_id': crop_id,
+            'owner_id': self.crops.owners.get(crop_id),
+            'farm_id': self.crops.farms.get(crop_id),
+            'expense_type': self.expense_types.get(row['expense_type'].lower(), row['expense_type']),
+            'amount': row['amount'],
+            'expense_date': row['expense_date'],
+            'notes': row.get('notes') or None,
+            'spent_by_id': self.user_id(row, 'spent_by', errors),
+            'added_by_id': self.user_id(row, 'added_by', errors, default=self.user.pk),
+        }
+
+    def saved(self, objects):
+        CropSummary.objects.add(expenses=objects)
+        apply_to_rollups(objects)
+
+
+class OutputImporter(FarmRecordImporter):
+    model = Output
+    columns = ('crop', 'field', 'crop_type', 'total_mann', 'rate_per_mann', 'sold_date', 'notes')
+    required_columns = ('total_mann', 'rate_per_mann', 'sold_date')
+    date_column = 'sold_date'
+
+    def row_values(self, row, errors):
+        crop_id = self.crops.resolve(row, self.date_column, errors)
+        return {
+            'crop_id': crop_id,
+            'owner_id': self.crops.owners.get(crop_id),
+            'farm_id': self.crops.farms.get(crop_id),
+            'field_id': self.crops.fields.get(crop_id),
+            'total_mann': row['total_mann'],
+            'rate_per_mann': row['rate_per_mann'],
+            'sold_date': row['sold_date'],
+            'notes': row.get('notes') or None,
+        }
+
+    def saved(self, objects):
+        CropSummary.objects.add(outputs=objects)
+        OutputDateBucket.objects.refresh((obj.crop_id, obj.sold_date) for obj in objects)
+
+
+IMPORTERS = {
+    'expense': ExpenseImporter,
+    'output': OutputImporter,
+}
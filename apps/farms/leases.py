@@ -0,0 +1,107 @@
+"""
+Lease expenses booked from the leases of the fields.
+
+A leased field costs lease_per_acre a year for each of its total_acres while its lease runs.
+Each calendar month of that cost is charged to the crops on the field that month, by their
+acres and the days they occupied it, as one Lease expense per crop and month. A field whose
+crops claim more acre-days than it has charges them proportionally less. Days no crop
+occupies are not booked, as expenses belong to crops.
+
+The booked expenses carry the month in lease_period, unique per crop, so running the accrual
+again only books the months and crops not booked yet. Amounts already booked are left alone,
+even if the lease or the crops have changed since. Their notes name the field and the month in
+the language active when they are booked.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils.translation import gettext as _
+
+from apps.farms.models import Crop, CropSummary, Expense, ExpenseMonthly, Field, apply_to_rollups
+
+DAYS_PER_YEAR = 365
+
+
+def months(start, end):
+    """The (first day, last day) of the calendar months from start to end inclusive."""
+    month = start.replace(day=1)
+    while month <= end:
+        next_month = ExpenseMonthly.next_period(month)
+        yield month, next_month - datetime.timedelta(days=1)
+        month = next_month
+
+
+def last_closed_month(today):
+    """The last day of the month before today's, the last month accrue() books by default."""
+    return today.replace(day=1) - datetime.timedelta(days=1)
+
+
+def leased_fields(start, end):
+    """The active leased fields whose lease overlaps start to end."""
+    return Field.objects.filter(
+        is_active=True, is_own_property=False, lease_per_acre__gt=0, total_acres__gt=0,
+        lease_start__isnull=False, lease_start__lte=end,
+    ).filter(Q(lease_end__isnull=True) | Q(lease_end__gte=start))
+
+
+def first_lease_start():
+    return leased_fields(datetime.date.min, datetime.date.max).aggregate(start=Min('lease_start'))['start']
+
+
+def accruals(start, end):
+    """
+    Unsaved Lease expenses of the months from start to end not booked yet, reading the fields,
+    their crops and the booked months with one query each.
+    """
+    start = start.replace(day=1)
+    fields = leased_fields(start, end)
+    crops = defaultdict(list)
+    for row in Crop.objects.filter(field__in=fields, date_sowing__lte=end).filter(
+            Q(date_harvesting__isnull=True) | Q(date_harvesting__gte=start)).values_list(
+            'pk', 'field_id', 'owner_id', 'total_acres', 'date_sowing', 'date_harvesting').iterator():
+        crops[row[1]].append(row)
+    booked = set(Expense.objects.filter(
+        lease_period__gte=start, lease_period__lte=end).values_list('crop_id', 'lease_period'))
+
+    expenses = []
+    for field_id, farm_id, name, total_acres, lease_per_acre, lease_start, lease_end in fields.values_list(
+            'pk', 'farm_id', 'name', 'total_acres', 'lease_per_acre', 'lease_start', 'lease_end').iterator():
+        if not crops[field_id]:
+            continue
+        for month, month_end in months(max(start, lease_start), min(end, lease_end or end)):
+            first, last = max(month, lease_start), min(month_end, lease_end or month_end)
+            occupied = []
+            for crop_id, crop_field_id, owner_id, acres, date_sowing, date_harvesting in crops[field_id]:
+                crop_first, crop_last = max(first, date_sowing), min(last, date_harvesting or last)
+                if crop_last >= crop_first and acres > 0:
+                    occupied.append((crop_id, owner_id, acres * ((crop_last - crop_first).days + 1), crop_last))
+            claimed = sum(acre_days for crop_id, owner_id, acre_days, crop_last in occupied)
+            scale = min(1, total_acres * ((last - first).days + 1) / claimed) if claimed else 0
+            for crop_id, owner_id, acre_days, crop_last in occupied:
+                amount = round(lease_per_acre * acre_days * scale / DAYS_PER_YEAR)
+                if amount <= 0 or (crop_id, month) in booked:
+                    continue
+                expenses.append(Expense(
+                    crop_id=crop_id, expense_type=Expense.LEASE, expense_date=crop_last, amount=amount,
+                    notes=_('Lease of %(field)s for %(month)s') % {'field': name, 'month': f'{month:%Y-%m}'},
+                    spent_by_id=owner_id, added_by_id=owner_id,
+                    owner_id=owner_id, farm_id=farm_id, lease_period=month,
+                ))
+    return expenses
+
+
+def accrue(start, end, batch_size=5000):
+    """
+    Book the Lease expenses of the months from start to end not booked yet, in batches that
+    also update the crop summaries and the expense rollups. Returns the expenses booked.
+    """
+    expenses = accruals(start, end)
+    for offset in range(0, len(expenses), batch_size):
+        batch = expenses[offset:offset + batch_size]
+        with transaction.atomic():
+            Expense.objects.bulk_create(batch)
+            CropSummary.objects.add(expenses=batch)
+            apply_to_rollups(batch)
+    return expenses
@@ -0,0 +1,51 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.farms.leases import accruals, accrue, first_lease_start, last_closed_month
+
+
+def month(value):
+    """The first day of a YYYY-MM month, argparse reports the ValueError of others."""
+    return datetime.datetime.strptime(value, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = ('Book the lease of the active leased fields as Lease expenses of the crops on them, month by month. '
+            'Months already booked are skipped, so it is safe to run again. Meant to run from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since', type=month, help='First month to book, YYYY-MM. Defaults to the earliest lease start.')
+        parser.add_argument(
+            '--until', type=month, help='Last month to book, YYYY-MM. Defaults to the month before this one.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Expenses inserted per transaction.')
+        parser.add_argument(
+            '--check', action='store_true', help='Only report the lease not booked yet, do not book it.')
+
+    def handle(self, *args, **options):
+        closed = last_closed_month(timezone.localdate())
+        end = last_closed_month(options['until'] + datetime.timedelta(days=32)) if options['until'] else closed
+        if end > closed:
+            # A month still running would be booked short and then skipped when it closes.
+            raise CommandError(f'Only months up to {closed:%Y-%m} have closed.')
+        start = options['since'] or first_lease_start()
+        if start is None or start > end:
+            self.stdout.write(self.style.SUCCESS('No lease to book.'))
+            return
+
+        if options['check']:
+            due = accruals(start, end)
+            if due:
+                raise CommandError(
+                    f'{len(due)} lease expenses of Rs. {sum(expense.amount for expense in due):.0f} from '
+                    f'{start:%Y-%m} to {end:%Y-%m} are not booked, for crops '
+                    f"{', '.join(map(str, sorted({expense.crop_id for expense in due})[:50]))}")
+            self.stdout.write(self.style.SUCCESS(f'The lease from {start:%Y-%m} to {end:%Y-%m} is booked.'))
+            return
+
+        booked = accrue(start, end, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Booked {len(booked)} lease expenses of Rs. {sum(expense.amount for expense in booked):.0f} '
+            f'from {start:%Y-%m} to {end:%Y-%m}.'))
@@ -0,0 +1,152 @@
+import json
+import math
+import subprocess
+import tracemalloc
+from time import perf_counter
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, RequestFactory, override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from apps.users.middlewares import QueryMetrics
+from apps.users.models import User
+
+
+def percentile(values, fraction):
+    """Nearest rank percentile of a non empty list."""
+    values = sorted(values)
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = ('Time every registered admin changelist (bare, with each list filter choice and with all filters '
+            'combined), change form and add form through the test client, as a superuser and as an owner. '
+            'Reports p50/p95 latency, query counts and peak memory, and writes them to a JSON file.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per page.')
+        parser.add_argument('--choices', type=int, default=3, help='Choices of each list filter to request.')
+        parser.add_argument(
+            '--owner', help='Username of the owner to benchmark as, the first staff owner by default.')
+        parser.add_argument('--output', default='benchmark.json', help='File the results are written to.')
+        parser.add_argument('--compare', help='Results of an earlier run to print the changes against.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+        users = [User.objects.filter(is_superuser=True, is_active=True).first()]
+        owner = User.objects.filter(is_superuser=False, is_staff=True, is_active=True, farm__isnull=False)
+        if options['owner']:
+            owner = User.objects.filter(username=options['owner'])
+        users.append(owner.first())
+        users = [user for user in users if user]
+        if not users:
+            raise CommandError('There is no superuser or owner to benchmark as.')
+
+        results = []
+        self.stdout.write(f"{'p50 ms':>9} {'p95 ms':>9} {'queries':>7} {'peak KiB':>9}  user url")
+        # Budgets must not abort the run, the query counts are reported instead.
+        with override_settings(ALLOWED_HOSTS=['testserver'], QUERY_BUDGETS_STRICT=False):
+            for user in users:
+                client = Client()
+                client.force_login(user)
+                for model, model_admin in admin.site._registry.items():
+                    for kind, url in self.urls(model, model_admin, user, options['choices']):
+                        result = self.measure(client, url, options['repeat'])
+                        result.update(user=user.username, model=model._meta.label, kind=kind, url=url)
+                        results.append(result)
+                        self.stdout.write(
+                            f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['queries']:>7} "
+                            f"{result['peak_kib']:>9.0f}  {user.username} {url}")
+
+        run = {
+            'commit': self.commit(),
+            'date': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'rows': {
+                model._meta.label: model._default_manager.count() for model in admin.site._registry
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(run, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}."))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def urls(self, model, model_admin, user, choices):
+        opts = model._meta
+        changelist_url = reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+        yield 'changelist', changelist_url
+
+        request = RequestFactory().get(changelist_url)
+        request.user = user
+        changelist = model_admin.get_changelist_instance(request)
+        combined = {}
+        for spec in changelist.filter_specs:
+            chosen = [choice for choice in spec.choices(changelist) if not choice['selected']][:choices]
+            for choice in chosen:
+                yield 'filter', changelist_url + choice['query_string']
+            if chosen:
+                combined.update(parse_qsl(chosen[0]['query_string'].lstrip('?')))
+        if len(changelist.filter_specs) > 1 and combined:
+            yield 'filters', f'{changelist_url}?{urlencode(sorted(combined.items()))}'
+
+        pk = model_admin.get_queryset(request).order_by('pk').values_list('pk', flat=True).first()
+        if pk is not None:
+            try:
+                yield 'change', reverse(f'admin:{opts.app_label}_{opts.model_name}_change', args=[pk])
+            except NoReverseMatch:
+                # Dashboards have no change form.
+                pass
+        if model_admin.has_add_permission(request):
+            yield 'add', reverse(f'admin:{opts.app_label}_{opts.model_name}_add')
+
+    def measure(self, client, url, repeat):
+        # The first request warms the caches and measures queries and memory, tracing slows the timed ones.
+        queries = QueryMetrics(slowest=0)
+        tracemalloc.start()
+        with connection.execute_wrapper(queries):
+            response = client.get(url)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        timings = []
+        for number in range(repeat):
+            start = perf_counter()
+            client.get(url)
+            timings.append((perf_counter() - start) * 1000)
+        return {
+            'status': response.status_code,
+            'queries': queries.count,
+            'peak_kib': round(peak / 1024),
+            'p50_ms': round(percentile(timings, 0.5), 1),
+            'p95_ms': round(percentile(timings, 0.95), 1),
+            'max_ms': round(max(timings), 1),
+        }
+
+    def commit(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def compare(self, path, results):
+        with open(path) as previous:
+            previous = {(result['user'], result['url']): result for result in json.load(previous)['results']}
+        self.stdout.write('Changes against ' + path)
+        for result in results:
+            before = previous.get((result['user'], result['url']))
+            if not before:
+                continue
+            self.stdout.write(
+                f"{result['p50_ms'] - before['p50_ms']:>+9.1f} ms {result['queries'] - before['queries']:>+6} queries"
+                f"  {result['user']} {result['url']}")
@@ -0,0 +1,98 @@
+import math
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, ExtractYear
+
+from apps.farms.analytics import DIMENSIONS, METRICS, CropSnapshot, quantile
+from apps.farms.models import Crop, Expense, Output
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class Command(BaseCommand):
+    help = ('Compute the grouped crop performance statistics with the NumPy snapshot and in plain Python from one '
+            'query of the totals of every crop, report the time of both and check they agree.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--by', nargs='+', default=['crop_type', 'breed', 'season'], choices=list(DIMENSIONS),
+            help='Dimensions to group by.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs of each, the fastest is reported.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+        by = options['by']
+        snapshot_ms, snapshot = self.timed(lambda: CropSnapshot().grouped(by, quantiles=QUANTILES), options['repeat'])
+        orm_ms, orm = self.timed(lambda: self.orm_grouped(by), options['repeat'])
+
+        differences = 0
+        for group in snapshot:
+            expected = orm.get(tuple(group['key'][name] for name in by), {})
+            for name in METRICS:
+                stats, other = group[name], expected.get(name)
+                if (stats is None) != (other is None):
+                    differences += 1
+                elif stats and not all(math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-6) for a, b in zip(
+                        [stats['mean'], stats['variance'], *stats['quantiles']], other)):
+                    differences += 1
+        self.stdout.write(f'{len(snapshot)} groups of {", ".join(by)}')
+        self.stdout.write(f'{snapshot_ms:>10.1f} ms  columnar snapshot')
+        self.stdout.write(f'{orm_ms:>10.1f} ms  one query and Python')
+        if differences:
+            raise CommandError(f'{differences} statistics differ between the two.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Both agree, the snapshot took {snapshot_ms / max(orm_ms, 0.001):.2f} times as long.'))
+
+    def timed(self, function, repeat):
+        timings, result = [], None
+        for number in range(repeat):
+            start = perf_counter()
+            result = function()
+            timings.append((perf_counter() - start) * 1000)
+        return min(timings), result
+
+    def orm_grouped(self, by):
+        """
+        Return {group key: {metric: [mean, variance, *quantiles]}} computed in Python from a single
+        query of every crop's dimensions and totals.
+        """
+        expenses = Expense.objects.filter(crop=OuterRef('pk')).order_by().values('crop')
+        outputs = Output.objects.filter(crop=OuterRef('pk')).order_by().values('crop')
+        crops = Crop.objects.annotate(
+            expense=Coalesce(Subquery(
+                expenses.annotate(total=Sum('amount')).values('total'), output_field=FloatField()), 0),
+            revenue=Coalesce(Subquery(
+                outputs.annotate(total=Sum(F('total_mann') * F('rate_per_mann'), output_field=FloatField()))
+                .values('total'), output_field=FloatField()), 0),
+            mann=Coalesce(Subquery(
+                outputs.annotate(total=Sum('total_mann')).values('total'), output_field=FloatField()), 0),
+            year=ExtractYear('date_sowing'),
+        )
+        columns = ['crop_type_id' if name == 'crop_type' else name for name in by]
+
+        groups = {}
+        for *key, acres, expense, revenue, mann in crops.values_list(
+                *columns, 'total_acres', 'expense', 'revenue', 'mann').order_by().iterator():
+            values = groups.setdefault(tuple(key), {name: [] for name in METRICS})
+            if acres > 0:
+                values['cost_per_acre'].append(expense / acres)
+                values['revenue_per_acre'].append(revenue / acres)
+                values['profit_per_acre'].append((revenue - expense) / acres)
+                values['yield_per_acre'].append(mann / acres)
+            if mann > 0:
+                values['break_even_price'].append(expense / mann)
+
+        results = {}
+        for key, values in groups.items():
+            for name, column in values.items():
+                if not column:
+                    continue
+                column.sort()
+                mean = math.fsum(column) / len(column)
+                variance = math.fsum((value - mean) ** 2 for value in column) / len(column)
+                results.setdefault(key, {})[name] = [
+                    mean, variance, *(quantile(column, fraction) for fraction in QUANTILES)]
+        return results
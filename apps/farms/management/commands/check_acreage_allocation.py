@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.farms.allocation import audit, is_over_allocated
+from apps.farms.models import Crop
+
+
+class Command(BaseCommand):
+    help = ('Sweep the crops of every field in one pass and report, per field and season, the fields whose crops '
+            'were in the ground on more acres than the field has, and those left mostly unused.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--under', type=float, default=50,
+            help='Report seasons whose crops used less than this percentage of the field at their peak.')
+
+    def handle(self, *args, **options):
+        seasons = dict(Crop.SEASON_CHOICES)
+        over = under = 0
+        for row in audit():
+            line = (f"Field {row['field_id']} ({row['field']}), {seasons.get(row['season'], row['season'])} "
+                    f"{row['year']}: {row['peak_acres']:g} of {row['field_acres']:g} acres in use on {row['date']}, "
+                    f"crops {', '.join(map(str, row['crop_ids']))}")
+            if is_over_allocated(row):
+                over += 1
+                self.stdout.write(self.style.ERROR(line))
+            elif row['peak_acres'] < row['field_acres'] * options['under'] / 100:
+                under += 1
+                self.stdout.write(self.style.WARNING(line))
+
+        if under:
+            self.stdout.write(f"{under} field seasons used less than {options['under']:g}% of their acres.")
+        if over:
+            raise CommandError(f'{over} field seasons had more acres sown than the field has.')
+        self.stdout.write(self.style.SUCCESS('No field had more acres sown than it has.'))
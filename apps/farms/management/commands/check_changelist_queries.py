@@ -0,0 +1,62 @@
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.users.middlewares import get_query_budget
+from apps.users.models import User
+from farm_management_system.query_checks import admin_request, render_changelist
+
+
+class Command(BaseCommand):
+    help = ('Render every registered admin changelist with a small and a large page size and fail when the '
+            'number of queries grows with the number of rows shown, or exceeds the QUERY_BUDGETS of the page.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=5, help='Rows on the small page.')
+        parser.add_argument('--large', type=int, default=100, help='Rows on the large page.')
+        parser.add_argument(
+            '--owner', help='Username of a non superuser owner to also render the owner scoped changelists as.')
+
+    def handle(self, *args, **options):
+        users = [User(username='query-counter', is_superuser=True, is_staff=True, is_active=True)]
+        owner = User.objects.filter(is_superuser=False, is_staff=True)
+        if options['owner']:
+            owner = owner.filter(username=options['owner'])
+        owner = owner.first()
+        if owner:
+            users.append(owner)
+
+        failures = []
+        for user in users:
+            for model, model_admin in admin.site._registry.items():
+                if not model_admin.has_change_permission(admin_request(user)):
+                    # The admin index does not list these for the user either.
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'{model._meta.label} as {user.username}: skipped, no change permission')
+                    continue
+                # Warm up the per-user permission caches so both renders are measured alike.
+                self.count_queries(model_admin, user, options['small'])
+                small = self.count_queries(model_admin, user, options['small'])
+                large = self.count_queries(model_admin, user, options['large'])
+                line = f'{model._meta.label} as {user.username}: {small} queries for {options["small"]} rows, ' \
+                       f'{large} queries for {options["large"]} rows'
+                budget = get_query_budget(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+                if budget is not None:
+                    line += f', budget {budget}'
+                if large > small or (budget is not None and large > budget):
+                    failures.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                elif options['verbosity'] > 1:
+                    self.stdout.write(line)
+
+        if failures:
+            raise CommandError(
+                f'{len(failures)} changelists issue more queries for larger pages or exceed their budget.')
+        self.stdout.write(
+            self.style.SUCCESS('Every changelist renders with a constant number of queries within budget.'))
+
+    def count_queries(self, model_admin, user, per_page):
+        with CaptureQueriesContext(connection) as context:
+            render_changelist(model_admin, user, per_page)
+        return len(context.captured_queries)
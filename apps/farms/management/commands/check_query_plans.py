@@ -0,0 +1,61 @@
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.farms.models import Crop, Expense, Output
+from apps.ledgers.models import LedgerEntries
+from apps.users.models import User
+from farm_management_system.query_checks import (
+    admin_request, changelist_plans, changelist_query_strings, plan_issues)
+
+LARGE_MODELS = (Crop, Expense, Output, LedgerEntries)
+
+
+class Command(BaseCommand):
+    help = ('Run every registered admin changelist (and each of its list filters) and fail when SQLite plans a '
+            'full table scan or a temporary B-tree sort on one of the large tables.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--owner', help='Username of a non superuser owner to also check the owner scoped changelists with.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Query plans can only be checked on SQLite.')
+
+        users = [User(username='plan-checker', is_superuser=True, is_staff=True, is_active=True)]
+        owner = User.objects.filter(is_superuser=False, is_staff=True)
+        if options['owner']:
+            owner = owner.filter(username=options['owner'])
+        owner = owner.first()
+        if owner:
+            users.append(owner)
+
+        large_tables = {model._meta.db_table for model in LARGE_MODELS}
+        problems = []
+        for user in users:
+            for model, model_admin in admin.site._registry.items():
+                if not model_admin.has_change_permission(admin_request(user)):
+                    # The admin index does not list these for the user either.
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'{model._meta.label} as {user.username}: skipped, no change permission')
+                    continue
+                for query_string in changelist_query_strings(model_admin, user):
+                    for sql, plan in changelist_plans(model_admin, user, query_string):
+                        issues = plan_issues(plan, large_tables)
+                        if options['verbosity'] > 1:
+                            self.stdout.write(f'{model._meta.label} ?{query_string} as {user.username}: {sql}')
+                            for line in plan:
+                                self.stdout.write(f'    {line}')
+                        if issues:
+                            problems.append((user, model, query_string, sql, plan, issues))
+
+        for user, model, query_string, sql, plan, issues in problems:
+            self.stdout.write(self.style.ERROR(
+                f"{model._meta.label} changelist ?{query_string} as {user.username}: {', '.join(issues)}"))
+            self.stdout.write(f'  {sql}')
+            for line in plan:
+                self.stdout.write(f'    {line}')
+        if problems:
+            raise CommandError(f'{len(problems)} changelist queries scan or sort a large table.')
+        self.stdout.write(self.style.SUCCESS('All changelist queries use indexes.'))
@@ -0,0 +1,276 @@
+import datetime
+import random
+
+from django.contrib.auth.models import Group, Permission
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.farms.models import (
+    Crop, CropSummary, CropType, Expense, Farm, Field, Output, OutputDateBucket, apply_to_rollups,
+)
+from apps.ledgers.models import Ledger, LedgerEntries
+from apps.users.models import User
+from farm_management_system.filters import invalidate_filter_choices
+
+# Crop types with the month range they are sown in, their growing days and sale rate per mann.
+CROP_TYPES = {
+    Crop.SUMMER: [('Cotton', (4, 6), 180, (3000, 6000)), ('Rice', (5, 7), 130, (1200, 2500))],
+    Crop.WINTER: [('Wheat', (10, 12), 160, (1000, 2000)), ('Mustard', (10, 11), 140, (2500, 4500))],
+    Crop.MID_SEASON: [('Maize', (1, 3), 110, (900, 1800)), ('Sunflower', (1, 2), 100, (2000, 3500))],
+}
+
+# Relative frequency and typical amount per acre of each expense type.
+EXPENSE_TYPES = [
+    (Expense.SEED, 3, 4000), (Expense.FERTILIZER, 6, 6000), (Expense.PESTICIDES, 5, 3000),
+    (Expense.WATER, 6, 1500), (Expense.ELECTRICITY_BILL, 3, 2500), (Expense.OIL, 4, 2000),
+    (Expense.LABOUR, 8, 2500), (Expense.LEASE, 1, 30000), (Expense.MISC, 2, 1000),
+]
+
+# Seasons in the order they are sown in within a year.
+SEASONS = sorted(CROP_TYPES, key=lambda season: min(months[0] for name, months, days, rates in CROP_TYPES[season]))
+
+# Notes of each expense type, filled in by Command.note().
+EXPENSE_NOTES = {
+    Expense.SEED: ['{bags} bags of {crop} seed from {shop}', '{crop} seed, treated', 'Seed for {acres} acres'],
+    Expense.FERTILIZER: ['{bags} bags of urea', '{bags} bags of DAP from {shop}', 'Potash before the second water'],
+    Expense.PESTICIDES: ['Spray for whitefly', 'Weedicide on {acres} acres', 'Sprayer hire and {crop} spray'],
+    Expense.WATER: ['Canal water charges', 'Tubewell water from {person}', 'Water for {acres} acres, {hours} hours'],
+    Expense.ELECTRICITY_BILL: ['Tubewell bill', 'Electricity bill of the tubewell motor'],
+    Expense.OIL: ['Diesel for the tractor, {litres} litres', 'Diesel for the peter engine', 'Mobil oil change'],
+    Expense.LABOUR: ['Wages of {person} for {days} days', 'Harvesting labour', 'Weeding, {days} days of labour'],
+    Expense.LEASE: ['Lease instalment to the landlord', 'Share of the lease for {acres} acres'],
+    Expense.MISC: ['Tractor repair', 'Transport to the farm', 'Tea and food for the labour', 'Gunny bags'],
+}
+OUTPUT_NOTES = ['Sold at {market} mandi', 'Sold to {person} through the arhti', 'Moisture cut taken at {market}',
+                'Sold at the farm gate', 'Paid in two instalments by {person}']
+ENTRY_NOTES = {
+    LedgerEntries.DEBIT: ['Paid to {person}', 'Advance to {person} for labour', 'Fertilizer on credit from {shop}',
+                          'Diesel on credit, {litres} litres', 'Commission of the arhti at {market}'],
+    LedgerEntries.CREDIT: ['Received from {person}', '{crop} sale proceeds from {market}',
+                           'Loan instalment from {person}', 'Cash deposited by {person}'],
+}
+PEOPLE = ['Muhammad Aslam', 'Ghulam Rasool', 'Rashid Ali', 'Bashir Ahmad', 'Nadeem Abbas', 'Iqbal Hussain']
+SHOPS = ['Kissan Seed Store', 'Zarai Markaz', 'Al-Madina Traders', 'Punjab Fertilizer Agency']
+MARKETS = ['Okara', 'Sahiwal', 'Pakpattan', 'Chichawatni', 'Arifwala']
+# Share of the rows with no notes.
+EMPTY_NOTES = 0.2
+
+GROUP_NAME = 'Synthetic owners'
+
+
+class Command(BaseCommand):
+    help = ('Generate reproducible synthetic owners, farms, fields, crops, expenses, outputs and ledger entries '
+            'at a configurable scale, inserted in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owners', type=int, default=10, help='Owners to create.')
+        parser.add_argument('--farms', type=int, default=2, help='Farms per owner.')
+        parser.add_argument('--fields', type=int, default=5, help='Fields per farm.')
+        parser.add_argument('--years', type=int, default=3, help='Years of crops, ending with the current one.')
+        parser.add_argument('--crops-per-season', type=int, default=1, help='Crops sown on a field each season.')
+        parser.add_argument('--expenses', type=int, default=40, help='Average expenses per crop.')
+        parser.add_argument('--outputs', type=int, default=4, help='Average outputs per harvested crop.')
+        parser.add_argument('--ledgers', type=int, default=3, help='Ledgers per farm.')
+        parser.add_argument('--entries', type=int, default=500, help='Average entries per ledger.')
+        parser.add_argument(
+            '--seed', type=int, default=0, help='Random seed, the same seed on the same day gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per transaction.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = datetime.date.today()
+        self.prefix = f"synthetic-{options['seed']}"
+
+        owners = self.create_owners(options['owners'])
+        farms = self.insert(Farm, [
+            Farm(name=f'Farm {owner.pk}-{number}', owner=owner)
+            for owner in owners for number in range(1, options['farms'] + 1)
+        ])
+        fields = self.insert(Field, [self.field(farm, number) for farm in farms
+                                     for number in range(1, options['fields'] + 1)])
+        crops = self.create_crops(farms, fields, options['years'], options['crops_per_season'])
+        # bulk_create() sends no post_save, which would expire the cached list filter choices.
+        invalidate_filter_choices(User, Farm, Field, Crop)
+        self.stdout.write(
+            f'Created {len(owners)} owners, {len(farms)} farms, {len(fields)} fields and {len(crops)} crops.')
+
+        expenses = self.create_expenses(crops, options['expenses'])
+        outputs = self.create_outputs(crops, options['outputs'])
+        self.stdout.write(f'Created {expenses} expenses and {outputs} outputs.')
+
+        ledgers = self.insert(Ledger, [
+            Ledger(farm=farm, name=f'Ledger {farm.pk}-{number}', location=farm.name)
+            for farm in farms for number in range(1, options['ledgers'] + 1)
+        ])
+        entries = self.create_entries(ledgers, options['entries'], options['years'])
+        self.stdout.write(self.style.SUCCESS(f'Created {len(ledgers)} ledgers with {entries} entries.'))
+
+    def insert(self, model, objects):
+        """bulk_create() objects and return them with their primary keys, which SQLite does not set."""
+        last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        with transaction.atomic():
+            model.objects.bulk_create(objects)
+        return list(model.objects.filter(pk__gt=last_pk).order_by('pk'))
+
+    def create_owners(self, count):
+        first_number = User.objects.filter(username__startswith=self.prefix).count() + 1
+        owners = self.insert(User, [
+            User(username=f'{self.prefix}-owner-{number}', first_name='Owner', last_name=str(number),
+                 is_staff=True, password='!')
+            for number in range(first_number, first_number + count)
+        ])
+        group, created = Group.objects.get_or_create(name=GROUP_NAME)
+        if created:
+            group.permissions.set(Permission.objects.filter(content_type__app_label__in=['farms', 'ledgers']))
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=owner.pk, group_id=group.pk) for owner in owners
+        ])
+        return owners
+
+    def field(self, farm, number):
+        is_own_property = self.random.random() < 0.6
+        lease_start = self.today.replace(year=self.today.year - 2, month=7, day=1)
+        return Field(
+            farm=farm, name=f'Field {number}', location=f'Chak {self.random.randint(1, 400)}',
+            is_own_property=is_own_property, has_electricity_tubewell=self.random.random() < 0.5,
+            has_canal_irrigation=self.random.random() < 0.7, total_acres=self.random.choice([4, 6, 8, 12, 12.5, 25]),
+            landlord_name='' if is_own_property else f'Landlord {self.random.randint(1, 50)}',
+            lease_per_acre=None if is_own_property else self.random.randrange(40000, 90000, 5000),
+            lease_start=None if is_own_property else lease_start,
+            lease_end=None if is_own_property else lease_start.replace(year=lease_start.year + 3),
+        )
+
+    def note(self, templates, **values):
+        if self.random.random() < EMPTY_NOTES:
+            return ''
+        return self.random.choice(templates).format(
+            person=self.random.choice(PEOPLE), shop=self.random.choice(SHOPS), market=self.random.choice(MARKETS),
+            bags=self.random.randint(2, 20), hours=self.random.randint(4, 30), days=self.random.randint(2, 15),
+            litres=self.random.randrange(20, 200, 10), **values)
+
+    def create_crops(self, farms, fields, years, crops_per_season):
+        owners = {farm.pk: farm.owner_id for farm in farms}
+        crop_types = {}
+        for season, types in CROP_TYPES.items():
+            for name, months, days, rates in types:
+                crop_type = CropType.objects.filter(name=name).first() or CropType.objects.create(name=name)
+                crop_types[name] = crop_type
+
+        crops = []
+        for field in fields:
+            # The crops of a season share the field's acres, and the next season is only sown once they
+            # are all harvested. Seasons the field is not free for by the end of their sowing months are
+            # left fallow, as is the rest of the field's years after a crop not harvested yet.
+            free = datetime.date.min
+            for year in range(self.today.year - years + 1, self.today.year + 1):
+                for season in SEASONS:
+                    harvests = []
+                    for number in range(crops_per_season):
+                        name, (first_month, last_month), days, rates = self.random.choice(CROP_TYPES[season])
+                        month, day = self.random.randint(first_month, last_month), self.random.randint(1, 28)
+                        ready = free + datetime.timedelta(days=self.random.randint(3, 20))
+                        date_sowing = max(datetime.date(year, month, day), ready)
+                        if date_sowing > min(datetime.date(year, last_month, 28), self.today):
+                            continue
+                        date_harvesting = date_sowing + datetime.timedelta(days=days + self.random.randint(-10, 10))
+                        harvests.append(date_harvesting)
+                        crops.append(Crop(
+                            field=field, owner_id=owners[field.farm_id], crop_type=crop_types[name], season=season,
+                            breed=f'{name} {self.random.choice(["local", "hybrid", "certified"])}',
+                            total_acres=field.total_acres / crops_per_season, date_sowing=date_sowing,
+                            date_harvesting=date_harvesting if date_harvesting <= self.today else None,
+                        ))
+                    free = max([free] + harvests)
+        crops = self.insert(Crop, crops)
+        # bulk_create() sends no post_save, so the summaries are created here.
+        CropSummary.objects.bulk_create([CropSummary(crop_id=crop.pk) for crop in crops])
+        self.rates = {name: rates for types in CROP_TYPES.values() for name, months, days, rates in types}
+        self.crop_type_names = {crop_type.pk: crop_type.name for crop_type in crop_types.values()}
+        return crops
+
+    def create_expenses(self, crops, per_crop):
+        types, weights, amounts = zip(*EXPENSE_TYPES)
+        farms = dict(Field.objects.values_list('pk', 'farm_id'))
+        batch, total = [], 0
+        for crop in crops:
+            owner_id = crop.owner_id
+            crop_name, acres = self.crop_type_names[crop.crop_type_id], f'{round(crop.total_acres, 1):g}'
+            end = crop.date_harvesting or self.today
+            days = max((end - crop.date_sowing).days, 1)
+            for number in range(self.random.randint(per_crop // 2, per_crop * 3 // 2)):
+                expense_type = self.random.choices(types, weights)[0]
+                # Spending peaks in the first weeks after sowing and tails off towards the harvest.
+                offset = int(self.random.triangular(-10, days, 0))
+                amount = amounts[types.index(expense_type)] * crop.total_acres / 4
+                batch.append(Expense(
+                    crop_id=crop.pk, expense_type=expense_type,
+                    expense_date=min(crop.date_sowing + datetime.timedelta(days=offset), self.today),
+                    amount=round(self.random.lognormvariate(0, 0.5) * amount, -1),
+                    notes=self.note(EXPENSE_NOTES[expense_type], crop=crop_name, acres=acres),
+                    spent_by_id=owner_id, added_by_id=owner_id, owner_id=owner_id, farm_id=farms[crop.field_id],
+                ))
+            if len(batch) >= self.batch_size:
+                total += self.flush(Expense, batch, self.expenses_saved)
+                batch = []
+        return total + self.flush(Expense, batch, self.expenses_saved)
+
+    def expenses_saved(self, objects):
+        CropSummary.objects.add(expenses=objects)
+        apply_to_rollups(objects)
+
+    def create_outputs(self, crops, per_crop):
+        farms = dict(Field.objects.values_list('pk', 'farm_id'))
+        batch, total = [], 0
+        for crop in crops:
+            if not crop.date_harvesting:
+                continue
+            low, high = self.rates[self.crop_type_names[crop.crop_type_id]]
+            sales = max(self.random.randint(per_crop // 2, per_crop * 3 // 2), 1)
+            for number in range(sales):
+                # Most of the harvest is sold within a few weeks.
+                delay = datetime.timedelta(days=int(self.random.expovariate(1 / 20)))
+                batch.append(Output(
+                    crop_id=crop.pk, owner_id=crop.owner_id, farm_id=farms[crop.field_id], field_id=crop.field_id,
+                    total_mann=round(crop.total_acres * self.random.uniform(20, 45) / sales, 1),
+                    rate_per_mann=self.random.randrange(low, high, 50),
+                    sold_date=min(crop.date_harvesting + delay, self.today), notes=self.note(OUTPUT_NOTES),
+                ))
+            if len(batch) >= self.batch_size:
+                total += self.flush(Output, batch, self.outputs_saved)
+                batch = []
+        return total + self.flush(Output, batch, self.outputs_saved)
+
+    def outputs_saved(self, objects):
+        CropSummary.objects.add(outputs=objects)
+        OutputDateBucket.objects.refresh((obj.crop_id, obj.sold_date) for obj in objects)
+
+    def create_entries(self, ledgers, per_ledger, years):
+        start = timezone.now() - datetime.timedelta(days=365 * years)
+        seconds = int((timezone.now() - start).total_seconds())
+        crop_names = sorted(set(self.crop_type_names.values()))
+        batch, total = [], 0
+        for ledger in ledgers:
+            for number in range(self.random.randint(per_ledger // 2, per_ledger * 3 // 2)):
+                entry_type = self.random.choice([LedgerEntries.DEBIT, LedgerEntries.CREDIT])
+                batch.append(LedgerEntries(
+                    ledger_id=ledger.pk, type=entry_type, amount=max(round(self.random.lognormvariate(9, 1), -1), 10),
+                    transaction_date=start + datetime.timedelta(seconds=self.random.randrange(seconds)),
+                    notes=self.note(ENTRY_NOTES[entry_type], crop=self.random.choice(crop_names)),
+                ))
+            # Flushing whole ledgers keeps the balance refresh of every batch to few ledgers.
+            if len(batch) >= self.batch_size:
+                total += self.flush(LedgerEntries, batch)
+                batch = []
+        return total + self.flush(LedgerEntries, batch)
+
+    def flush(self, model, objects, saved=None):
+        if not objects:
+            return 0
+        with transaction.atomic():
+            model.objects.bulk_create(objects)
+            if saved:
+                saved(objects)
+        return len(objects)
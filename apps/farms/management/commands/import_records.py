@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.farms.imports import IMPORTERS
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Import expenses or outputs from a CSV file in batched transactions. Crops are given by id, or by '
+            'field and crop_type names, users by username, expense types by their code or label as the admin '
+            'import page lists them. Rejected rows are reported with their line number.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(IMPORTERS), help='Kind of rows in the file.')
+        parser.add_argument('file', help='Path of a CSV file with a header row.')
+        parser.add_argument(
+            '--user', required=True,
+            help='Username importing the rows. Owners can only import rows for their own crops.')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the rows, do not insert them.')
+        parser.add_argument('--batch-size', type=int, help='Rows inserted per transaction.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user {options['user']}.")
+
+        importer = IMPORTERS[options['model']](user, dry_run=options['dry_run'], batch_size=options['batch_size'])
+        try:
+            with open(options['file'], encoding='utf-8-sig', newline='') as lines:
+                importer.run(lines)
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(e)
+
+        for line, column, message in importer.errors:
+            self.stderr.write(f'line {line}: {column}: {message}')
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(f"{verb} {importer.imported} {options['model']} rows.")
+        if importer.errors:
+            rejected = len({line for line, column, message in importer.errors})
+            raise CommandError(f'{rejected} rows were rejected.')
+        self.stdout.write(self.style.SUCCESS('Every row was valid.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.farms.models import CropSummary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-crop financial summaries from expenses and outputs, or check them for drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true', help='Only report crops whose summary is out of date, do not rebuild.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = CropSummary.objects.drift()
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} crop summaries are out of date: {', '.join(map(str, drifted[:50]))}")
+            self.stdout.write(self.style.SUCCESS('All crop summaries are consistent.'))
+            return
+
+        CropSummary.objects.refresh()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {CropSummary.objects.count()} crop summaries.'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.farms.models import OutputDateBucket
+from apps.ledgers.models import LedgerEntryDateBucket
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the date buckets of the outputs and ledger entries changelists from their records, or check '
+            'them for drift.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true', help='Only report parents whose buckets are out of date, do not rebuild.')
+
+    def handle(self, *args, **options):
+        models = (OutputDateBucket, LedgerEntryDateBucket)
+        if options['check']:
+            stale = [(model, model.objects.drift()) for model in models]
+            stale = [(model, ids) for model, ids in stale if ids]
+            if stale:
+                raise CommandError('Out of date date buckets: ' + '; '.join(
+                    f"{len(ids)} {model.parent}s ({', '.join(map(str, ids[:50]))})" for model, ids in stale))
+            self.stdout.write(self.style.SUCCESS('All date buckets are consistent.'))
+            return
+
+        for model in models:
+            model.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {OutputDateBucket.objects.count()} output and {LedgerEntryDateBucket.objects.count()} '
+            f'ledger entry date buckets.'))
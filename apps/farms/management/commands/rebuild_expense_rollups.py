@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.farms.models import ExpenseDaily, ExpenseMonthly
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily and monthly expense rollups from the expenses, or check them for drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true', help='Only report crops whose rollups are out of date, do not rebuild.')
+
+    def handle(self, *args, **options):
+        models = (ExpenseDaily, ExpenseMonthly)
+        if options['check']:
+            crop_ids, farm_ids = set(), set()
+            for model in models:
+                crops, farms = model.objects.drift()
+                crop_ids.update(crops)
+                farm_ids.update(farms)
+            if crop_ids or farm_ids:
+                raise CommandError(
+                    f"{len(crop_ids)} crops and {len(farm_ids)} farms have out of date expense rollups: "
+                    f"crops {', '.join(map(str, sorted(crop_ids)[:50]))}, "
+                    f"farms {', '.join(map(str, sorted(farm_ids)[:50]))}")
+            self.stdout.write(self.style.SUCCESS('All expense rollups are consistent.'))
+            return
+
+        for model in models:
+            model.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {ExpenseDaily.objects.count()} daily and {ExpenseMonthly.objects.count()} monthly rollups.'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from farm_management_system.search import all_full_text_indexes
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the full-text search indexes of the notes and descriptions from their columns, with their '
+            'triggers, or check them for missing triggers and drift.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true', help='Only report missing triggers and out of date rows, do not rebuild.')
+
+    def handle(self, *args, **options):
+        indexes = all_full_text_indexes()
+        if options['check']:
+            missing = [(index, index.missing()) for index in indexes]
+            missing = [(index, names) for index, names in missing if names]
+            if missing:
+                raise CommandError('Search indexes not kept in sync, rebuild them: ' + '; '.join(
+                    f"{index.table}.{index.column} is missing {', '.join(names)}" for index, names in missing))
+            stale = [(index, index.drift()) for index in indexes]
+            stale = [(index, ids) for index, ids in stale if ids]
+            if stale:
+                raise CommandError('Out of date search indexes: ' + '; '.join(
+                    f"{len(ids)} rows of {index.table}.{index.column} ({', '.join(map(str, ids[:50]))})"
+                    for index, ids in stale))
+            self.stdout.write(self.style.SUCCESS('All search indexes are consistent.'))
+            return
+
+        # Creating the FTS5 tables and triggers is idempotent and indexes every row again.
+        with connection.schema_editor() as schema_editor:
+            for index in indexes:
+                index.create(schema_editor)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(indexes)} search indexes.'))
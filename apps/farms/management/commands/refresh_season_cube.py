@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.farms.models import SeasonCube
+
+
+class Command(BaseCommand):
+    help = ('Recompute the season analytics cube for the fields whose crops, expenses or outputs changed since '
+            'the last refresh. Meant to run from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every field.')
+
+    def handle(self, *args, **options):
+        fields = SeasonCube.objects.refresh(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed the analytics of {fields} fields.'))
@@ -0,0 +1,53 @@
+# Generated by Django 2.0.13 on 2026-10-18 09:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, Max, Sum
+
+
+def backfill_crop_summaries(apps, schema_editor):
+    Crop = apps.get_model('farms', 'Crop')
+    CropSummary = apps.get_model('farms', 'CropSummary')
+    Expense = apps.get_model('farms', 'Expense')
+    Output = apps.get_model('farms', 'Output')
+
+    summaries = {crop_id: CropSummary(crop_id=crop_id) for crop_id in Crop.objects.values_list('pk', flat=True)}
+    for row in Expense.objects.values('crop_id').annotate(
+            total=Sum('amount'), count=Count('pk'), last_date=Max('expense_date')).order_by():
+        summary = summaries[row['crop_id']]
+        summary.total_expense, summary.expense_count, summary.last_activity_date = \
+            row['total'], row['count'], row['last_date']
+    for row in Output.objects.values('crop_id').annotate(
+            total=Sum(F('total_mann') * F('rate_per_mann'), output_field=models.FloatField()),
+            count=Count('pk'), last_date=Max('sold_date')).order_by():
+        summary = summaries[row['crop_id']]
+        summary.total_output, summary.output_count = row['total'], row['count']
+        if summary.last_activity_date is None or summary.last_activity_date < row['last_date']:
+            summary.last_activity_date = row['last_date']
+    CropSummary.objects.bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0011_auto_20200727_2204'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CropSummary',
+            fields=[
+                ('crop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='farms.Crop', verbose_name='Crop')),
+                ('total_expense', models.FloatField(default=0, verbose_name='Total expense')),
+                ('total_output', models.FloatField(default=0, verbose_name='Total output')),
+                ('expense_count', models.PositiveIntegerField(default=0, verbose_name='Expense count')),
+                ('output_count', models.PositiveIntegerField(default=0, verbose_name='Output count')),
+                ('last_activity_date', models.DateField(blank=True, null=True, verbose_name='Last activity date')),
+            ],
+            options={
+                'verbose_name': 'Crop summary',
+                'verbose_name_plural': 'Crop summaries',
+            },
+        ),
+        migrations.RunPython(backfill_crop_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0012_cropsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['field', 'date_sowing'], name='crop_field_sowing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['date_sowing'], name='crop_sowing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['season', 'date_sowing'], name='crop_season_sowing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['crop', 'expense_date'], name='expense_crop_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['crop', 'expense_type'], name='expense_crop_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['expense_type', 'expense_date'], name='expense_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['spent_by', 'expense_date'], name='expense_spent_by_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['expense_date'], name='expense_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['crop', 'sold_date'], name='output_crop_sold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['sold_date'], name='output_sold_idx'),
+        ),
+    ]
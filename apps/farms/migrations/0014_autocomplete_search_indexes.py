@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# The autocomplete pickers search by case insensitive prefix, which SQLite only answers
+# from an index when the index uses the NOCASE collation.
+SEARCH_INDEXES = (
+    ('farm_name_nocase_idx', 'farms_farm', 'name'),
+    ('field_name_nocase_idx', 'farms_field', 'name'),
+    ('croptype_name_nocase_idx', 'farms_croptype', 'name'),
+    ('croptype_name_en_nocase_idx', 'farms_croptype', 'name_en'),
+    ('croptype_name_ur_nocase_idx', 'farms_croptype', 'name_ur'),
+    ('crop_breed_nocase_idx', 'farms_crop', 'breed'),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, table, column in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ("{column}" COLLATE NOCASE)')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, table, column in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0013_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 10000
+
+
+def backfill_in_batches(model, **values):
+    """Update model with values in primary key ranges, each committed on its own."""
+    last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(**values)
+
+
+def backfill_owners(apps, schema_editor):
+    Field = apps.get_model('farms', 'Field')
+    Crop = apps.get_model('farms', 'Crop')
+
+    backfill_in_batches(Crop, owner_id=Subquery(
+        Field.objects.filter(pk=OuterRef('field_id')).values('farm__owner_id')[:1]))
+    for model_name in ('Expense', 'Output'):
+        crop = Crop.objects.filter(pk=OuterRef('crop_id'))
+        backfill_in_batches(
+            apps.get_model('farms', model_name),
+            owner_id=Subquery(crop.values('owner_id')[:1]), farm_id=Subquery(crop.values('field__farm_id')[:1]))
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own, large tables are not rewritten in one transaction.
+    atomic = False
+
+    dependencies = [
+        ('farms', '0015_owner_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_owners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0016_backfill_owners'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='crop',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='farm',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='farms.Farm', verbose_name='Farm'),
+        ),
+        migrations.AlterField(
+            model_name='output',
+            name='farm',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='farms.Farm', verbose_name='Farm'),
+        ),
+        migrations.AlterField(
+            model_name='output',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['owner', 'date_sowing'], name='crop_owner_sowing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['crop_type', 'date_sowing'], name='crop_type_sowing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['owner', 'expense_date'], name='expense_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['farm', 'expense_date'], name='expense_farm_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['owner', 'sold_date'], name='output_owner_sold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['farm', 'sold_date'], name='output_farm_sold_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:39
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def compute_metrics(apps, schema_editor):
+    Crop = apps.get_model('farms', 'Crop')
+    CropSummary = apps.get_model('farms', 'CropSummary')
+    acres = Subquery(
+        Crop.objects.filter(pk=OuterRef('crop_id'), total_acres__gt=0).values('total_acres')[:1],
+        output_field=models.FloatField())
+    CropSummary.objects.update(
+        net_profit=F('total_output') - F('total_expense'),
+        expense_per_acre=F('total_expense') / acres,
+        output_per_acre=F('total_output') / acres,
+        net_profit_per_acre=(F('total_output') - F('total_expense')) / acres,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0017_owner_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cropsummary',
+            name='expense_per_acre',
+            field=models.FloatField(blank=True, default=0, null=True, verbose_name='Expenses per acre'),
+        ),
+        migrations.AddField(
+            model_name='cropsummary',
+            name='net_profit',
+            field=models.FloatField(default=0, verbose_name='Net Profit'),
+        ),
+        migrations.AddField(
+            model_name='cropsummary',
+            name='net_profit_per_acre',
+            field=models.FloatField(blank=True, default=0, null=True, verbose_name='Profit per acre'),
+        ),
+        migrations.AddField(
+            model_name='cropsummary',
+            name='output_per_acre',
+            field=models.FloatField(blank=True, default=0, null=True, verbose_name='Output per acre'),
+        ),
+        migrations.RunPython(compute_metrics, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cropsummary',
+            index=models.Index(fields=['net_profit'], name='summary_profit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropsummary',
+            index=models.Index(fields=['expense_per_acre'], name='summary_expense_acre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropsummary',
+            index=models.Index(fields=['output_per_acre'], name='summary_output_acre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropsummary',
+            index=models.Index(fields=['net_profit_per_acre'], name='summary_profit_acre_idx'),
+        ),
+    ]
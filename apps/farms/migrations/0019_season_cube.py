@@ -0,0 +1,90 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('farms', '0018_summary_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CubeRefresh',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField(db_index=True, verbose_name='Started')),
+                ('finished', models.DateTimeField(verbose_name='Finished')),
+                ('fields', models.PositiveIntegerField(verbose_name='Fields recomputed')),
+                ('full', models.BooleanField(default=False, verbose_name='Full rebuild')),
+            ],
+            options={
+                'verbose_name': 'Cube refresh',
+                'verbose_name_plural': 'Cube refreshes',
+            },
+        ),
+        migrations.CreateModel(
+            name='SeasonCube',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.CharField(choices=[('1', 'Summer'), ('2', 'Winter'), ('3', 'Mid season')], max_length=550, verbose_name='Season')),
+                ('year', models.PositiveIntegerField(verbose_name='Year')),
+                ('expense_type', models.CharField(blank=True, choices=[('1', 'Seed'), ('2', 'Fertilizer'), ('3', 'Pesticides'), ('4', 'Water'), ('5', 'Electricity_bill'), ('6', 'Oil'), ('7', 'Labour'), ('9', 'Lease'), ('8', 'Miscellaneous')], max_length=255, verbose_name='Expense type')),
+                ('crops', models.PositiveIntegerField(default=0, verbose_name='Crops')),
+                ('acres', models.FloatField(default=0, verbose_name='Total acres')),
+                ('expense', models.FloatField(default=0, verbose_name='Total expense')),
+                ('expenses', models.PositiveIntegerField(default=0, verbose_name='Expense count')),
+                ('revenue', models.FloatField(default=0, verbose_name='Total output')),
+                ('output_mann', models.FloatField(default=0, verbose_name='Total mann')),
+                ('outputs', models.PositiveIntegerField(default=0, verbose_name='Output count')),
+            ],
+            options={
+                'verbose_name': 'Season analytics',
+                'verbose_name_plural': 'Season analytics',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='crop',
+            index=models.Index(fields=['date_modified'], name='crop_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['date_modified'], name='expense_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['date_modified'], name='output_modified_idx'),
+        ),
+        migrations.AddField(
+            model_name='seasoncube',
+            name='crop_type',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.CropType', verbose_name='Crop type'),
+        ),
+        migrations.AddField(
+            model_name='seasoncube',
+            name='farm',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Farm', verbose_name='Farm'),
+        ),
+        migrations.AddField(
+            model_name='seasoncube',
+            name='field',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Field', verbose_name='Field'),
+        ),
+        migrations.AddField(
+            model_name='seasoncube',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.AddIndex(
+            model_name='seasoncube',
+            index=models.Index(fields=['owner', 'expense_type', 'year'], name='cube_owner_type_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seasoncube',
+            index=models.Index(fields=['expense_type', 'year'], name='cube_type_year_idx'),
+        ),
+    ]
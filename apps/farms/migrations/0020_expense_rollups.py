@@ -0,0 +1,122 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    Expense = apps.get_model('farms', 'Expense')
+    ExpenseDaily = apps.get_model('farms', 'ExpenseDaily')
+    ExpenseMonthly = apps.get_model('farms', 'ExpenseMonthly')
+
+    rows = {ExpenseDaily: {}, ExpenseMonthly: {}}
+
+    def add(model, key, values, total, count):
+        row = rows[model].setdefault(key, model(amount=0, expenses=0, **values))
+        row.amount += total
+        row.expenses += count
+
+    fields = ('owner_id', 'farm_id', 'crop__field_id', 'crop_id', 'expense_type', 'spent_by_id', 'expense_date')
+    for row in Expense.objects.values(*fields).annotate(total=Sum('amount'), count=Count('pk')).order_by().iterator():
+        values = dict(
+            owner_id=row['owner_id'], farm_id=row['farm_id'], field_id=row['crop__field_id'], crop_id=row['crop_id'],
+            expense_type=row['expense_type'], spent_by_id=row['spent_by_id'])
+        farm = dict(owner_id=row['owner_id'], farm_id=row['farm_id'], expense_type='')
+        for model, date in ((ExpenseDaily, row['expense_date']), (ExpenseMonthly, row['expense_date'].replace(day=1))):
+            key = (row['crop_id'], row['expense_type'], row['spent_by_id'], date)
+            add(model, key, dict(values, date=date), row['total'], row['count'])
+            add(model, (row['farm_id'], date), dict(farm, date=date), row['total'], row['count'])
+    for model, model_rows in rows.items():
+        model.objects.bulk_create(model_rows.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('farms', '0019_season_cube'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseDaily',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expense_type', models.CharField(blank=True, choices=[('1', 'Seed'), ('2', 'Fertilizer'), ('3', 'Pesticides'), ('4', 'Water'), ('5', 'Electricity_bill'), ('6', 'Oil'), ('7', 'Labour'), ('9', 'Lease'), ('8', 'Miscellaneous')], max_length=255, verbose_name='Expense type')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('amount', models.FloatField(default=0, verbose_name='Amount')),
+                ('expenses', models.PositiveIntegerField(default=0, verbose_name='Expense count')),
+                ('crop', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Crop', verbose_name='Crop')),
+                ('farm', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Farm', verbose_name='Farm')),
+                ('field', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Field', verbose_name='Field')),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+                ('spent_by', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Expend by')),
+            ],
+            options={
+                'verbose_name': 'Daily expense total',
+                'verbose_name_plural': 'Daily expense totals',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExpenseMonthly',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('expense_type', models.CharField(blank=True, choices=[('1', 'Seed'), ('2', 'Fertilizer'), ('3', 'Pesticides'), ('4', 'Water'), ('5', 'Electricity_bill'), ('6', 'Oil'), ('7', 'Labour'), ('9', 'Lease'), ('8', 'Miscellaneous')], max_length=255, verbose_name='Expense type')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('amount', models.FloatField(default=0, verbose_name='Amount')),
+                ('expenses', models.PositiveIntegerField(default=0, verbose_name='Expense count')),
+                ('crop', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Crop', verbose_name='Crop')),
+                ('farm', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Farm', verbose_name='Farm')),
+                ('field', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Field', verbose_name='Field')),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+                ('spent_by', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Expend by')),
+            ],
+            options={
+                'verbose_name': 'Monthly expense total',
+                'verbose_name_plural': 'Monthly expense totals',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='expensemonthly',
+            index=models.Index(fields=['owner', 'expense_type', 'date'], name='monthly_owner_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensemonthly',
+            index=models.Index(fields=['farm', 'expense_type', 'date'], name='monthly_farm_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensemonthly',
+            index=models.Index(fields=['field', 'date'], name='monthly_field_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensemonthly',
+            index=models.Index(fields=['expense_type', 'date'], name='monthly_type_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='expensemonthly',
+            unique_together={('crop', 'expense_type', 'spent_by', 'date')},
+        ),
+        migrations.AddIndex(
+            model_name='expensedaily',
+            index=models.Index(fields=['owner', 'expense_type', 'date'], name='daily_owner_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensedaily',
+            index=models.Index(fields=['farm', 'expense_type', 'date'], name='daily_farm_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensedaily',
+            index=models.Index(fields=['field', 'date'], name='daily_field_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensedaily',
+            index=models.Index(fields=['expense_type', 'date'], name='daily_type_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='expensedaily',
+            unique_together={('crop', 'expense_type', 'spent_by', 'date')},
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
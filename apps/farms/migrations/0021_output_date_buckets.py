@@ -0,0 +1,60 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_buckets(apps, schema_editor):
+    Output = apps.get_model('farms', 'Output')
+    OutputDateBucket = apps.get_model('farms', 'OutputDateBucket')
+    OutputDateBucket.objects.bulk_create(
+        OutputDateBucket(crop_id=row['crop_id'], owner_id=row['owner_id'], farm_id=row['farm_id'],
+                         date=row['sold_date'], records=row['count'])
+        for row in Output.objects.values('crop_id', 'owner_id', 'farm_id', 'sold_date').annotate(
+            count=Count('pk')).order_by().iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('farms', '0020_expense_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutputDateBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('records', models.PositiveIntegerField(default=0, verbose_name='Records')),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Crop', verbose_name='Crop')),
+                ('farm', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Farm', verbose_name='Farm')),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+            ],
+            options={
+                'verbose_name': 'Output date',
+                'verbose_name_plural': 'Output dates',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outputdatebucket',
+            index=models.Index(fields=['owner', 'date'], name='output_bucket_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outputdatebucket',
+            index=models.Index(fields=['farm', 'date'], name='output_bucket_farm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outputdatebucket',
+            index=models.Index(fields=['date'], name='output_bucket_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='outputdatebucket',
+            unique_together={('crop', 'date')},
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
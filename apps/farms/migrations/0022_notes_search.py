@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from farm_management_system.search import FullTextIndex
+
+# FTS5 tables and the triggers keeping them in sync, only created on SQLite.
+INDEXES = (
+    FullTextIndex('farms_expense', 'notes'),
+    FullTextIndex('farms_output', 'notes'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    for index in INDEXES:
+        index.create(schema_editor)
+
+
+def drop_indexes(apps, schema_editor):
+    for index in INDEXES:
+        index.drop(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0021_output_date_buckets'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+from farm_management_system.search import keeping_full_text_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0022_notes_search'),
+    ]
+
+    operations = keeping_full_text_indexes(
+        migrations.AddField(
+            model_name='expense',
+            name='lease_period',
+            field=models.DateField(editable=False, null=True, verbose_name='Lease period'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='expense',
+            unique_together={('crop', 'lease_period')},
+        ),
+    )
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+from farm_management_system.search import keeping_full_text_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0023_lease_accruals'),
+    ]
+
+    operations = keeping_full_text_indexes(
+        migrations.AddField(
+            model_name='output',
+            name='field',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='farms.Field', verbose_name='Field'),
+        ),
+        migrations.AddField(
+            model_name='outputdatebucket',
+            name='field',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Field', verbose_name='Field'),
+        ),
+    )
@@ -0,0 +1,33 @@
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 10000
+
+
+def backfill_in_batches(model, **values):
+    """Update model with values in primary key ranges, each committed on its own."""
+    last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(**values)
+
+
+def backfill_fields(apps, schema_editor):
+    Crop = apps.get_model('farms', 'Crop')
+    for model_name in ('Output', 'OutputDateBucket'):
+        backfill_in_batches(
+            apps.get_model('farms', model_name),
+            field_id=Subquery(Crop.objects.filter(pk=OuterRef('crop_id')).values('field_id')[:1]))
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own, large tables are not rewritten in one transaction.
+    atomic = False
+
+    dependencies = [
+        ('farms', '0024_output_field_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fields, migrations.RunPython.noop),
+    ]
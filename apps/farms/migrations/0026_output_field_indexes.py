@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+from farm_management_system.search import keeping_full_text_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0025_backfill_output_fields'),
+    ]
+
+    operations = keeping_full_text_indexes(
+        migrations.AlterField(
+            model_name='output',
+            name='field',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='farms.Field', verbose_name='Field'),
+        ),
+        migrations.AlterField(
+            model_name='outputdatebucket',
+            name='field',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='farms.Field', verbose_name='Field'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['field', 'sold_date'], name='output_field_sold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outputdatebucket',
+            index=models.Index(fields=['field', 'date'], name='output_bucket_field_idx'),
+        ),
+    )
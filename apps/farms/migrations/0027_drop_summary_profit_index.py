@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0026_output_field_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cropsummary',
+            name='summary_profit_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+from farm_management_system.search import keeping_full_text_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0027_drop_summary_profit_index'),
+    ]
+
+    operations = keeping_full_text_indexes(
+        migrations.AlterField(
+            model_name='expense',
+            name='notes',
+            field=models.TextField(blank=True, null=True, verbose_name='Notes'),
+        ),
+    )
@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import Count, Min, Sum
+
+# The farm totals rows of the expense rollups have no crop or spender, and the NULLs let
+# unique_together repeat them, so these partial indexes keep one per farm and period.
+FARM_TOTAL_INDEXES = (
+    ('daily_farm_total_uniq', 'ExpenseDaily', 'farms_expensedaily'),
+    ('monthly_farm_total_uniq', 'ExpenseMonthly', 'farms_expensemonthly'),
+)
+
+
+def create_farm_total_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    for name, model_name, table in FARM_TOTAL_INDEXES:
+        model = apps.get_model('farms', model_name)
+        totals = model.objects.filter(expense_type='')
+        repeated = (totals.values('farm_id', 'date').annotate(rows=Count('pk')).filter(rows__gt=1)
+                    .annotate(kept=Min('pk'), total=Sum('amount'), expenses=Sum('expenses')))
+        for group in repeated:
+            # Fold the repeats into the first row.
+            model.objects.filter(pk=group['kept']).update(amount=group['total'], expenses=group['expenses'])
+            totals.filter(farm_id=group['farm_id'], date=group['date']).exclude(pk=group['kept']).delete()
+        schema_editor.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS "{name}" ON "{table}" ("farm_id", "date") '
+            'WHERE "expense_type" = \'\'')
+
+
+def drop_farm_total_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    for name, model_name, table in FARM_TOTAL_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0028_expense_notes_optional'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_farm_total_indexes, drop_farm_total_indexes),
+    ]
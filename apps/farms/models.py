@@ -1,5 +1,10 @@
+import datetime
+
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, ExtractYear, Greatest, TruncDate, TruncMonth
+from django.utils.timezone import localtime, make_aware, now
 from django.utils.translation import ugettext_lazy as _
 
 from apps.users.models import User
@@ -25,6 +30,8 @@ class Farm(TimeStampedModel):
         verbose_name = _('Farm')
         verbose_name_plural = _('Farms')
 
+    str_select_related = ('owner', )
+
     def __str__(self):
         return f"{self.name}({self.owner})"
 
@@ -117,14 +124,28 @@ class Crop(TimeStampedModel):
     date_sowing = models.DateField(verbose_name=_('Date sowing'))
     date_harvesting = models.DateField(blank=True, verbose_name=_('Date harvesting'), null=True)
 
+    # Copy of field.farm.owner, so owner scoped lists need no joins. Kept in sync by apps.farms.signals.
+    owner = models.ForeignKey(
+        User, on_delete=models.PROTECT, editable=False, db_index=False, related_name='+', verbose_name=_('Owner'))
+
     class Meta:
         permissions = (
             ('can_view_crop', 'Can View Crop'),
         )
+        indexes = [
+            models.Index(fields=['owner', 'date_sowing'], name='crop_owner_sowing_idx'),
+            models.Index(fields=['field', 'date_sowing'], name='crop_field_sowing_idx'),
+            models.Index(fields=['date_sowing'], name='crop_sowing_idx'),
+            models.Index(fields=['season', 'date_sowing'], name='crop_season_sowing_idx'),
+            models.Index(fields=['crop_type', 'date_sowing'], name='crop_type_sowing_idx'),
+            models.Index(fields=['date_modified'], name='crop_modified_idx'),
+        ]
 
         verbose_name = _('Crop')
         verbose_name_plural = _('Crops')
 
+    str_select_related = ('crop_type', 'field')
+
     def __str__(self):
         return f"{self.crop_type}({self.field})"
 
@@ -159,24 +180,55 @@ class Expense(TimeStampedModel):
     )
     expense_date = models.DateField(null=False, verbose_name=_('Expense date'))
     amount = models.FloatField(null=False, blank=False, verbose_name=_('Amount'))
-    notes = models.TextField(null=True, verbose_name=_('Notes'))
+    notes = models.TextField(null=True, blank=True, verbose_name=_('Notes'))
 
     spent_by = models.ForeignKey(
         User, on_delete=models.PROTECT, related_name='expenditures', verbose_name=_('Expend by'))
     added_by = models.ForeignKey(
         User, on_delete=models.PROTECT, related_name='added_expenditures', verbose_name=_('Added by'))
 
+    # Copies of crop.owner and crop.field.farm, see Crop.owner.
+    owner = models.ForeignKey(
+        User, on_delete=models.PROTECT, editable=False, db_index=False, related_name='+', verbose_name=_('Owner'))
+    farm = models.ForeignKey(
+        Farm, on_delete=models.PROTECT, editable=False, db_index=False, related_name='+', verbose_name=_('Farm'))
+
+    # First day of the month of lease booked by apps.farms.leases, unique per crop so reruns skip it.
+    lease_period = models.DateField(null=True, editable=False, verbose_name=_('Lease period'))
+
     class Meta:
         ordering = ('-expense_date', )
+        unique_together = ('crop', 'lease_period')
         permissions = (
             ('can_view_expense', 'Can View Expense'),
         )
+        indexes = [
+            models.Index(fields=['owner', 'expense_date'], name='expense_owner_date_idx'),
+            models.Index(fields=['farm', 'expense_date'], name='expense_farm_date_idx'),
+            models.Index(fields=['crop', 'expense_date'], name='expense_crop_date_idx'),
+            models.Index(fields=['crop', 'expense_type'], name='expense_crop_type_idx'),
+            models.Index(fields=['expense_type', 'expense_date'], name='expense_type_date_idx'),
+            models.Index(fields=['spent_by', 'expense_date'], name='expense_spent_by_date_idx'),
+            models.Index(fields=['expense_date'], name='expense_date_idx'),
+            models.Index(fields=['date_modified'], name='expense_modified_idx'),
+        ]
         verbose_name = _('Expense')
         verbose_name_plural = _('Expenses')
 
+    str_select_related = ('crop', 'spent_by')
+
+    # Searched through SQLite FTS5 tables, see farm_management_system.search.
+    full_text_fields = ('notes', )
+
     def __str__(self):
         return f"Rs. {self.amount}->{self.crop}({self.expense_type}) by {self.spent_by}"
 
+    def save(self, *args, **kwargs):
+        # The post_save receivers of apps.farms.signals update the summaries and rollups of the
+        # row, they commit or roll back with it. Deletes run their receivers in a transaction already.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Output(TimeStampedModel):
     crop = models.ForeignKey(Crop, on_delete=models.PROTECT, verbose_name=_('Crop'), related_name='crop_outputs')
@@ -187,13 +239,796 @@ class Output(TimeStampedModel):
     sold_date = models.DateField(verbose_name=_('Sold date'))
     notes = models.CharField(max_length=550, null=True, blank=True, verbose_name=_('Notes'))
 
+    # Copies of crop.owner, crop.field.farm and crop.field, see Crop.owner.
+    owner = models.ForeignKey(
+        User, on_delete=models.PROTECT, editable=False, db_index=False, related_name='+', verbose_name=_('Owner'))
+    farm = models.ForeignKey(
+        Farm, on_delete=models.PROTECT, editable=False, db_index=False, related_name='+', verbose_name=_('Farm'))
+    field = models.ForeignKey(
+        Field, on_delete=models.PROTECT, editable=False, db_index=False, related_name='+', verbose_name=_('Field'))
+
     class Meta:
         ordering = ('-sold_date', )
         permissions = (
             ('can_view_output', 'Can View Output'),
         )
+        indexes = [
+            models.Index(fields=['owner', 'sold_date'], name='output_owner_sold_idx'),
+            models.Index(fields=['farm', 'sold_date'], name='output_farm_sold_idx'),
+            models.Index(fields=['field', 'sold_date'], name='output_field_sold_idx'),
+            models.Index(fields=['crop', 'sold_date'], name='output_crop_sold_idx'),
+            models.Index(fields=['sold_date'], name='output_sold_idx'),
+            models.Index(fields=['date_modified'], name='output_modified_idx'),
+        ]
         verbose_name = _('Output')
         verbose_name_plural = _('Outputs')
 
+    str_select_related = ('crop', )
+
+    full_text_fields = ('notes', )
+
     def __str__(self):
         return f"Rs. {self.crop}->{self.total_mann}"
+
+    def save(self, *args, **kwargs):
+        # See Expense.save().
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class CropSummaryManager(models.Manager):
+
+    def refresh(self, crop_ids=None):
+        """Recompute the summaries of the given crops, or of every crop if no ids are given."""
+        expenses = Expense.objects.all()
+        outputs = Output.objects.all()
+        crops = Crop.objects.all()
+        if crop_ids is not None:
+            crop_ids = {crop_id for crop_id in crop_ids if crop_id is not None}
+            if not crop_ids:
+                return
+            expenses = expenses.filter(crop_id__in=crop_ids)
+            outputs = outputs.filter(crop_id__in=crop_ids)
+            crops = crops.filter(pk__in=crop_ids)
+
+        summaries = {crop_id: CropSummary(crop_id=crop_id) for crop_id in crops.values_list('pk', flat=True)}
+        for row in expenses.values('crop_id').annotate(
+                total=Sum('amount'), count=Count('pk'), last_date=Max('expense_date')).order_by():
+            summary = summaries[row['crop_id']]
+            summary.total_expense = row['total']
+            summary.expense_count = row['count']
+            summary.last_activity_date = row['last_date']
+        for row in outputs.values('crop_id').annotate(
+                total=Sum(F('total_mann') * F('rate_per_mann'), output_field=models.FloatField()),
+                count=Count('pk'), last_date=Max('sold_date')).order_by():
+            summary = summaries[row['crop_id']]
+            summary.total_output = row['total']
+            summary.output_count = row['count']
+            if summary.last_activity_date is None or summary.last_activity_date < row['last_date']:
+                summary.last_activity_date = row['last_date']
+
+        with transaction.atomic():
+            existing = self.all() if crop_ids is None else self.filter(crop_id__in=crop_ids)
+            existing.delete()
+            self.bulk_create(summaries.values(), batch_size=500)
+            self.update_metrics(crop_ids)
+
+    def add(self, expenses=(), outputs=(), sign=1):
+        """
+        Add newly inserted expenses and outputs to the summaries of their crops with one UPDATE per
+        crop, instead of aggregating all their rows again as refresh() does, or take removed ones
+        out with sign=-1. The last activity date of the crops rows are taken out of is then read
+        from their latest remaining expense and output through the (crop, date) indexes.
+        """
+        deltas = {}
+        for expense in expenses:
+            delta = deltas.setdefault(expense.crop_id, {'expense': 0, 'output': 0, 'expenses': 0, 'outputs': 0})
+            delta['expense'] += sign * expense.amount
+            delta['expenses'] += sign
+            delta['date'] = max(delta.get('date', expense.expense_date), expense.expense_date)
+        for output in outputs:
+            delta = deltas.setdefault(output.crop_id, {'expense': 0, 'output': 0, 'expenses': 0, 'outputs': 0})
+            delta['output'] += sign * output.total_mann * output.rate_per_mann
+            delta['outputs'] += sign
+            delta['date'] = max(delta.get('date', output.sold_date), output.sold_date)
+
+        missing = []
+        with transaction.atomic():
+            for crop_id, delta in deltas.items():
+                if sign > 0:
+                    date = Value(delta['date'], output_field=models.DateField())
+                    last_activity_date = Greatest(Coalesce('last_activity_date', date), date)
+                else:
+                    last_activity_date = self.latest_activity()
+                updated = self.filter(crop_id=crop_id).update(
+                    total_expense=F('total_expense') + delta['expense'],
+                    total_output=F('total_output') + delta['output'],
+                    expense_count=F('expense_count') + delta['expenses'],
+                    output_count=F('output_count') + delta['outputs'],
+                    last_activity_date=last_activity_date,
+                )
+                if not updated:
+                    missing.append(crop_id)
+            self.update_metrics(set(deltas) - set(missing))
+            self.refresh(missing)
+
+    @staticmethod
+    def latest_activity():
+        """The date of the latest expense or output of a summary's crop, for update()."""
+        expense = Subquery(Expense.objects.filter(crop=OuterRef('crop_id')).order_by('-expense_date').values(
+            'expense_date')[:1], output_field=models.DateField())
+        output = Subquery(Output.objects.filter(crop=OuterRef('crop_id')).order_by('-sold_date').values(
+            'sold_date')[:1], output_field=models.DateField())
+        # Greatest() is null when either is, each falls back to the other.
+        return Greatest(Coalesce(expense, output), Coalesce(output, expense))
+
+    def update_metrics(self, crop_ids=None):
+        """
+        Recompute the stored profit and per acre columns from the totals, of the given crops or of
+        every crop. They are left empty for crops without acres.
+        """
+        summaries = self.all()
+        if crop_ids is not None:
+            if not crop_ids:
+                return
+            summaries = summaries.filter(crop_id__in=crop_ids)
+        acres = Subquery(
+            Crop.objects.filter(pk=OuterRef('crop_id'), total_acres__gt=0).values('total_acres')[:1],
+            output_field=models.FloatField())
+        summaries.update(
+            net_profit=F('total_output') - F('total_expense'),
+            expense_per_acre=F('total_expense') / acres,
+            output_per_acre=F('total_output') / acres,
+            net_profit_per_acre=(F('total_output') - F('total_expense')) / acres,
+        )
+
+    def drift(self):
+        """Return the ids of crops whose stored summary differs from their expenses and outputs."""
+        expenses = Expense.objects.filter(crop=OuterRef('crop')).order_by().values('crop')
+        outputs = Output.objects.filter(crop=OuterRef('crop')).order_by().values('crop')
+        queryset = self.annotate(
+            actual_expense=Coalesce(Subquery(
+                expenses.annotate(total=Sum('amount')).values('total'), output_field=models.FloatField()), 0),
+            actual_expense_count=Coalesce(Subquery(
+                expenses.annotate(count=Count('pk')).values('count'), output_field=models.IntegerField()), 0),
+            actual_output=Coalesce(Subquery(
+                outputs.annotate(total=Sum(F('total_mann') * F('rate_per_mann'), output_field=models.FloatField()))
+                .values('total'), output_field=models.FloatField()), 0),
+            actual_output_count=Coalesce(Subquery(
+                outputs.annotate(count=Count('pk')).values('count'), output_field=models.IntegerField()), 0),
+        )
+        drifted = [
+            crop_id for crop_id, total_expense, actual_expense, expense_count, actual_expense_count,
+            total_output, actual_output, output_count, actual_output_count in queryset.values_list(
+                'crop_id', 'total_expense', 'actual_expense', 'expense_count', 'actual_expense_count',
+                'total_output', 'actual_output', 'output_count', 'actual_output_count')
+            if expense_count != actual_expense_count or output_count != actual_output_count
+            or abs(total_expense - actual_expense) > 0.01 or abs(total_output - actual_output) > 0.01
+        ]
+        missing = Crop.objects.filter(summary__isnull=True).values_list('pk', flat=True)
+        return sorted(drifted + list(missing))
+
+
+class CropSummary(models.Model):
+    """Running financial totals of a crop, kept in sync with its expenses and outputs."""
+    crop = models.OneToOneField(
+        Crop, on_delete=models.CASCADE, primary_key=True, related_name='summary', verbose_name=_('Crop'))
+    total_expense = models.FloatField(default=0, verbose_name=_('Total expense'))
+    total_output = models.FloatField(default=0, verbose_name=_('Total output'))
+    expense_count = models.PositiveIntegerField(default=0, verbose_name=_('Expense count'))
+    output_count = models.PositiveIntegerField(default=0, verbose_name=_('Output count'))
+    last_activity_date = models.DateField(null=True, blank=True, verbose_name=_('Last activity date'))
+
+    # Derived from the totals and the crop's acres by CropSummaryManager.update_metrics(), stored so
+    # the changelist can sort and filter on them. net_profit is not indexed: the profit filter
+    # matches most crops, and through an index SQLite would sort them all instead of walking the
+    # crops in sowing date order and stopping at the page.
+    net_profit = models.FloatField(default=0, verbose_name=_('Net Profit'))
+    expense_per_acre = models.FloatField(null=True, blank=True, default=0, verbose_name=_('Expenses per acre'))
+    output_per_acre = models.FloatField(null=True, blank=True, default=0, verbose_name=_('Output per acre'))
+    net_profit_per_acre = models.FloatField(null=True, blank=True, default=0, verbose_name=_('Profit per acre'))
+
+    objects = CropSummaryManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expense_per_acre'], name='summary_expense_acre_idx'),
+            models.Index(fields=['output_per_acre'], name='summary_output_acre_idx'),
+            models.Index(fields=['net_profit_per_acre'], name='summary_profit_acre_idx'),
+        ]
+        verbose_name = _('Crop summary')
+        verbose_name_plural = _('Crop summaries')
+
+    def __str__(self):
+        return f"{self.crop_id}: {self.total_output}-{self.total_expense}"
+
+
+class SeasonCubeManager(models.Manager):
+    # Changes saved while a refresh runs may carry an earlier date_modified than its start, so
+    # every refresh looks back this far before the previous one. Recomputing a field is idempotent.
+    overlap = datetime.timedelta(minutes=5)
+    chunk_size = 500
+
+    def refresh(self, full=False, owner=None):
+        """
+        Recompute the cells of every field changed since the last refresh, or of all fields, and
+        return the number of fields recomputed. A field is changed when it, its farm, one of its
+        crops or one of their expenses or outputs has a later date_modified, or when its crop,
+        expense or output counts no longer match its cells, which catches deleted and moved rows.
+
+        Given an owner only the fields of the owner's farms are recomputed. Such a refresh is not
+        recorded, as the next full one still has to look for the other owners' changes.
+        """
+        started = now()
+        fields = Field.objects.all() if owner is None else Field.objects.filter(farm__owner=owner)
+        if full:
+            field_ids = set(fields.values_list('pk', flat=True))
+        else:
+            field_ids = self.changed_fields(owner)
+        field_ids = sorted(field_ids)
+        for start in range(0, len(field_ids), self.chunk_size):
+            self.recompute(field_ids[start:start + self.chunk_size])
+        if owner is None:
+            CubeRefresh.objects.create(started=started, finished=now(), fields=len(field_ids), full=full)
+        return len(field_ids)
+
+    def changed_fields(self, owner=None):
+        fields, crops, cells = Field.objects.all(), Crop.objects.all(), self.all()
+        if owner is not None:
+            fields, crops, cells = (
+                fields.filter(farm__owner=owner), crops.filter(owner=owner), cells.filter(owner=owner))
+        last = CubeRefresh.objects.order_by('-started').first()
+        if last is None:
+            return set(fields.values_list('pk', flat=True))
+        since = last.started - self.overlap
+        field_ids = set(fields.filter(
+            Q(date_modified__gt=since) | Q(farm__date_modified__gt=since)).values_list('pk', flat=True))
+        field_ids.update(crops.filter(date_modified__gt=since).values_list('field_id', flat=True))
+        for model in (Expense, Output):
+            rows = model.objects.all() if owner is None else model.objects.filter(owner=owner)
+            field_ids.update(
+                rows.filter(date_modified__gt=since).values_list('crop__field_id', flat=True).distinct())
+
+        counted = crops.values('field_id').annotate(
+            crops=Count('pk'), expenses=Sum('summary__expense_count'), outputs=Sum('summary__output_count'),
+        ).order_by()
+        actual = {row['field_id']: (row['crops'], row['expenses'] or 0, row['outputs'] or 0) for row in counted}
+        stored = {
+            row['field_id']: (row['crops'], row['expenses'], row['outputs'])
+            for row in cells.filter(expense_type='').values('field_id').annotate(
+                crops=Sum('crops'), expenses=Sum('expenses'), outputs=Sum('outputs')).order_by()
+        }
+        field_ids.update(
+            field_id for field_id in actual.keys() | stored.keys() if actual.get(field_id) != stored.get(field_id))
+        return field_ids
+
+    def recompute(self, field_ids):
+        """Replace the cells of the given fields with aggregates of their crops, expenses and outputs."""
+        cells = {}
+
+        def cell(row, expense_type=''):
+            key = (row['field_id'], row['crop_type_id'], row['season'], row['year'], expense_type)
+            if key not in cells:
+                cells[key] = SeasonCube(
+                    owner_id=row['owner_id'], farm_id=row['farm_id'], field_id=row['field_id'],
+                    crop_type_id=row['crop_type_id'], season=row['season'], year=row['year'],
+                    expense_type=expense_type)
+            return cells[key]
+
+        crops = Crop.objects.filter(field_id__in=field_ids).values(
+            'owner_id', 'field_id', 'crop_type_id', 'season', farm_id=F('field__farm_id'),
+            year=ExtractYear('date_sowing'),
+        ).annotate(crops=Count('pk'), acres=Sum('total_acres')).order_by()
+        for row in crops:
+            total = cell(row)
+            total.crops, total.acres = row['crops'], row['acres']
+
+        # Expenses and outputs carry their own copies of the owner and farm.
+        dimensions = dict(
+            field_id=F('crop__field_id'), crop_type_id=F('crop__crop_type_id'), season=F('crop__season'),
+            year=ExtractYear('crop__date_sowing'))
+        expenses = Expense.objects.filter(crop__field_id__in=field_ids).values(
+            'owner_id', 'farm_id', 'expense_type', **dimensions).annotate(
+            amount=Sum('amount'), count=Count('pk')).order_by()
+        for row in expenses:
+            total = cell(row)
+            total.expense += row['amount']
+            total.expenses += row['count']
+            by_type = cell(row, row['expense_type'])
+            by_type.expense, by_type.expenses = row['amount'], row['count']
+            # Every cell carries its acres, so the types can be compared per acre.
+            by_type.crops, by_type.acres = total.crops, total.acres
+
+        outputs = Output.objects.filter(crop__field_id__in=field_ids).values(
+            'owner_id', 'farm_id', **dimensions).annotate(
+            revenue=Sum(F('total_mann') * F('rate_per_mann'), output_field=models.FloatField()),
+            mann=Sum('total_mann'), count=Count('pk'),
+        ).order_by()
+        for row in outputs:
+            total = cell(row)
+            total.revenue, total.output_mann, total.outputs = row['revenue'], row['mann'], row['count']
+
+        with transaction.atomic():
+            self.filter(field_id__in=field_ids).delete()
+            self.bulk_create(cells.values())
+
+    def totals(self, queryset, group_by=None):
+        """Sum the measures of queryset, per value of the group_by column if given, adding the ratios."""
+        measures = dict(
+            crops=Sum('crops'), acres=Sum('acres'), expense=Sum('expense'), expenses=Sum('expenses'),
+            revenue=Sum('revenue'), output_mann=Sum('output_mann'), outputs=Sum('outputs'),
+        )
+        if group_by is None:
+            rows = [queryset.aggregate(**measures)]
+        else:
+            rows = queryset.values(group_by).annotate(**measures).order_by(group_by)
+        for row in rows:
+            if row['crops'] is None:
+                # Nothing to sum.
+                continue
+            row['profit'] = row['revenue'] - row['expense']
+            acres = row['acres'] or None
+            row['expense_per_acre'] = acres and row['expense'] / acres
+            row['revenue_per_acre'] = acres and row['revenue'] / acres
+            row['profit_per_acre'] = acres and row['profit'] / acres
+            row['yield_per_acre'] = acres and row['output_mann'] / acres
+            yield row
+
+
+class SeasonCube(models.Model):
+    """
+    One cell of the seasonal analytics cube: the crops of a field of one crop type, season and
+    sowing year, with their acres, expenses and outputs. Cells with an empty expense_type hold
+    the totals of the crops, the others only the expenses of that type (and the acres of the
+    crops, for per acre figures). Rebuilt per field by SeasonCubeManager.refresh().
+    """
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Owner'))
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Farm'))
+    field = models.ForeignKey(Field, on_delete=models.CASCADE, related_name='+', verbose_name=_('Field'))
+    crop_type = models.ForeignKey(
+        CropType, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Crop type'))
+    season = models.CharField(choices=Crop.SEASON_CHOICES, max_length=550, verbose_name=_('Season'))
+    year = models.PositiveIntegerField(verbose_name=_('Year'))
+    expense_type = models.CharField(
+        choices=Expense.EXPENSE_TYPE_CHOICES, max_length=255, blank=True, verbose_name=_('Expense type'))
+
+    crops = models.PositiveIntegerField(default=0, verbose_name=_('Crops'))
+    acres = models.FloatField(default=0, verbose_name=_('Total acres'))
+    expense = models.FloatField(default=0, verbose_name=_('Total expense'))
+    expenses = models.PositiveIntegerField(default=0, verbose_name=_('Expense count'))
+    revenue = models.FloatField(default=0, verbose_name=_('Total output'))
+    output_mann = models.FloatField(default=0, verbose_name=_('Total mann'))
+    outputs = models.PositiveIntegerField(default=0, verbose_name=_('Output count'))
+
+    objects = SeasonCubeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'expense_type', 'year'], name='cube_owner_type_year_idx'),
+            models.Index(fields=['expense_type', 'year'], name='cube_type_year_idx'),
+        ]
+        verbose_name = _('Season analytics')
+        verbose_name_plural = _('Season analytics')
+
+    def __str__(self):
+        return f"{self.field_id}/{self.crop_type_id}/{self.season}/{self.year}/{self.expense_type or '*'}"
+
+
+class CubeRefresh(models.Model):
+    """A run of SeasonCubeManager.refresh(), the start of the last one bounds the next."""
+    started = models.DateTimeField(db_index=True, verbose_name=_('Started'))
+    finished = models.DateTimeField(verbose_name=_('Finished'))
+    fields = models.PositiveIntegerField(verbose_name=_('Fields recomputed'))
+    full = models.BooleanField(default=False, verbose_name=_('Full rebuild'))
+
+    class Meta:
+        verbose_name = _('Cube refresh')
+        verbose_name_plural = _('Cube refreshes')
+
+    def __str__(self):
+        return f"{self.started}: {self.fields}"
+
+
+class ExpenseRollupManager(models.Manager):
+    # Filters and groupings on these alone can be answered from the farm totals rows.
+    farm_level = ('owner', 'farm')
+
+    def apply(self, expenses, sign=1):
+        """
+        Add expenses to their rollup rows and to the totals rows of their farms, or subtract them
+        with sign=-1, reading their crop_id, expense_type, spent_by_id, expense_date and amount.
+        Existing rows are updated in place, missing ones created and emptied ones deleted.
+
+        The rows are read and written in one transaction, locking the existing ones where the
+        database can. When another apply() has created one of the missing rows since, inserting it
+        again fails a unique index and the rows are read and written once more.
+        """
+        expenses = list(expenses)
+        crops = {
+            pk: (owner_id, farm_id, field_id) for pk, owner_id, farm_id, field_id
+            in Crop.objects.filter(pk__in={expense.crop_id for expense in expenses}).values_list(
+                'pk', 'owner_id', 'field__farm_id', 'field_id')
+        }
+        deltas = {}
+        for expense in expenses:
+            if expense.crop_id not in crops:
+                continue
+            farm_id = crops[expense.crop_id][1]
+            date = self.model.period(expense.expense_date)
+            for key in [(farm_id, expense.crop_id, expense.expense_type, expense.spent_by_id, date),
+                        (farm_id, None, '', None, date)]:
+                amount, count = deltas.get(key, (0, 0))
+                deltas[key] = (amount + sign * expense.amount, count + sign)
+        if not deltas:
+            return
+
+        owners = {farm_id: owner_id for owner_id, farm_id, field_id in crops.values()}
+        try:
+            self.write_deltas(deltas, sign, crops, owners)
+        except IntegrityError:
+            self.write_deltas(deltas, sign, crops, owners)
+
+    def existing_rows(self, deltas):
+        """{key: pk} of the rows of the keys of deltas that exist, locked until the transaction ends."""
+        dates = [key[-1] for key in deltas]
+        return {
+            (row.farm_id, row.crop_id, row.expense_type, row.spent_by_id, row.date): row.pk
+            for row in self.select_for_update().filter(
+                farm_id__in={key[0] for key in deltas}, date__gte=min(dates), date__lte=max(dates),
+            ).only('farm_id', 'crop_id', 'expense_type', 'spent_by_id', 'date')
+        }
+
+    def write_deltas(self, deltas, sign, crops, owners):
+        """Add deltas, {key: (amount, count)}, to their rows in one transaction, see apply()."""
+        created = []
+        with transaction.atomic():
+            existing = self.existing_rows(deltas)
+            for key, (amount, count) in deltas.items():
+                farm_id, crop_id, expense_type, spent_by_id, date = key
+                if key in existing:
+                    self.filter(pk=existing[key]).update(amount=F('amount') + amount, expenses=F('expenses') + count)
+                elif count > 0:
+                    created.append(self.model(
+                        owner_id=owners[farm_id], farm_id=farm_id, field_id=crop_id and crops[crop_id][2],
+                        crop_id=crop_id, expense_type=expense_type, spent_by_id=spent_by_id, date=date,
+                        amount=amount, expenses=count))
+            self.bulk_create(created)
+            if sign < 0:
+                self.filter(pk__in=[existing[key] for key in deltas if key in existing], expenses__lte=0).delete()
+
+    def rebuild(self):
+        """Recompute every rollup row from the expenses."""
+        totals = Expense.objects.annotate(date=self.model.period_expression()).values(
+            'owner_id', 'farm_id', 'crop__field_id', 'crop_id', 'expense_type', 'spent_by_id', 'date',
+        ).annotate(total=Sum('amount'), count=Count('pk')).order_by()
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                self.model(
+                    owner_id=row['owner_id'], farm_id=row['farm_id'], field_id=row['crop__field_id'],
+                    crop_id=row['crop_id'], expense_type=row['expense_type'], spent_by_id=row['spent_by_id'],
+                    date=row['date'], amount=row['total'], expenses=row['count'])
+                for row in totals.iterator()
+            )
+            self.rebuild_farm_totals()
+
+    def rebuild_farm_totals(self, farm_ids=None):
+        """Recompute the farm totals rows of the given farms, or of all, from their other rows."""
+        rows = self.filter(expense_type__gt='')
+        totals = self.filter(expense_type='')
+        if farm_ids is not None:
+            rows = rows.filter(farm_id__in=farm_ids)
+            totals = totals.filter(farm_id__in=farm_ids)
+        with transaction.atomic():
+            totals.delete()
+            self.bulk_create(
+                self.model(owner_id=row['owner_id'], farm_id=row['farm_id'], expense_type='', date=row['date'],
+                           amount=row['total'], expenses=row['count'])
+                for row in rows.values('owner_id', 'farm_id', 'date').annotate(
+                    total=Sum('amount'), count=Sum('expenses')).order_by().iterator()
+            )
+
+    def drift(self):
+        """
+        Return the ids of crops whose rollup rows, and the ids of farms whose totals rows, differ
+        from their expenses.
+        """
+        def differ(actual, stored):
+            return sorted(
+                key for key in actual.keys() | stored.keys()
+                if actual.get(key, (0, 0))[1] != stored.get(key, (0, 0))[1]
+                or abs(actual.get(key, (0, 0))[0] - stored.get(key, (0, 0))[0]) > 0.01
+            )
+
+        def sums(queryset, column, amount, count):
+            return {
+                key: (total, number) for key, total, number in queryset.values(column).annotate(
+                    total=Sum(amount), number=count).order_by().values_list(column, 'total', 'number')
+            }
+
+        rows = self.filter(expense_type__gt='')
+        totals = self.filter(expense_type='')
+        return (
+            differ(sums(Expense.objects.all(), 'crop_id', 'amount', Count('pk')),
+                   sums(rows, 'crop_id', 'amount', Sum('expenses'))),
+            differ(sums(Expense.objects.all(), 'farm_id', 'amount', Count('pk')),
+                   sums(totals, 'farm_id', 'amount', Sum('expenses'))),
+        )
+
+    def rows(self, group_by=(), **filters):
+        """
+        The rows to sum for group_by and filters: the farm totals rows when both only name the
+        owner and the farm, the detailed rows otherwise.
+        """
+        names = {name.split('__')[0] for name in [*group_by, *filters]}
+        if {name[:-3] if name.endswith('_id') else name for name in names} <= {'date', *self.farm_level}:
+            return self.filter(expense_type='', **filters)
+        return self.filter(expense_type__gt='', **filters)
+
+    def series(self, start=None, end=None, group_by=(), **filters):
+        """
+        Expense totals per period (day or month) from start to end inclusive, and per value of the
+        group_by columns, of the rows matching filters (on owner, farm, field, crop, expense_type
+        and spent_by). Returns dicts with the date, the group_by values, amount and expenses in
+        date order. A farm's five years of months read 60 rows.
+        """
+        rows = self.rows(group_by, **filters)
+        if start:
+            rows = rows.filter(date__gte=self.model.period(start))
+        if end:
+            rows = rows.filter(date__lte=end)
+        return list(rows.values('date', *group_by).annotate(
+            amount=Sum('amount'), expenses=Sum('expenses')).order_by('date', *group_by))
+
+
+class ExpenseMonthlyManager(ExpenseRollupManager):
+
+    def totals(self, start, end, group_by=(), **filters):
+        """
+        Expense totals from start to end inclusive, per value of the group_by columns, with the
+        filters of series(). Whole months are read from the monthly rows, the days of the months
+        the range only partly covers from the daily ones.
+        """
+        first_month = start if start.day == 1 else ExpenseMonthly.next_period(start)
+        last_month = ExpenseMonthly.period(end + datetime.timedelta(days=1))
+        parts = []
+        if first_month < last_month:
+            parts.append(self.rows(group_by, date__gte=first_month, date__lt=last_month, **filters))
+            parts.append(ExpenseDaily.objects.rows(group_by, date__gte=start, date__lt=first_month, **filters))
+            parts.append(ExpenseDaily.objects.rows(group_by, date__gte=last_month, date__lte=end, **filters))
+        else:
+            parts.append(ExpenseDaily.objects.rows(group_by, date__gte=start, date__lte=end, **filters))
+
+        totals = {}
+        for rows in parts:
+            for row in rows.values(*group_by).annotate(amount=Sum('amount'), expenses=Sum('expenses')).order_by():
+                key = tuple(row[name] for name in group_by)
+                total = totals.setdefault(key, dict(zip(group_by, key), amount=0, expenses=0))
+                total['amount'] += row['amount']
+                total['expenses'] += row['expenses']
+        return sorted(totals.values(), key=lambda total: [total[name] for name in group_by])
+
+
+class ExpenseRollup(models.Model):
+    """
+    Totals of the expenses of a crop of one type spent by one user within a period, with the
+    crop's owner, farm and field copied for filtering. Rows with an empty expense_type (and no
+    crop, field or spender) hold the totals of a farm. Maintained from Expense saves and deletes
+    by apps.farms.signals and from bulk inserts by apply_to_rollups().
+
+    unique_together lets the NULL crop and spender of the totals rows repeat, so a partial unique
+    index on their farm and date, added by migration 0029, keeps one per farm and period.
+    """
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Owner'))
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Farm'))
+    field = models.ForeignKey(
+        Field, on_delete=models.CASCADE, null=True, db_index=False, related_name='+', verbose_name=_('Field'))
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, null=True, related_name='+', verbose_name=_('Crop'))
+    expense_type = models.CharField(
+        choices=Expense.EXPENSE_TYPE_CHOICES, max_length=255, blank=True, verbose_name=_('Expense type'))
+    spent_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, db_index=False, related_name='+', verbose_name=_('Expend by'))
+    date = models.DateField(verbose_name=_('Date'))
+
+    amount = models.FloatField(default=0, verbose_name=_('Amount'))
+    expenses = models.PositiveIntegerField(default=0, verbose_name=_('Expense count'))
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return (f"{self.farm_id}/{self.crop_id}/{self.expense_type or '*'}/{self.spent_by_id}/{self.date}: "
+                f"{self.amount}")
+
+
+class ExpenseDaily(ExpenseRollup):
+    objects = ExpenseRollupManager()
+
+    class Meta:
+        unique_together = ('crop', 'expense_type', 'spent_by', 'date')
+        indexes = [
+            models.Index(fields=['owner', 'expense_type', 'date'], name='daily_owner_type_date_idx'),
+            models.Index(fields=['farm', 'expense_type', 'date'], name='daily_farm_type_date_idx'),
+            models.Index(fields=['field', 'date'], name='daily_field_date_idx'),
+            models.Index(fields=['expense_type', 'date'], name='daily_type_date_idx'),
+        ]
+        verbose_name = _('Daily expense total')
+        verbose_name_plural = _('Daily expense totals')
+
+    @staticmethod
+    def period(date):
+        return date
+
+    @staticmethod
+    def period_expression():
+        return F('expense_date')
+
+
+class ExpenseMonthly(ExpenseRollup):
+    objects = ExpenseMonthlyManager()
+
+    class Meta:
+        unique_together = ('crop', 'expense_type', 'spent_by', 'date')
+        indexes = [
+            models.Index(fields=['owner', 'expense_type', 'date'], name='monthly_owner_type_date_idx'),
+            models.Index(fields=['farm', 'expense_type', 'date'], name='monthly_farm_type_date_idx'),
+            models.Index(fields=['field', 'date'], name='monthly_field_date_idx'),
+            models.Index(fields=['expense_type', 'date'], name='monthly_type_date_idx'),
+        ]
+        verbose_name = _('Monthly expense total')
+        verbose_name_plural = _('Monthly expense totals')
+
+    @staticmethod
+    def period(date):
+        """The first day of the month of date."""
+        return date.replace(day=1)
+
+    @staticmethod
+    def next_period(date):
+        return (date.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+    @staticmethod
+    def period_expression():
+        return TruncMonth('expense_date')
+
+
+def apply_to_rollups(expenses, sign=1):
+    """Add expenses to the daily and monthly rollups, or subtract them with sign=-1."""
+    expenses = list(expenses)
+    for model in (ExpenseDaily, ExpenseMonthly):
+        model.objects.apply(expenses, sign)
+
+
+class DateBucketManager(models.Manager):
+
+    def counts(self, records):
+        """Unsaved buckets counting the source records per parent, copied fields and day."""
+        model = self.model
+        day = F(model.source_date)
+        if model.has_datetimes():
+            day = TruncDate(model.source_date)
+        columns = [f'{name}_id' for name in (model.parent, *model.copied)]
+        return [
+            model(date=row['day'], records=row['total'], **{column: row[column] for column in columns})
+            for row in records.annotate(day=day).values(*columns, 'day').annotate(
+                total=Count('pk')).order_by().iterator()
+        ]
+
+    def refresh(self, keys):
+        """
+        Recount the buckets of (parent id, source date) keys from the source records. The days
+        from the earliest to the latest key are recounted for every parent named, a None date
+        recounts all of the parents' buckets.
+        """
+        parents, days, whole = set(), [], False
+        for parent_id, value in keys:
+            if parent_id is None:
+                continue
+            parents.add(parent_id)
+            if value is None:
+                whole = True
+            else:
+                days.append(self.model.day(value))
+        if not parents:
+            return
+        lookup = f'{self.model.parent}_id__in'
+        records = self.model.source._default_manager.filter(**{lookup: parents})
+        buckets = self.filter(**{lookup: parents})
+        if not whole:
+            start, end = self.model.bounds(min(days), max(days))
+            date = self.model.source_date
+            records = records.filter(**{f'{date}__gte': start, f'{date}__lt': end})
+            buckets = buckets.filter(date__gte=min(days), date__lte=max(days))
+        with transaction.atomic():
+            buckets.delete()
+            self.bulk_create(self.counts(records))
+
+    def rebuild(self):
+        """Recount every bucket from the source records."""
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(self.counts(self.model.source._default_manager.all()))
+
+    def drift(self):
+        """Return the ids of the parents whose buckets differ from their source records."""
+        columns = [f'{name}_id' for name in (self.model.parent, *self.model.copied)]
+
+        def keyed(buckets):
+            return {(*(getattr(bucket, column) for column in columns), bucket.date): bucket.records
+                    for bucket in buckets}
+
+        actual = keyed(self.counts(self.model.source._default_manager.all()))
+        stored = keyed(self.only(*columns, 'date', 'records').iterator())
+        return sorted({key[0] for key in actual.keys() | stored.keys() if actual.get(key) != stored.get(key)})
+
+    def rows(self, **filters):
+        return self.filter(**filters)
+
+
+class DateBucket(models.Model):
+    """
+    The number of source records of a parent on one day, with the owner copied for scoping.
+    Rows only exist for days that have records, so their dates are the years, months and days
+    a changelist's date drill-down offers, see ReadOnlyModelAdmin.date_buckets. Subclasses name
+    the source model, the foreign key grouping it, its date field and the other columns copied.
+    """
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Owner'))
+    date = models.DateField(verbose_name=_('Date'))
+    records = models.PositiveIntegerField(default=0, verbose_name=_('Records'))
+
+    source = None
+    parent = None
+    source_date = None
+    copied = ('owner', )
+
+    objects = DateBucketManager()
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f'{getattr(self, self.parent + "_id")}/{self.date}: {self.records}'
+
+    @classmethod
+    def has_datetimes(cls):
+        return isinstance(cls.source._meta.get_field(cls.source_date), models.DateTimeField)
+
+    @classmethod
+    def day(cls, value):
+        """The day of a source date, datetimes are taken in the current time zone."""
+        return localtime(value).date() if isinstance(value, datetime.datetime) else value
+
+    @classmethod
+    def bounds(cls, first, last):
+        """The source dates [start, end) falling on the days first to last."""
+        end = last + datetime.timedelta(days=1)
+        if cls.has_datetimes():
+            return (make_aware(datetime.datetime.combine(first, datetime.time.min)),
+                    make_aware(datetime.datetime.combine(end, datetime.time.min)))
+        return first, end
+
+
+class OutputDateBucket(DateBucket):
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name='+', verbose_name=_('Crop'))
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Farm'))
+    field = models.ForeignKey(
+        Field, on_delete=models.CASCADE, db_index=False, related_name='+', verbose_name=_('Field'))
+
+    source = Output
+    parent = 'crop'
+    source_date = 'sold_date'
+    copied = ('owner', 'farm', 'field')
+
+    class Meta:
+        unique_together = ('crop', 'date')
+        indexes = [
+            models.Index(fields=['owner', 'date'], name='output_bucket_owner_idx'),
+            models.Index(fields=['farm', 'date'], name='output_bucket_farm_idx'),
+            models.Index(fields=['field', 'date'], name='output_bucket_field_idx'),
+            models.Index(fields=['date'], name='output_bucket_date_idx'),
+        ]
+        verbose_name = _('Output date')
+        verbose_name_plural = _('Output dates')
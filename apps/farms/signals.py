@@ -0,0 +1,152 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.farms.models import (
+    Crop, CropSummary, CropType, Expense, ExpenseDaily, ExpenseMonthly, Farm, Field, Output, OutputDateBucket,
+    apply_to_rollups,
+)
+from apps.users.models import User
+from farm_management_system.filters import invalidate_filter_choices
+
+
+@receiver(pre_save, sender=Crop)
+def set_crop_owner(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.owner_id = Field.objects.filter(
+            pk=instance.field_id).values_list('farm__owner_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Expense)
+def set_owner_from_crop(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.owner_id, instance.farm_id = Crop.objects.filter(
+            pk=instance.crop_id).values_list('owner_id', 'field__farm_id').first() or (None, None)
+
+
+@receiver(pre_save, sender=Output)
+def set_owner_and_field_from_crop(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.owner_id, instance.farm_id, instance.field_id = Crop.objects.filter(
+            pk=instance.crop_id).values_list('owner_id', 'field__farm_id', 'field_id').first() or (None, None, None)
+
+
+def sync_crops(crops, owner_id, farm_id):
+    """
+    Point the denormalized owner of crops, and the owner and farm of their expenses, outputs, output
+    date buckets and expense rollups, to the given.
+    """
+    crops.exclude(owner_id=owner_id).update(owner_id=owner_id)
+    for model in (Expense, Output, OutputDateBucket):
+        model.objects.filter(crop__in=crops).exclude(owner_id=owner_id, farm_id=farm_id).update(
+            owner_id=owner_id, farm_id=farm_id)
+    for model in (ExpenseDaily, ExpenseMonthly):
+        moved = model.objects.filter(crop__in=crops).exclude(owner_id=owner_id, farm_id=farm_id)
+        farm_ids = set(moved.values_list('farm_id', flat=True).distinct())
+        if farm_ids:
+            moved.update(owner_id=owner_id, farm_id=farm_id)
+            model.objects.rebuild_farm_totals(farm_ids | {farm_id})
+
+
+@receiver(post_save, sender=Farm)
+def sync_farm_owner(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        sync_crops(Crop.objects.filter(field__farm=instance), instance.owner_id, instance.pk)
+
+
+@receiver(post_save, sender=Field)
+def sync_field_farm(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        owner_id = Farm.objects.filter(pk=instance.farm_id).values_list('owner_id', flat=True).first()
+        sync_crops(Crop.objects.filter(field=instance), owner_id, instance.farm_id)
+
+
+@receiver(post_save, sender=Crop)
+def sync_crop_field(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        farm_id = Field.objects.filter(pk=instance.field_id).values_list('farm_id', flat=True).first()
+        sync_crops(Crop.objects.filter(pk=instance.pk), instance.owner_id, farm_id)
+        for model in (ExpenseDaily, ExpenseMonthly, Output, OutputDateBucket):
+            model.objects.filter(crop=instance).exclude(field_id=instance.field_id).update(field_id=instance.field_id)
+
+
+@receiver(post_save, sender=Crop)
+def update_crop_summary(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        if created:
+            CropSummary.objects.get_or_create(crop=instance)
+        # The per acre columns follow total_acres.
+        CropSummary.objects.update_metrics([instance.pk])
+
+
+# The columns of a stored expense or output its summaries, date buckets and rollups are built from.
+SUMMARIZED_FIELDS = {
+    Expense: ('crop_id', 'expense_type', 'spent_by_id', 'expense_date', 'amount'),
+    Output: ('crop_id', 'total_mann', 'rate_per_mann', 'sold_date'),
+}
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=Output)
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """Keep the row as stored, to take it out of the summaries and rollups it was counted in."""
+    instance._previous = None
+    if instance.pk and not raw:
+        instance._previous = sender.objects.filter(pk=instance.pk).only(*SUMMARIZED_FIELDS[sender]).first()
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Output)
+def update_crop_summary_totals(sender, instance, raw=False, **kwargs):
+    if not raw:
+        kind = 'expenses' if sender is Expense else 'outputs'
+        previous = getattr(instance, '_previous', None)
+        if previous:
+            CropSummary.objects.add(**{kind: [previous]}, sign=-1)
+        CropSummary.objects.add(**{kind: [instance]})
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Output)
+def remove_from_crop_summary(sender, instance, **kwargs):
+    CropSummary.objects.add(**{'expenses' if sender is Expense else 'outputs': [instance]}, sign=-1)
+
+
+@receiver(post_save, sender=Output)
+@receiver(post_delete, sender=Output)
+def refresh_output_date_buckets(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # An edited output may have moved to another day, so its crops are recounted whole.
+        day = None if kwargs.get('created') is False else instance.sold_date
+        previous = getattr(instance, '_previous', None)
+        OutputDateBucket.objects.refresh([(instance.crop_id, day), (previous and previous.crop_id, None)])
+
+
+@receiver(post_save, sender=Expense)
+def update_expense_rollups(sender, instance, raw=False, **kwargs):
+    if not raw:
+        previous = getattr(instance, '_previous', None)
+        if previous:
+            apply_to_rollups([previous], sign=-1)
+        apply_to_rollups([instance])
+
+
+@receiver(post_delete, sender=Expense)
+def remove_from_expense_rollups(sender, instance, **kwargs):
+    apply_to_rollups([instance], sign=-1)
+
+
+@receiver(post_save, sender=Farm)
+@receiver(post_save, sender=Field)
+@receiver(post_save, sender=Crop)
+@receiver(post_save, sender=CropType)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Farm)
+@receiver(post_delete, sender=Field)
+@receiver(post_delete, sender=Crop)
+@receiver(post_delete, sender=CropType)
+@receiver(post_delete, sender=User)
+def expire_filter_choices(sender, update_fields=None, **kwargs):
+    # Logging in only saves last_login, which no filter shows.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_filter_choices(sender)
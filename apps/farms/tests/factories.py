@@ -0,0 +1,58 @@
+"""
+Owners and their farms, fields, crops, expenses, outputs, ledgers and ledger entries, saved one
+by one so that every signal and save() runs.
+"""
+import datetime
+
+from django.contrib.auth.models import Permission
+from django.utils.timezone import make_aware
+
+from apps.farms.models import Crop, CropType, Expense, Farm, Field, Output
+from apps.ledgers.models import Ledger, LedgerEntries
+from apps.users.models import User
+
+
+def create_owner(username):
+    """A staff user with every farms and ledgers permission, as the synthetic owners' group has."""
+    owner = User.objects.create(username=username, first_name='Owner', last_name=username, is_staff=True)
+    owner.user_permissions.set(Permission.objects.filter(content_type__app_label__in=['farms', 'ledgers']))
+    return owner
+
+
+def create_farm(owner, name='Farm'):
+    return Farm.objects.create(name=name, owner=owner)
+
+
+def create_field(farm, name='Field', total_acres=10, **values):
+    values = {'is_own_property': True, 'has_electricity_tubewell': False, 'has_canal_irrigation': True, **values}
+    return Field.objects.create(farm=farm, name=name, total_acres=total_acres, **values)
+
+
+def create_crop(field, date_sowing=datetime.date(2020, 4, 1), total_acres=5, **values):
+    if 'crop_type' not in values:
+        values['crop_type'], created = CropType.objects.get_or_create(name='Cotton')
+    values = {'season': Crop.SUMMER, 'breed': 'FH-142', **values}
+    return Crop.objects.create(field=field, date_sowing=date_sowing, total_acres=total_acres, **values)
+
+
+def create_expense(crop, amount, expense_date=None, expense_type=Expense.SEED, **values):
+    values = {'spent_by': crop.owner, 'added_by': crop.owner, 'notes': None, **values}
+    return Expense.objects.create(
+        crop=crop, amount=amount, expense_date=expense_date or crop.date_sowing, expense_type=expense_type, **values)
+
+
+def create_output(crop, total_mann, rate_per_mann, sold_date=None, **values):
+    return Output.objects.create(
+        crop=crop, total_mann=total_mann, rate_per_mann=rate_per_mann, sold_date=sold_date or crop.date_sowing,
+        **values)
+
+
+def create_ledger(farm, name='Ledger', **values):
+    return Ledger.objects.create(farm=farm, name=name, **values)
+
+
+def create_entry(ledger, amount, transaction_date=datetime.datetime(2020, 4, 1, 12), type=LedgerEntries.DEBIT,
+                 **values):
+    """An entry of a ledger, the transaction date given as a naive datetime in the current time zone."""
+    return LedgerEntries.objects.create(
+        ledger=ledger, amount=amount, transaction_date=make_aware(transaction_date), type=type, **values)
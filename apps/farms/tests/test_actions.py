@@ -0,0 +1,91 @@
+import datetime
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.farms.models import (
+    Crop, CropSummary, Expense, ExpenseDaily, ExpenseMonthly, Farm, Field, Output, SeasonCube,
+)
+from apps.farms.tests.factories import (
+    create_crop, create_expense, create_farm, create_field, create_output, create_owner,
+)
+from farm_management_system.filters import choices_version_key
+
+
+class BulkActionTests(TestCase):
+    """
+    The crop and field actions update the selected rows of the owner in one UPDATE. They keep the
+    summaries and rollups, which read none of the changed columns, and refresh the filter choices
+    and the season cube.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        cls.field = create_field(
+            create_farm(cls.owner), is_own_property=False, lease_per_acre=100,
+            lease_start=datetime.date(2019, 1, 1), lease_end=datetime.date(2020, 1, 1))
+        cls.crop = create_crop(cls.field)
+        cls.late_crop = create_crop(create_field(cls.field.farm, name='Late'), date_sowing=datetime.date(2020, 10, 1))
+        create_expense(cls.crop, 100, expense_date=datetime.date(2020, 5, 1))
+        create_output(cls.crop, 10, 50, sold_date=datetime.date(2020, 9, 1))
+        cls.neighbour_field = create_field(
+            create_farm(create_owner('neighbour')), is_own_property=False, lease_end=datetime.date(2020, 1, 1))
+        cls.neighbour_crop = create_crop(cls.neighbour_field)
+
+    def setUp(self):
+        cache.clear()
+        SeasonCube.objects.refresh(full=True)
+        # Nothing has changed since the refresh.
+        earlier = timezone.now() - datetime.timedelta(days=1)
+        for model in (Farm, Field, Crop, Expense, Output):
+            model.objects.update(date_modified=earlier)
+        self.client.force_login(self.owner)
+
+    def act(self, model, action, selected, **data):
+        return self.client.post(reverse(f'admin:farms_{model}_changelist'), dict(
+            data, action=action, _selected_action=[obj.pk for obj in selected]))
+
+    def assertConsistent(self):
+        self.assertEqual(CropSummary.objects.drift(), [])
+        for model in (ExpenseDaily, ExpenseMonthly):
+            self.assertEqual(model.objects.drift(), ([], []))
+
+    def test_mark_harvested(self):
+        version = cache.get(choices_version_key(Crop))
+        self.act('crop', 'mark_harvested', [self.crop, self.late_crop, self.neighbour_crop],
+                 date_harvesting='2020-09-15')
+        self.assertEqual(
+            dict(Crop.objects.values_list('pk', 'date_harvesting')),
+            {self.crop.pk: datetime.date(2020, 9, 15), self.late_crop.pk: None, self.neighbour_crop.pk: None})
+        self.assertConsistent()
+        self.assertEqual(SeasonCube.objects.changed_fields(), {self.field.pk})
+        self.assertNotEqual(cache.get(choices_version_key(Crop)), version)
+
+    def test_mark_harvested_across_every_filtered_crop(self):
+        self.act('crop', 'mark_harvested', [self.crop], select_across='1', date_harvesting='2020-09-15')
+        self.assertEqual(Crop.objects.filter(date_harvesting__isnull=False).get(), self.crop)
+
+    def test_malformed_harvest_date_changes_nothing(self):
+        self.act('crop', 'mark_harvested', [self.crop], date_harvesting='2020-13-01')
+        self.assertFalse(Crop.objects.filter(date_harvesting__isnull=False).exists())
+        self.assertEqual(SeasonCube.objects.changed_fields(), set())
+
+    def test_deactivate_expired_leases(self):
+        version = cache.get(choices_version_key(Field))
+        self.act('field', 'deactivate_expired_leases', [self.field, self.neighbour_field])
+        fields = Field.objects.filter(pk__in=[self.field.pk, self.neighbour_field.pk])
+        self.assertEqual(
+            dict(fields.values_list('pk', 'is_active')), {self.field.pk: False, self.neighbour_field.pk: True})
+        self.assertConsistent()
+        self.assertEqual(SeasonCube.objects.changed_fields(), {self.field.pk})
+        self.assertNotEqual(cache.get(choices_version_key(Field)), version)
+
+    def test_columns_the_summaries_read_are_not_updated_in_bulk(self):
+        with self.assertRaises(ImproperlyConfigured):
+            admin.site._registry[Crop].update_rows(None, Crop.objects.all(), total_acres=1)
+        self.assertEqual(Crop.objects.get(pk=self.crop.pk).total_acres, self.crop.total_acres)
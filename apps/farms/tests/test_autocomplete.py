@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.farms.tests.factories import create_farm, create_field, create_owner
+
+
+class AutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        for number in range(21):
+            create_field(create_farm(cls.owner, name=f'Alpha {number:02}'), name=f'Acre {number:02}')
+        create_field(create_farm(create_owner('neighbour'), name='Alpha neighbour'), name='Acre neighbour')
+
+    def autocomplete(self, model, **params):
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:farms_{model}_autocomplete'), params)
+        table_queries = [query for query in queries if f'FROM "farms_{model}"' in query['sql']]
+        return response.json(), len(table_queries)
+
+    def test_pages_are_scoped_to_the_owner(self):
+        page, queries = self.autocomplete('farm', term='alp')
+        self.assertEqual(len(page['results']), 20)
+        self.assertTrue(page['pagination']['more'])
+        self.assertEqual(queries, 1)
+        page, queries = self.autocomplete('farm', term='alp', page=2)
+        self.assertEqual([result['text'] for result in page['results']], ['Alpha 20(Owner owner)'])
+        self.assertFalse(page['pagination']['more'])
+
+    def test_labels_are_read_with_the_results(self):
+        # A farm's label names its owner, joined into the single query of the page.
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:farms_farm_autocomplete'), {'term': 'alp'})
+        page_queries = [query['sql'] for query in queries if 'FROM "farms_farm"' in query['sql']]
+        self.assertEqual(len(page_queries), 1)
+        self.assertIn('JOIN "users_user"', page_queries[0])
+
+    def test_fields_of_other_owners_are_not_offered(self):
+        page, queries = self.autocomplete('field', term='acre', page=2)
+        self.assertEqual([result['text'] for result in page['results']], ['Acre 20'])
@@ -0,0 +1,111 @@
+import datetime
+
+from django.contrib import admin
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from apps.farms.models import Crop, CropType, Expense, Farm, FarmAsset, Field, Output, SeasonCube
+from apps.farms.tests.factories import (
+    create_crop, create_entry, create_expense, create_farm, create_field, create_ledger, create_output,
+    create_owner,
+)
+from apps.ledgers.models import Ledger, LedgerEntries
+from apps.users.middlewares import get_query_budget
+from apps.users.models import User
+from farm_management_system.query_checks import admin_request, render_changelist
+
+# Every changelist is rendered with pages of these many rows.
+SMALL_PAGE, LARGE_PAGE = 2, 6
+
+
+class ChangelistQueryCountTests(TestCase):
+    """
+    Each changelist renders with the same number of queries whether its page shows SMALL_PAGE or
+    LARGE_PAGE rows, as a superuser and as an owner, and within its QUERY_BUDGETS.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create(username='admin', is_superuser=True, is_staff=True)
+        cls.owner = create_owner('owner')
+        for owner in (cls.owner, create_owner('neighbour')):
+            for number in range(LARGE_PAGE):
+                farm = create_farm(owner, name=f'Farm {number}')
+                FarmAsset.objects.create(
+                    farm=farm, name='Tractor', date_purchased=datetime.date(2019, 1, 1), is_bought_new=True,
+                    purchase_cost=1500000)
+                crop_type, created = CropType.objects.get_or_create(name=f'Crop {number}')
+                crop = create_crop(create_field(farm), crop_type=crop_type)
+                create_expense(crop, 1000)
+                create_output(crop, 20, 3000)
+                create_entry(create_ledger(farm), 500)
+        for number in range(LARGE_PAGE):
+            Group.objects.create(name=f'Group {number}')
+            User.objects.create(username=f'clerk-{number}')
+        SeasonCube.objects.refresh(full=True)
+
+    def assertConstantQueries(self, model, superuser_queries, owner_queries=None):
+        """Assert the queries of a model's changelist, owner_queries None where owners may not change it."""
+        model_admin = admin.site._registry[model]
+        budget = get_query_budget(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        for user, queries in [(self.superuser, superuser_queries), (self.owner, owner_queries)]:
+            with self.subTest(user=user.username):
+                if queries is None:
+                    self.assertFalse(model_admin.has_change_permission(admin_request(user)))
+                    continue
+                # The first render fills the permission and list filter caches.
+                render_changelist(model_admin, user, SMALL_PAGE)
+                for per_page in (SMALL_PAGE, LARGE_PAGE):
+                    with self.assertNumQueries(queries):
+                        response = render_changelist(model_admin, user, per_page)
+                    self.assertEqual(len(response.context_data['cl'].result_list), per_page)
+                if budget is not None:
+                    self.assertLessEqual(queries, budget)
+
+    def test_farms(self):
+        self.assertConstantQueries(Farm, 3, 3)
+
+    def test_crop_types(self):
+        self.assertConstantQueries(CropType, 3, 3)
+
+    def test_fields(self):
+        self.assertConstantQueries(Field, 3, 3)
+
+    def test_crops(self):
+        self.assertConstantQueries(Crop, 3, 3)
+
+    def test_farm_assets(self):
+        self.assertConstantQueries(FarmAsset, 3, 3)
+
+    def test_expenses(self):
+        self.assertConstantQueries(Expense, 3, 3)
+
+    def test_outputs(self):
+        self.assertConstantQueries(Output, 5, 5)
+
+    def test_season_cube(self):
+        # The dashboard is not paginated, it shows a row per value of the dimension grouped by.
+        model_admin = admin.site._registry[SeasonCube]
+        for user in (self.superuser, self.owner):
+            with self.subTest(user=user.username):
+                model_admin.changelist_view(admin_request(user, 'by=farm')).render()
+                with self.assertNumQueries(4):
+                    response = model_admin.changelist_view(admin_request(user, 'by=farm')).render()
+                farms = len(response.context_data['rows'])
+                create_crop(create_field(create_farm(self.owner, name='New farm')))
+                SeasonCube.objects.refresh()
+                with self.assertNumQueries(4):
+                    response = model_admin.changelist_view(admin_request(user, 'by=farm')).render()
+                self.assertEqual(len(response.context_data['rows']), farms + 1)
+
+    def test_ledgers(self):
+        self.assertConstantQueries(Ledger, 4, 4)
+
+    def test_ledger_entries(self):
+        self.assertConstantQueries(LedgerEntries, 7, 7)
+
+    def test_owners(self):
+        self.assertConstantQueries(User, 4)
+
+    def test_groups(self):
+        self.assertConstantQueries(Group, 3)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.farms.models import Crop, CropSummary, Expense
+from apps.users.models import User
+from farm_management_system.search import check_full_text_triggers
+
+
+class FullTextIndexTests(TestCase):
+
+    def test_migrations_keep_the_triggers(self):
+        # The test database is built by every migration, including those SQLite runs by copying tables.
+        self.assertEqual(check_full_text_triggers(None), [])
+        call_command('rebuild_search_indexes', '--check', stdout=StringIO())
+
+
+class SyntheticDataTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_synthetic_data', '--owners=2', '--farms=1', '--fields=2', '--years=2', '--expenses=6',
+            '--outputs=2', '--ledgers=1', '--entries=150', stdout=StringIO())
+
+    def test_generated_crops_fit_their_fields(self):
+        call_command('check_acreage_allocation', stdout=StringIO())
+
+    def test_snapshot_statistics_agree(self):
+        call_command('benchmark_crop_analytics', '--repeat=1', stdout=StringIO())
+
+    def test_bulk_entry_updates_summaries_and_rollups_once(self):
+        owner = User.objects.get(username='synthetic-0-owner-1')
+        crop = Crop.objects.filter(owner=owner).latest('date_sowing')
+        total_expense = CropSummary.objects.get(crop=crop).total_expense
+        data = {
+            'crop': crop.pk, 'spent_by': owner.pk, 'added_by': owner.pk,
+            'rows-TOTAL_FORMS': 30, 'rows-INITIAL_FORMS': 0, 'rows-MIN_NUM_FORMS': 0, 'rows-MAX_NUM_FORMS': 1000,
+        }
+        for number in range(30):
+            data.update({
+                f'rows-{number}-expense_type': Expense.SEED, f'rows-{number}-amount': 100 + number,
+                f'rows-{number}-expense_date': crop.date_sowing, f'rows-{number}-notes': f'Row {number}',
+            })
+        saved = []
+
+        def count_saves(sender, instance, **kwargs):
+            saved.append(instance)
+
+        post_save.connect(count_saves, sender=Expense)
+        self.client.force_login(owner)
+        try:
+            response = self.client.post(reverse('admin:farms_expense_bulk_entry'), data)
+        finally:
+            post_save.disconnect(count_saves, sender=Expense)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(saved, [])
+        self.assertEqual(CropSummary.objects.get(crop=crop).total_expense, total_expense + sum(range(100, 130)))
+        call_command('rebuild_crop_summaries', '--check', stdout=StringIO())
+        call_command('rebuild_expense_rollups', '--check', stdout=StringIO())
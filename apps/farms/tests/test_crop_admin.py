@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.farms.models import CropSummary
+from apps.farms.tests.factories import create_crop, create_expense, create_farm, create_field, create_owner
+
+
+class ProfitFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        field = create_field(create_farm(cls.owner), total_acres=50)
+        cls.crops = {}
+        for name, net_profit in [('profitable', 100), ('loss', -100), ('rounding', 1e-9), ('missing', None)]:
+            crop = cls.crops[name] = create_crop(field, breed=name)
+            if net_profit is None:
+                CropSummary.objects.filter(crop=crop).delete()
+            else:
+                CropSummary.objects.filter(crop=crop).update(net_profit=net_profit)
+
+    def filtered(self, value):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('admin:farms_crop_changelist'), {'profit': value})
+        return {crop.breed for crop in response.context['cl'].result_list}
+
+    def test_profitable_and_loss_leave_out_rounding_errors(self):
+        self.assertEqual(self.filtered('profitable'), {'profitable'})
+        self.assertEqual(self.filtered('loss'), {'loss'})
+
+    def test_balanced_takes_rounding_errors_and_crops_without_a_summary(self):
+        self.assertEqual(self.filtered('balanced'), {'rounding', 'missing'})
+
+
+class CropPerformanceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        field = create_field(create_farm(cls.owner), total_acres=50)
+        for breed, amount in [('cheap', 100), ('costly', 300), ('average', 200)]:
+            create_expense(create_crop(field, breed=breed), amount)
+        neighbour = create_owner('neighbour')
+        create_expense(create_crop(create_field(create_farm(neighbour)), breed='foreign'), 1000)
+
+    def test_lowest_ranked_crops_of_the_owner(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('admin:farms_crop_performance'), {'metric': 'profit_per_acre'})
+        self.assertEqual(response.context['crops'], 3)
+        self.assertEqual(
+            [(crop.breed, value) for crop, value, rank in response.context['ranked']],
+            [('costly', -60), ('average', -40), ('cheap', -20)])
+        self.assertAlmostEqual(response.context['ranked'][0][2], 100 / 6)
+
+    def test_admin_loads_without_numpy(self):
+        # NumPy is only imported by the analytics, the rest of the site runs without it.
+        code = 'import sys, django; django.setup(); print("numpy" in sys.modules)'
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='farm_management_system.settings')
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, stdout=subprocess.PIPE, check=True)
+        self.assertEqual(result.stdout.decode().strip(), 'False')
@@ -0,0 +1,50 @@
+import datetime
+
+from django.test import TestCase
+
+from apps.farms.forms import CropForm
+from apps.farms.models import Crop
+from apps.farms.tests.factories import create_crop, create_farm, create_field, create_owner
+
+
+class CropFormTests(TestCase):
+    """The crop form refuses a crop needing more acres than its field has free while it is in the ground."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.field = create_field(create_farm(create_owner('owner')), total_acres=10)
+        cls.wheat = create_crop(
+            cls.field, date_sowing=datetime.date(2020, 1, 1), total_acres=8,
+            date_harvesting=datetime.date(2020, 4, 30))
+
+    def form(self, instance=None, **values):
+        data = {
+            'field': self.field.pk, 'crop_type': self.wheat.crop_type_id, 'season': Crop.SUMMER, 'breed': 'FH-142',
+            'total_acres': 5, 'date_sowing': '2020-04-01', 'date_harvesting': '2020-09-30', **values,
+        }
+        return CropForm(data, instance=instance)
+
+    def test_over_allocated_crop_is_rejected(self):
+        form = self.form()
+        self.assertFalse(form.is_valid())
+        self.assertEqual(list(form.errors), ['total_acres'])
+        self.assertIn('Only 2 of the 10 acres', form.errors['total_acres'][0])
+
+    def test_crop_sown_the_day_the_other_is_harvested_is_accepted(self):
+        self.assertTrue(self.form(date_sowing='2020-04-30').is_valid())
+
+    def test_crop_within_the_free_acres_is_accepted(self):
+        self.assertTrue(self.form(total_acres=2).is_valid())
+
+    def test_changed_crop_does_not_count_itself(self):
+        self.assertTrue(self.form(instance=self.wheat, date_sowing='2020-01-01', total_acres=10).is_valid())
+
+    def test_crop_larger_than_its_field_is_rejected(self):
+        form = self.form(total_acres=11, date_sowing='2020-06-01')
+        self.assertFalse(form.is_valid())
+        self.assertIn('only has 10 acres', form.errors['total_acres'][0])
+
+    def test_harvest_before_the_sowing_is_rejected(self):
+        form = self.form(date_harvesting='2020-03-01')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(list(form.errors), ['date_harvesting'])
@@ -0,0 +1,50 @@
+import datetime
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.farms.tests.factories import create_crop, create_expense, create_farm, create_field, create_owner
+
+
+class ExpenseDateBucketTests(TestCase):
+    """The expense date drill-down is read from the daily rollup, scoped to the owner and the crop filter."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        field = create_field(create_farm(cls.owner))
+        cls.crop = create_crop(field)
+        create_expense(cls.crop, 10, expense_date=datetime.date(2020, 5, 3))
+        create_expense(cls.crop, 20, expense_date=datetime.date(2020, 5, 3))
+        create_expense(cls.crop, 30, expense_date=datetime.date(2020, 6, 9))
+        create_expense(create_crop(field), 40, expense_date=datetime.date(2020, 7, 1))
+        create_expense(create_crop(create_field(create_farm(create_owner('neighbour')))), 50,
+                       expense_date=datetime.date(2019, 1, 1))
+
+    def drill_down(self, **params):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('admin:farms_expense_changelist'), params)
+        return response.context['bucket_date_hierarchy']
+
+    def links(self, hierarchy):
+        return [choice['link'] for choice in hierarchy['choices']]
+
+    def test_single_year_starts_at_its_months(self):
+        # The neighbour's expense of 2019 would add a year to choose from.
+        links = self.links(self.drill_down())
+        self.assertEqual(len(links), 3)
+        self.assertIn('expense_date__month=5', links[0])
+        self.assertIn('expense_date__month=7', links[-1])
+
+    def test_month_lists_its_days(self):
+        links = self.links(self.drill_down(expense_date__year=2020, expense_date__month=5))
+        self.assertEqual(len(links), 1)
+        self.assertIn('expense_date__day=3', links[0])
+
+    def test_bucket_filters_narrow_the_buckets(self):
+        links = self.links(self.drill_down(crop__id__exact=self.crop.pk, expense_date__year=2020))
+        self.assertEqual(len(links), 2)
+        self.assertTrue(all(f'crop__id__exact={self.crop.pk}' in link for link in links))
+
+    def test_search_falls_back_to_the_rows(self):
+        self.assertIsNone(self.drill_down(q='urea'))
@@ -0,0 +1,53 @@
+import csv
+import io
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.farms.models import Expense
+from apps.farms.tests.factories import create_crop, create_expense, create_farm, create_field, create_owner
+
+
+class ExpenseExportTests(TestCase):
+    """Exports hold the rows the changelist shows for the same query string, or the selected ones among them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        crop = create_crop(create_field(create_farm(cls.owner)))
+        create_expense(crop, 10, notes='seed')
+        create_expense(crop, 20, expense_type=Expense.FERTILIZER, notes='urea')
+        create_expense(crop, 30, expense_type=Expense.FERTILIZER, notes='dap')
+        neighbour_crop = create_crop(create_field(create_farm(create_owner('neighbour'))))
+        cls.neighbour_expense = create_expense(neighbour_crop, 40, expense_type=Expense.FERTILIZER)
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def amounts(self, response):
+        self.assertEqual(response.status_code, 200)
+        lines = io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))
+        header, *rows = csv.reader(lines)
+        return sorted(int(float(row[header.index('Amount')])) for row in rows)
+
+    def export(self, params=None):
+        return self.client.get(reverse('admin:farms_expense_export', args=['csv']), params or {})
+
+    def test_export_is_scoped_to_the_owner(self):
+        self.assertEqual(self.amounts(self.export()), [10, 20, 30])
+
+    def test_export_applies_the_changelist_filters_and_search(self):
+        self.assertEqual(self.amounts(self.export({'expense_type__exact': Expense.FERTILIZER})), [20, 30])
+        self.assertEqual(self.amounts(self.export({'expense_type__exact': Expense.FERTILIZER, 'q': 'urea'})), [20])
+
+    def test_selected_rows_of_other_owners_are_not_exported(self):
+        selected = list(Expense.objects.filter(amount__in=[10, 20]).values_list('pk', flat=True))
+        response = self.client.post(reverse('admin:farms_expense_changelist'), {
+            'action': 'export_as_csv',
+            '_selected_action': selected + [self.neighbour_expense.pk],
+        })
+        self.assertEqual(self.amounts(response), [10, 20])
+
+    def test_unknown_format_is_not_found(self):
+        response = self.client.get(reverse('admin:farms_expense_export', args=['pdf']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,58 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.farms.admin import FieldFilter
+from apps.farms.models import Field
+from apps.farms.tests.factories import create_crop, create_farm, create_field, create_owner
+from farm_management_system.filters import CachedRelatedFieldListFilter
+
+
+class CachedFilterChoicesTests(TestCase):
+    """The field filter of the crop changelist reads its choices from the cache until they expire."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        farm = create_farm(cls.owner)
+        cls.field = create_field(farm, name='North')
+        create_crop(cls.field)
+        create_crop(create_field(farm, name='West'))
+        create_crop(create_field(create_farm(create_owner('neighbour')), name='Neighbour'))
+
+    def setUp(self):
+        # Choices are cached per user, whose pk other tests reuse.
+        cache.clear()
+        self.client.force_login(self.owner)
+
+    def field_choices(self):
+        """The labels of the field filter, and whether rendering the changelist read them from the table."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:farms_crop_changelist'))
+        spec = next(spec for spec in response.context['cl'].filter_specs if isinstance(spec, FieldFilter))
+        read = any(query['sql'].startswith('SELECT') and 'FROM "farms_field"' in query['sql'] for query in queries)
+        return sorted(label for pk, label in spec.lookup_choices), read
+
+    def test_choices_are_scoped_to_the_owner_and_cached(self):
+        self.assertEqual(self.field_choices(), (['North', 'West'], True))
+        self.assertEqual(self.field_choices(), (['North', 'West'], False))
+
+    def test_saving_a_field_expires_the_choices(self):
+        self.field_choices()
+        self.field.name = 'South'
+        self.field.save()
+        self.assertEqual(self.field_choices(), (['South', 'West'], True))
+
+    def test_choices_expire_after_their_timeout(self):
+        self.field_choices()
+        # update() sends no signal, the cached choices are only replaced once they expire.
+        Field.objects.filter(pk=self.field.pk).update(name='South')
+        self.assertEqual(self.field_choices(), (['North', 'West'], False))
+        expired = time.time() + CachedRelatedFieldListFilter.choices_timeout + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=expired):
+            self.assertEqual(self.field_choices(), (['South', 'West'], True))
@@ -0,0 +1,85 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import NoReverseMatch, reverse
+
+from apps.farms.imports import ExpenseImporter
+from apps.farms.models import CropSummary, Expense
+from apps.farms.tests.factories import create_crop, create_farm, create_field, create_owner
+
+HEADER = 'crop,expense_type,amount,expense_date,notes,spent_by\n'
+
+
+class ExpenseImporterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        cls.crop = create_crop(create_field(create_farm(cls.owner)))
+        cls.neighbour = create_owner('neighbour')
+        cls.foreign_crop = create_crop(create_field(create_farm(cls.neighbour)))
+
+    def run_import(self, rows, dry_run=False):
+        return ExpenseImporter(self.owner, dry_run=dry_run).run((HEADER + rows).splitlines(keepends=True))
+
+    def test_empty_notes_are_imported_as_null(self):
+        importer = self.run_import(f'{self.crop.pk},1,100,2020-05-01,,owner\n')
+        self.assertEqual(importer.errors, [])
+        self.assertIsNone(Expense.objects.get(crop=self.crop).notes)
+        self.assertEqual(CropSummary.objects.get(crop=self.crop).total_expense, 100)
+
+    def test_errors_carry_the_line_of_their_row(self):
+        importer = self.run_import(
+            f'{self.crop.pk},1,100,2020-05-01,,owner\n'
+            f'{self.crop.pk},1,lots,2020-05-01,,owner\n'
+            f'{self.crop.pk},1,100,2020-05-01,,owner\n'
+            f'{self.crop.pk},1,100,someday,,owner\n')
+        self.assertEqual([(line, column) for line, column, message in importer.errors],
+                         [(3, 'amount'), (5, 'expense_date')])
+        self.assertEqual(importer.imported, 2)
+        self.assertEqual(Expense.objects.filter(crop=self.crop).count(), 2)
+
+    def test_unknown_expense_type_is_rejected(self):
+        importer = self.run_import(f'{self.crop.pk},Tractor,100,2020-05-01,,owner\n')
+        self.assertEqual([(line, column) for line, column, message in importer.errors], [(2, 'expense_type')])
+        self.assertFalse(Expense.objects.exists())
+
+    def test_crops_of_other_owners_are_rejected(self):
+        importer = self.run_import(f'{self.foreign_crop.pk},1,100,2020-05-01,,owner\n')
+        self.assertEqual([(line, column) for line, column, message in importer.errors], [(2, 'crop')])
+        self.assertFalse(Expense.objects.exists())
+
+    def test_dry_run_writes_nothing(self):
+        # Only the crop and user lookups are read.
+        with self.assertNumQueries(2):
+            importer = self.run_import(f'{self.crop.pk},1,100,2020-05-01,,owner\n', dry_run=True)
+        self.assertEqual((importer.imported, importer.errors), (1, []))
+        self.assertFalse(Expense.objects.exists())
+        self.assertEqual(CropSummary.objects.get(crop=self.crop).total_expense, 0)
+
+    def test_every_listed_code_and_label_is_accepted(self):
+        choices = ExpenseImporter.column_choices['expense_type']
+        self.assertEqual(choices, Expense.EXPENSE_TYPE_CHOICES)
+        rows = ''.join(f'{self.crop.pk},{value},10,2020-05-01,,owner\n'
+                       for code, label in choices for value in (code, str(label).upper()))
+        importer = self.run_import(rows)
+        self.assertEqual(importer.errors, [])
+        self.assertEqual(
+            sorted(Expense.objects.values_list('expense_type', flat=True)),
+            sorted(code for code, label in choices for value in range(2)))
+
+    def test_upload_page_lists_the_expense_types(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('admin:farms_expense_import'))
+        for code, label in Expense.EXPENSE_TYPE_CHOICES:
+            self.assertContains(response, f'<code>{code}</code> {label}')
+
+    def test_upload_imports_the_file(self):
+        self.client.force_login(self.owner)
+        upload = SimpleUploadedFile('expenses.csv', (HEADER + f'{self.crop.pk},1,100,2020-05-01,,owner\n').encode())
+        response = self.client.post(reverse('admin:farms_expense_import'), {'file': upload})
+        self.assertRedirects(response, reverse('admin:farms_expense_changelist'), fetch_redirect_response=False)
+        self.assertEqual(CropSummary.objects.get(crop=self.crop).total_expense, 100)
+
+    def test_admins_without_an_importer_have_no_upload_page(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse('admin:farms_crop_import')
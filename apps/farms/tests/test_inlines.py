@@ -0,0 +1,69 @@
+import datetime
+
+from django.contrib import admin
+from django.test import RequestFactory, TestCase
+
+from apps.farms.admin import ExpenseInlineAdmin
+from apps.farms.models import Crop, Expense
+from apps.farms.tests.factories import create_crop, create_expense, create_farm, create_field, create_owner
+
+
+class PaginatedInlineTests(TestCase):
+    """The expense inline of a crop shows one page of its rows and only accepts the rows of that crop."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        field = create_field(create_farm(cls.owner), total_acres=20)
+        cls.crop = create_crop(field)
+        for day in range(1, 6):
+            create_expense(cls.crop, day * 10, expense_date=datetime.date(2020, 5, day))
+        cls.other_crop_expense = create_expense(create_crop(field), 60)
+        cls.foreign_expense = create_expense(create_crop(create_field(create_farm(create_owner('neighbour')))), 70)
+
+    def formset(self, data=None, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.owner
+        inline = ExpenseInlineAdmin(Crop, admin.site)
+        inline.per_page = 2
+        return inline.get_formset(request, self.crop)(data, instance=self.crop, prefix='expenses')
+
+    def submitted(self, expense, amount):
+        """The data of a page submitting expense with a new amount."""
+        return {
+            'expenses-TOTAL_FORMS': '1',
+            'expenses-INITIAL_FORMS': '1',
+            'expenses-MIN_NUM_FORMS': '0',
+            'expenses-MAX_NUM_FORMS': '1000',
+            'expenses-0-id': str(expense.pk),
+            'expenses-0-crop': str(self.crop.pk),
+            'expenses-0-expense_type': expense.expense_type,
+            'expenses-0-amount': str(amount),
+            'expenses-0-expense_date': '2020-05-01',
+            'expenses-0-spent_by': str(self.owner.pk),
+            'expenses-0-added_by': str(self.owner.pk),
+        }
+
+    def test_pages_in_the_inline_ordering(self):
+        formset = self.formset(**{'expenses-page': '2'})
+        self.assertEqual((formset.page, formset.page_count), (2, 3))
+        self.assertEqual([form.instance.amount for form in formset.forms], [30, 20])
+        self.assertIn('expenses-page=1', formset.previous_url)
+        self.assertIn('expenses-page=3', formset.next_url)
+
+    def test_submitted_row_of_the_crop_is_saved(self):
+        expense = self.crop.crop_expenses.get(amount=30)
+        formset = self.formset(self.submitted(expense, 35))
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+        expense.refresh_from_db()
+        self.assertEqual(expense.amount, 35)
+
+    def test_rows_of_other_crops_are_rejected(self):
+        for expense in (self.other_crop_expense, self.foreign_expense):
+            formset = self.formset(self.submitted(expense, 1))
+            self.assertFalse(formset.is_valid())
+            self.assertEqual(formset.forms[0].errors.as_data()['id'][0].code, 'invalid_choice')
+        self.assertEqual(
+            sorted(Expense.objects.filter(pk__in=[self.other_crop_expense.pk, self.foreign_expense.pk])
+                   .values_list('amount', flat=True)), [60, 70])
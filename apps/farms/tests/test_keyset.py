@@ -0,0 +1,76 @@
+import datetime
+from unittest import mock
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.farms.models import Expense
+from apps.farms.tests.factories import create_crop, create_expense, create_farm, create_field, create_owner
+
+
+class KeysetChangeListTests(TestCase):
+    """The expense changelist pages on (expense_date, pk), newest first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        crop = create_crop(create_field(create_farm(cls.owner)))
+        # Several expenses share a date, the pk breaks the ties.
+        for amount, day in enumerate([5, 5, 5, 9, 9, 1, 1], 1):
+            create_expense(crop, amount, expense_date=datetime.date(2020, 5, day))
+        create_expense(create_crop(create_field(create_farm(create_owner('neighbour')))), 100)
+        cls.ordered = [
+            expense.amount for expense in
+            Expense.objects.filter(owner=cls.owner).order_by('-expense_date', '-pk')]
+
+    def setUp(self):
+        # Counts are cached per user, whose pk other tests reuse.
+        cache.clear()
+        self.client.force_login(self.owner)
+        patcher = mock.patch.object(admin.site._registry[Expense], 'list_per_page', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page(self, query_string=''):
+        response = self.client.get(reverse('admin:farms_expense_changelist') + query_string)
+        changelist = response.context['cl']
+        return [expense.amount for expense in changelist.result_list], changelist
+
+    def test_next_and_previous_links_walk_every_row_once(self):
+        pages = []
+        rows, changelist = self.page()
+        self.assertTrue(changelist.keyset)
+        self.assertFalse(changelist.previous_url)
+        pages.append(rows)
+        while changelist.next_url:
+            rows, changelist = self.page(changelist.next_url)
+            pages.append(rows)
+        self.assertEqual(sum(pages, []), self.ordered)
+        self.assertEqual([len(rows) for rows in pages], [3, 3, 1])
+        self.assertEqual(changelist.result_count, 7)
+
+        backwards = [pages[-1]]
+        while changelist.previous_url:
+            rows, changelist = self.page(changelist.previous_url)
+            backwards.append(rows)
+        self.assertEqual(backwards[::-1], pages)
+        self.assertFalse(changelist.previous_url)
+
+    def test_rows_sharing_a_date_are_split_across_pages_by_pk(self):
+        rows, changelist = self.page()
+        # The page ends inside the three expenses of May 5th, the next starts with the rest of them.
+        self.assertEqual(rows, [5, 4, 3])
+        rows, changelist = self.page(changelist.next_url)
+        self.assertEqual(rows, [2, 1, 7])
+
+    def test_sorted_column_falls_back_to_the_paginator(self):
+        rows, changelist = self.page('?o=3')
+        self.assertFalse(changelist.keyset)
+        self.assertEqual(rows, [1, 2, 3])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(reverse('admin:farms_expense_changelist'), {'after': 'x:y'})
+        self.assertRedirects(
+            response, reverse('admin:farms_expense_changelist') + '?e=1', fetch_redirect_response=False)
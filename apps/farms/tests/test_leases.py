@@ -0,0 +1,52 @@
+import datetime
+
+from django.test import TestCase
+
+from apps.farms.leases import accrue
+from apps.farms.models import CropSummary, Expense, ExpenseDaily, ExpenseMonthly
+from apps.farms.tests.factories import create_crop, create_farm, create_field, create_owner
+
+
+class LeaseAccrualTests(TestCase):
+    """Accruing books one Lease expense per crop and month, and running it again books nothing twice."""
+
+    @classmethod
+    def setUpTestData(cls):
+        field = create_field(
+            create_farm(create_owner('owner')), name='North', total_acres=10, is_own_property=False,
+            lease_per_acre=365, lease_start=datetime.date(2020, 1, 1))
+        # A rupee per acre and day.
+        cls.crop = create_crop(field, date_sowing=datetime.date(2020, 4, 1), total_acres=5)
+
+    def booked(self):
+        return list(Expense.objects.filter(expense_type=Expense.LEASE).order_by('lease_period').values_list(
+            'lease_period', 'amount', 'notes'))
+
+    def assertNoDrift(self):
+        self.assertEqual(CropSummary.objects.drift(), [])
+        for model in (ExpenseDaily, ExpenseMonthly):
+            self.assertEqual(model.objects.drift(), ([], []))
+
+    def test_months_are_booked_once(self):
+        expenses = accrue(datetime.date(2020, 4, 1), datetime.date(2020, 6, 30))
+        self.assertEqual(len(expenses), 3)
+        booked = self.booked()
+        self.assertEqual(booked, [
+            (datetime.date(2020, 4, 1), 150, 'Lease of North for 2020-04'),
+            (datetime.date(2020, 5, 1), 155, 'Lease of North for 2020-05'),
+            (datetime.date(2020, 6, 1), 150, 'Lease of North for 2020-06'),
+        ])
+        total = CropSummary.objects.get(crop=self.crop).total_expense
+        self.assertEqual(total, 455)
+
+        self.assertEqual(accrue(datetime.date(2020, 4, 1), datetime.date(2020, 6, 30)), [])
+        self.assertEqual(self.booked(), booked)
+        self.assertEqual(CropSummary.objects.get(crop=self.crop).total_expense, total)
+        self.assertNoDrift()
+
+    def test_overlapping_run_only_books_the_new_months(self):
+        accrue(datetime.date(2020, 4, 1), datetime.date(2020, 5, 31))
+        expenses = accrue(datetime.date(2020, 5, 1), datetime.date(2020, 6, 30))
+        self.assertEqual([expense.lease_period for expense in expenses], [datetime.date(2020, 6, 1)])
+        self.assertEqual(CropSummary.objects.get(crop=self.crop).total_expense, 455)
+        self.assertNoDrift()
@@ -0,0 +1,136 @@
+import datetime
+
+from django.contrib import admin
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.utils.timezone import now
+
+from apps.farms.models import Crop, CropSummary, CropType, Expense, Farm, FarmAsset, Field, Output, SeasonCube
+from apps.farms.tests.factories import (
+    create_crop, create_entry, create_expense, create_farm, create_field, create_ledger, create_output,
+    create_owner,
+)
+from apps.ledgers.models import Ledger, LedgerEntries
+from apps.users.models import User
+from farm_management_system.query_checks import (
+    admin_request, changelist_plans, changelist_query_strings, plan_issues)
+
+LARGE_TABLES = {model._meta.db_table for model in (Crop, Expense, Output, LedgerEntries)}
+
+
+class ChangelistPlanTests(TestCase):
+    """
+    Every registered changelist, bare and with each choice of its list filters, as a superuser
+    and as an owner, reads the large tables through indexes and sorts none of their rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create(username='admin', is_superuser=True, is_staff=True)
+        cls.owner = create_owner('owner')
+        for owner in (cls.owner, create_owner('neighbour')):
+            farm = create_farm(owner)
+            FarmAsset.objects.create(
+                farm=farm, name='Tractor', date_purchased=datetime.date(2019, 1, 1), is_bought_new=True,
+                purchase_cost=1500000)
+            ledger = create_ledger(farm)
+            for number in range(2):
+                field = create_field(farm, name=f'Field {number}')
+                crop = create_crop(field, date_sowing=datetime.date(2020, 4, 1 + number))
+                create_expense(crop, 1000, expense_type=Expense.FERTILIZER)
+                create_output(crop, 20, 3000)
+                create_entry(ledger, 500, type=LedgerEntries.CREDIT)
+        cls.fill_large_tables(create_owner('filler'))
+        SeasonCube.objects.refresh(full=True)
+
+    @staticmethod
+    def fill_large_tables(owner, rows=2000):
+        """
+        Bulk insert rows of another owner into the large tables. Without statistics SQLite sizes a
+        table by its pages, and plans queries on a handful of rows as it never would on a real one.
+        """
+        farm = create_farm(owner)
+        field = create_field(farm)
+        crop = create_crop(field)
+        Crop.objects.bulk_create([
+            Crop(field=field, crop_type=crop.crop_type, season=crop.season, breed=crop.breed, total_acres=1,
+                 date_sowing=crop.date_sowing - datetime.timedelta(days=number), owner=owner)
+            for number in range(rows)
+        ])
+        crop_ids = list(Crop.objects.filter(owner=owner, summary__isnull=True).values_list('pk', flat=True))
+        CropSummary.objects.bulk_create([
+            CropSummary(crop_id=crop_id, net_profit=number % 3 - 1) for number, crop_id in enumerate(crop_ids)])
+        Expense.objects.bulk_create([
+            Expense(crop_id=crop_id, expense_type=Expense.SEED, expense_date=crop.date_sowing, amount=100,
+                    spent_by=owner, added_by=owner, owner=owner, farm=farm)
+            for crop_id in crop_ids for number in range(2)
+        ])
+        Output.objects.bulk_create([
+            Output(crop_id=crop_id, total_mann=10, rate_per_mann=2000, sold_date=crop.date_sowing, owner=owner,
+                   farm=farm, field=field)
+            for crop_id in crop_ids
+        ])
+        ledger = create_ledger(farm)
+        LedgerEntries.objects.bulk_create([
+            LedgerEntries(ledger=ledger, type=LedgerEntries.DEBIT, amount=100, transaction_date=now())
+            for number in range(rows)
+        ])
+
+    def assertIndexedPlans(self, model):
+        model_admin = admin.site._registry[model]
+        for user in (self.superuser, self.owner):
+            if not model_admin.has_change_permission(admin_request(user)):
+                continue
+            for query_string in changelist_query_strings(model_admin, user, every_choice=True):
+                for sql, plan in changelist_plans(model_admin, user, query_string):
+                    with self.subTest(user=user.username, query_string=query_string, sql=sql):
+                        self.assertEqual(plan_issues(plan, LARGE_TABLES), [], '\n'.join(plan))
+
+    def test_every_registered_admin_is_checked(self):
+        checked = {
+            Farm, CropType, Field, Crop, FarmAsset, Expense, Output, SeasonCube, Ledger, LedgerEntries, User, Group,
+        }
+        self.assertEqual(set(admin.site._registry), checked)
+
+    def test_farms(self):
+        self.assertIndexedPlans(Farm)
+
+    def test_crop_types(self):
+        self.assertIndexedPlans(CropType)
+
+    def test_fields(self):
+        self.assertIndexedPlans(Field)
+
+    def test_crops(self):
+        self.assertIndexedPlans(Crop)
+
+    def test_farm_assets(self):
+        self.assertIndexedPlans(FarmAsset)
+
+    def test_expenses(self):
+        self.assertIndexedPlans(Expense)
+
+    def test_outputs(self):
+        self.assertIndexedPlans(Output)
+
+    def test_season_cube(self):
+        self.assertIndexedPlans(SeasonCube)
+
+    def test_ledgers(self):
+        self.assertIndexedPlans(Ledger)
+
+    def test_ledger_entries(self):
+        self.assertIndexedPlans(LedgerEntries)
+
+    def test_owners(self):
+        self.assertIndexedPlans(User)
+
+    def test_groups(self):
+        self.assertIndexedPlans(Group)
+
+    def test_issues_name_full_scans_and_sorts_of_large_tables(self):
+        plan = ['SCAN farms_expense', 'SEARCH farms_crop USING INTEGER PRIMARY KEY (rowid=?)',
+                'USE TEMP B-TREE FOR ORDER BY']
+        self.assertEqual(
+            plan_issues(plan, LARGE_TABLES), ['full scan of farms_expense', 'temporary B-tree for ORDER BY'])
+        self.assertEqual(plan_issues(['SCAN farms_farm', 'USE TEMP B-TREE FOR ORDER BY'], LARGE_TABLES), [])
@@ -0,0 +1,55 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.farms.models import Expense
+from apps.farms.tests.factories import create_crop, create_expense, create_farm, create_field, create_owner
+from farm_management_system.search import full_text_indexes, match_query
+
+
+class NotesSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        crop = create_crop(create_field(create_farm(cls.owner)))
+        for amount, notes in [
+            (1, 'urea bought at the market with the diesel for the tractor and the pump'),
+            (2, 'یوریا urea urea'),
+            (3, 'diesel'),
+            (4, None),
+            (5, 'two bags of urea'),
+        ]:
+            create_expense(crop, amount, notes=notes)
+        neighbour = create_owner('neighbour')
+        create_expense(create_crop(create_field(create_farm(neighbour))), 6, notes='urea')
+
+    def search(self, term, **params):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('admin:farms_expense_changelist'), dict(params, q=term))
+        return [expense.amount for expense in response.context['cl'].result_list]
+
+    def test_matching_notes_are_ranked(self):
+        # The most frequent and the shortest notes rank first.
+        self.assertEqual(self.search('urea'), [2, 5, 1])
+
+    def test_words_are_prefixes_and_all_required(self):
+        self.assertEqual(self.search('ure dies'), [1])
+        self.assertEqual(self.search('یوری'), [2])
+
+    def test_sorted_column_overrides_the_rank(self):
+        self.assertEqual(self.search('urea', o='3'), [1, 2, 5])
+
+    def test_rows_are_ranked_by_one_match(self):
+        index = full_text_indexes(Expense)['notes']
+        ranked = Expense.objects.filter(owner=self.owner).annotate(
+            search_rank=index.rank(match_query('urea'))).order_by('search_rank')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual([expense.amount for expense in ranked][:3], [2, 5, 1])
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {queries[0]["sql"]}')
+                plan = [row[-1] for row in cursor.fetchall()]
+        if connection.Database.sqlite_version_info >= (3, 35):
+            self.assertIn('MATERIALIZE ranked', plan)
+        self.assertEqual(sum(line.startswith('SCAN farms_expense_notes_fts') for line in plan), 1)
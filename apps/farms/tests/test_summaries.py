@@ -0,0 +1,144 @@
+import datetime
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from apps.farms.models import CropSummary, Expense, ExpenseDaily, ExpenseMonthly, ExpenseRollupManager
+from apps.farms.tests.factories import (
+    create_crop, create_expense, create_farm, create_field, create_output, create_owner,
+)
+
+
+class CropSummaryDeltaTests(TestCase):
+    """Saving or deleting an expense or output takes its stored row out of the totals and adds the new one."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = create_owner('owner')
+        field = create_field(create_farm(owner), total_acres=20)
+        cls.crop = create_crop(field, breed='first')
+        cls.other_crop = create_crop(field, breed='second')
+        create_output(cls.crop, 10, 50, sold_date=datetime.date(2020, 9, 1))
+
+    def setUp(self):
+        self.expense = create_expense(self.crop, 100, expense_date=datetime.date(2020, 10, 1))
+
+    def assertSummary(self, crop, total_expense, expense_count, last_activity_date):
+        summary = CropSummary.objects.get(crop=crop)
+        self.assertEqual(
+            (summary.total_expense, summary.expense_count, summary.last_activity_date),
+            (total_expense, expense_count, last_activity_date))
+        self.assertEqual(summary.net_profit, summary.total_output - total_expense)
+        self.assertEqual(summary.expense_per_acre, total_expense / crop.total_acres)
+
+    def assertNoDrift(self):
+        self.assertEqual(CropSummary.objects.drift(), [])
+        for model in (ExpenseDaily, ExpenseMonthly):
+            self.assertEqual(model.objects.drift(), ([], []))
+
+    def test_new_expense(self):
+        self.assertSummary(self.crop, 100, 1, datetime.date(2020, 10, 1))
+        self.assertNoDrift()
+
+    def test_expense_moved_to_another_crop(self):
+        self.expense.crop = self.other_crop
+        self.expense.save()
+        # The moved crop's last activity falls back to its output.
+        self.assertSummary(self.crop, 0, 0, datetime.date(2020, 9, 1))
+        self.assertSummary(self.other_crop, 100, 1, datetime.date(2020, 10, 1))
+        self.assertNoDrift()
+
+    def test_changed_amount_type_and_date(self):
+        self.expense.amount = 250
+        self.expense.expense_type = Expense.FERTILIZER
+        self.expense.expense_date = datetime.date(2020, 8, 1)
+        self.expense.save()
+        self.assertSummary(self.crop, 250, 1, datetime.date(2020, 9, 1))
+        self.assertEqual(
+            list(ExpenseMonthly.objects.filter(crop=self.crop).values_list('expense_type', 'date', 'amount')),
+            [(Expense.FERTILIZER, datetime.date(2020, 8, 1), 250)])
+        self.assertNoDrift()
+
+    def test_unchanged_save(self):
+        self.expense.save()
+        self.assertSummary(self.crop, 100, 1, datetime.date(2020, 10, 1))
+        self.assertNoDrift()
+
+    def test_delete(self):
+        self.expense.delete()
+        self.assertSummary(self.crop, 0, 0, datetime.date(2020, 9, 1))
+        self.assertFalse(ExpenseDaily.objects.filter(farm=self.crop.field.farm_id).exists())
+        self.assertNoDrift()
+
+    def test_changed_output(self):
+        output = self.crop.crop_outputs.get()
+        output.rate_per_mann = 60
+        output.save()
+        self.assertEqual(CropSummary.objects.get(crop=self.crop).total_output, 600)
+        output.delete()
+        self.assertEqual(CropSummary.objects.get(crop=self.crop).total_output, 0)
+        self.assertNoDrift()
+
+
+class ExpenseRollupFarmTotalTests(TestCase):
+    """The expense rollups keep one farm totals row per farm and period, also when expenses move between farms."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = create_owner('owner')
+        cls.farm = create_farm(owner, name='Home')
+        cls.other_farm = create_farm(owner, name='Away')
+        cls.field = create_field(cls.farm)
+        cls.crop = create_crop(cls.field)
+        cls.other_crop = create_crop(create_field(cls.other_farm))
+        create_expense(cls.crop, 100, expense_date=datetime.date(2020, 5, 1))
+        cls.expense = create_expense(cls.crop, 50, expense_date=datetime.date(2020, 5, 1))
+
+    def farm_totals(self, model):
+        return list(model.objects.filter(expense_type='').order_by('farm_id').values_list(
+            'farm_id', 'date', 'amount', 'expenses'))
+
+    def assertFarmTotals(self, daily, monthly):
+        self.assertEqual(self.farm_totals(ExpenseDaily), daily)
+        self.assertEqual(self.farm_totals(ExpenseMonthly), monthly)
+        for model in (ExpenseDaily, ExpenseMonthly):
+            self.assertEqual(model.objects.drift(), ([], []))
+
+    def test_expense_moved_to_a_crop_of_another_farm(self):
+        self.expense.crop = self.other_crop
+        self.expense.save()
+        day = datetime.date(2020, 5, 1)
+        totals = [(self.farm.pk, day, 100, 1), (self.other_farm.pk, day, 50, 1)]
+        self.assertFarmTotals(totals, totals)
+
+    def test_field_moved_to_another_farm(self):
+        self.field.farm = self.other_farm
+        self.field.save()
+        self.assertFarmTotals(
+            [(self.other_farm.pk, datetime.date(2020, 5, 1), 150, 2)],
+            [(self.other_farm.pk, datetime.date(2020, 5, 1), 150, 2)])
+
+    def test_second_totals_row_of_a_farm_and_period_is_refused(self):
+        row = ExpenseDaily.objects.get(expense_type='')
+        row.pk = None
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            row.save()
+
+    def test_rows_created_since_they_were_read_are_added_to(self):
+        existing_rows = ExpenseRollupManager.existing_rows
+        stale = set()
+
+        def read(manager, deltas):
+            # The first read of each rollup misses the rows, as if another apply() created them after it.
+            if manager.model not in stale:
+                stale.add(manager.model)
+                return {}
+            return existing_rows(manager, deltas)
+
+        with mock.patch.object(ExpenseRollupManager, 'existing_rows', autospec=True, side_effect=read):
+            create_expense(self.crop, 25, expense_date=datetime.date(2020, 5, 1))
+        self.assertEqual(stale, {ExpenseDaily, ExpenseMonthly})
+        self.assertFarmTotals(
+            [(self.farm.pk, datetime.date(2020, 5, 1), 175, 3)],
+            [(self.farm.pk, datetime.date(2020, 5, 1), 175, 3)])
@@ -1,20 +1,42 @@
+import datetime
+
 from django.contrib import admin
-from django.db.models import OuterRef, Sum, Subquery, IntegerField, F
-from django.db.models.functions import Coalesce
-from django.urls import reverse
+from django.contrib.admin.utils import unquote
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
-from apps.ledgers.models import Ledger, LedgerEntries
+from apps.farms.models import Farm
+from apps.ledgers.models import Ledger, LedgerEntries, LedgerEntryDateBucket, entries_from
 
 
+from farm_management_system.actions import BulkUpdateMixin
 from farm_management_system.admin import ReadOnlyModelAdmin
+from farm_management_system.autocomplete import AutocompleteMixin
+from farm_management_system.date_buckets import DateBucketMixin
+from farm_management_system.exports import ExportMixin
+from farm_management_system.inlines import PaginatedInline
+from farm_management_system.keyset import KeysetChangeList, KeysetMixin
+from farm_management_system.search import FullTextSearchMixin
+
+
+def balance_html(balance):
+    color = 'red' if balance < 0 else 'green'
+    balance = "{:.2f}".format(balance)
+    return mark_safe(f'<span style="color: {color};">{balance}</span>')
 
 
 class BalanceFilter(admin.SimpleListFilter):
     title = _('By Balance')
     parameter_name = 'balance'
+    # The balances are float sums, so ledgers within half a paisa of zero count as balanced.
+    tolerance = 0.005
 
     def lookups(self, request, model_admin):
         return (
@@ -27,11 +49,11 @@ class BalanceFilter(admin.SimpleListFilter):
         """Return the filtered queryset"""
 
         if self.value() == 'debt':
-            return queryset.filter(total_debt__gt=F('total_credit'))
+            return queryset.filter(net_balance__lte=-self.tolerance)
         elif self.value() == 'credit':
-            return queryset.filter(total_debt__lt=F('total_credit'))
+            return queryset.filter(net_balance__gte=self.tolerance)
         elif self.value() == 'balanced':
-            return queryset.filter(total_debt=F('total_credit'))
+            return queryset.filter(net_balance__gt=-self.tolerance, net_balance__lt=self.tolerance)
         else:
             return queryset
 #
@@ -76,50 +98,150 @@ class BalanceFilter(admin.SimpleListFilter):
 #
 
 
-class LedgersEntriesInline(admin.TabularInline):
+class RunningBalanceChangeList(KeysetChangeList):
+    """Sets the running balance of its ledger on every entry of a page listed in date order."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        if self.keyset:
+            balances = Ledger.objects.running_balances(self.result_list)
+            for obj in self.result_list:
+                obj.running_balance = balances.get(obj.pk)
+
+
+class LedgersEntriesInline(PaginatedInline):
     model = LedgerEntries
     extra = 0
+    ordering = ('-transaction_date', '-pk')
 
     class Meta:
         pass
 
 
-class LedgerAdmin(ReadOnlyModelAdmin):
+class LedgerAdmin(AutocompleteMixin, BulkUpdateMixin, FullTextSearchMixin, ReadOnlyModelAdmin):
     list_display = ['id', 'name', 'description', 'location', 'is_active', '_total_debt', '_total_credit',
                     '_net_balance']
 
     list_filter = ['name', BalanceFilter]
 
+    search_fields = ['^name', '@description']
+
+    autocomplete_fields = ['farm']
+
     inlines = [LedgersEntriesInline]
 
+    actions = ['close_ledgers', 'reopen_ledgers']
+    # Balances and checkpoints are only built from the entries.
+    bulk_update_fields = ['is_active']
+
+    statement_per_page = 100
+
     class Meta:
         model = Ledger
 
+    def close_ledgers(self, request, queryset):
+        self.update_rows(request, queryset.filter(is_active=True), is_active=False)
+
+    close_ledgers.short_description = _('Close selected ledgers')
+
+    def reopen_ledgers(self, request, queryset):
+        self.update_rows(request, queryset.filter(is_active=False), is_active=True)
+
+    reopen_ledgers.short_description = _('Reopen selected ledgers')
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('<path:object_id>/statement/', self.admin_site.admin_view(self.statement_view),
+                 name='%s_%s_statement' % info),
+        ] + super().get_urls()
+
+    def statement_view(self, request, object_id):
+        """
+        The entries of a ledger oldest first between two optional dates, with the balance after
+        each. Pages follow a cursor and their opening balance comes from Ledger.objects.balances_before(),
+        so no page sums the entries before it.
+        """
+        ledger = self.get_object(request, unquote(object_id))
+        if ledger is None:
+            raise Http404
+        if not self.has_change_permission(request, ledger):
+            raise PermissionDenied
+
+        dates = {}
+        for name in ('start', 'end'):
+            try:
+                dates[name] = parse_date(request.GET.get(name, ''))
+            except ValueError:
+                dates[name] = None
+        entries = LedgerEntries.objects.filter(ledger=ledger)
+        if dates['start']:
+            start = timezone.make_aware(datetime.datetime.combine(dates['start'], datetime.time.min))
+            entries = entries.filter(transaction_date__gte=start)
+        end = timezone.now()
+        if dates['end']:
+            end = timezone.make_aware(datetime.datetime.combine(dates['end'] + datetime.timedelta(days=1),
+                                                                datetime.time.min))
+            entries = entries.filter(transaction_date__lt=end)
+        try:
+            pk, transaction_date = request.GET.get('after', '').split(':', 1)
+            after = (parse_datetime(transaction_date), int(pk))
+        except ValueError:
+            after = None
+        if after and after[0]:
+            entries = entries.filter(entries_from(after[0], after[1] + 1))
+
+        rows = list(entries.order_by('transaction_date', 'pk')[:self.statement_per_page + 1])
+        query = request.GET.copy()
+        query.pop('after', None)
+        first_url = '?' + query.urlencode() if after else None
+        next_url = None
+        if len(rows) > self.statement_per_page:
+            rows = rows[:self.statement_per_page]
+            query['after'] = f'{rows[-1].pk}:{rows[-1].transaction_date.isoformat()}'
+            next_url = '?' + query.urlencode()
+
+        # Without entries left in the period its closing balance is also the opening one.
+        point = (rows[0].transaction_date, rows[0].pk) if rows else (end, 0)
+        balance = opening = Ledger.objects.balances_before({ledger.pk: point})[ledger.pk]
+        lines = []
+        for entry in rows:
+            balance += entry.amount if entry.type == LedgerEntries.CREDIT else -entry.amount
+            lines.append((entry, balance))
+
+        opts = self.model._meta
+        context = dict(
+            self.admin_site.each_context(request),
+            title=_('Statement of %s') % ledger,
+            opts=opts,
+            original=ledger,
+            start=request.GET.get('start', ''),
+            end=request.GET.get('end', ''),
+            opening=opening,
+            closing=balance,
+            lines=lines,
+            first_url=first_url,
+            next_url=next_url,
+        )
+        return TemplateResponse(request, 'admin/ledger_statement.html', context)
+
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         if not request.user.is_superuser:
             queryset = queryset.filter(farm__owner=request.user)
-
-        total_debt = Ledger.objects.filter(pk=OuterRef('pk'), entries__type=LedgerEntries.DEBIT).annotate(
-            total_debt=Sum(
-                'entries__amount'
-            ))
-        total_credit = Ledger.objects.filter(pk=OuterRef('pk'), entries__type=LedgerEntries.CREDIT).annotate(
-            total_credit=Sum(
-                'entries__amount'
-            ))
-
-        queryset = queryset.annotate(
-            total_debt=Coalesce(Subquery(total_debt.values('total_debt'), output_field=IntegerField()), 0),
-            total_credit=Coalesce(Subquery(total_credit.values('total_credit'), output_field=IntegerField()), 0)
-        )
         return queryset
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'farm' and not request.user.is_superuser:
+            kwargs['queryset'] = Farm.objects.filter(owner=request.user)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     def _total_debt(self, obj):
         url = reverse(f'admin:ledgers_ledgerentries_changelist')
         url += f'?ledger__id__exact={obj.id}&type__exact={LedgerEntries.DEBIT}'
         return format_html('<a href="{}" target="_blank">{}</a>', url, obj.total_debt)
     _total_debt.short_description = _('Total Debt')
+    _total_debt.admin_order_field = 'total_debt'
 
     def _total_credit(self, obj):
         url = reverse(f'admin:ledgers_ledgerentries_changelist')
@@ -127,30 +249,56 @@ class LedgerAdmin(ReadOnlyModelAdmin):
         return format_html('<a href="{}" target="_blank">{}</a>', url, obj.total_credit)
 
     _total_credit.short_description = _("Total Credit")
+    _total_credit.admin_order_field = 'total_credit'
 
     def _net_balance(self, obj):
-        balance = obj.total_credit - obj.total_debt
-        color = 'red' if balance < 0 else 'green'
-        balance = "{:.2f}".format(balance)
-        return mark_safe(f'<span style="color: {color};">{balance}</span>')
+        return balance_html(obj.net_balance)
 
     _net_balance.short_description = _('Net Balance')
+    _net_balance.admin_order_field = 'net_balance'
 
 
-class LedgerEntriesAdmin(ReadOnlyModelAdmin):
-    list_display = ['id', 'ledger', 'type', 'amount', 'transaction_date', 'notes']
+class LedgerEntriesAdmin(DateBucketMixin, ExportMixin, FullTextSearchMixin, KeysetMixin, ReadOnlyModelAdmin):
+    list_display = ['id', 'ledger', 'type', 'amount', '_running_balance', 'transaction_date', 'notes']
 
     list_filter = ('ledger', 'type')
 
+    search_fields = ['@notes']
+
+    autocomplete_fields = ['ledger']
+
+    ordering = ('-transaction_date', )
+
+    keyset_field = 'transaction_date'
+    keyset_changelist = RunningBalanceChangeList
+
+    date_hierarchy = 'transaction_date'
+    date_buckets = LedgerEntryDateBucket.objects
+    date_bucket_filters = ('ledger__id__exact', )
+
+    export_columns = ['id', 'ledger', 'type', 'amount', 'transaction_date', 'notes']
+
     class Meta:
         model = LedgerEntries
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         if not request.user.is_superuser:
-            queryset = queryset.filter(ledger__farm__owner=request.user)
+            queryset = queryset.filter(owner=request.user)
         return queryset
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'ledger' and not request.user.is_superuser:
+            kwargs['queryset'] = Ledger.objects.filter(farm__owner=request.user)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def _running_balance(self, obj):
+        # Only set when the changelist is in date order.
+        balance = getattr(obj, 'running_balance', None)
+        return '-' if balance is None else balance_html(balance)
+
+    _running_balance.short_description = _('Balance')
+
 
 admin.site.register(Ledger, LedgerAdmin)
 admin.site.register(LedgerEntries, LedgerEntriesAdmin)
@@ -5,3 +5,6 @@ from django.utils.translation import ugettext_lazy as _
 class LedgerConfig(AppConfig):
     name = 'apps.ledgers'
     verbose_name = _("Ledgers")
+
+    def ready(self):
+        from apps.ledgers import signals  # noqa
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ledgers.models import Ledger
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored debt, credit and net balance of every ledger, or check them for drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true', help='Only report ledgers whose balances are out of date, do not rebuild.')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = Ledger.objects.drift()
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} ledger balances are out of date: {', '.join(map(str, drifted[:50]))}")
+            self.stdout.write(self.style.SUCCESS('All ledger balances are consistent.'))
+            return
+
+        Ledger.objects.refresh_balances()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the balances of {Ledger.objects.count()} ledgers.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.ledgers.models import LedgerCheckpoint
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the monthly balance checkpoints of every ledger, or only add those of the months closed since '
+            'the last run. Adding them is meant to run from cron early every month.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--extend', action='store_true', help='Only add the checkpoints of newly closed months, do not rebuild.')
+        parser.add_argument('--ledger', type=int, nargs='+', help='Ids of the ledgers to rebuild, all by default.')
+
+    def handle(self, *args, **options):
+        if options['extend']:
+            added = LedgerCheckpoint.objects.extend(options['ledger'])
+            self.stdout.write(self.style.SUCCESS(f'Added {added} ledger checkpoints.'))
+            return
+
+        built = LedgerCheckpoint.objects.rebuild(options['ledger'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {built} ledger checkpoints.'))
@@ -0,0 +1,42 @@
+# Generated by Django 2.0.13 on 2026-10-18 09:59
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def backfill_ledger_balances(apps, schema_editor):
+    Ledger = apps.get_model('ledgers', 'Ledger')
+    LedgerEntries = apps.get_model('ledgers', 'LedgerEntries')
+
+    totals = LedgerEntries.objects.values('ledger_id').annotate(
+        debt=Sum('amount', filter=Q(type=1)), credit=Sum('amount', filter=Q(type=2))).order_by()
+    for row in totals:
+        total_debt, total_credit = row['debt'] or 0, row['credit'] or 0
+        Ledger.objects.filter(pk=row['ledger_id']).update(
+            total_debt=total_debt, total_credit=total_credit, net_balance=total_credit - total_debt)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledgers', '0004_auto_20200727_2325'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledger',
+            name='net_balance',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Net Balance'),
+        ),
+        migrations.AddField(
+            model_name='ledger',
+            name='total_credit',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Total Credit'),
+        ),
+        migrations.AddField(
+            model_name='ledger',
+            name='total_debt',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Total Debt'),
+        ),
+        migrations.RunPython(backfill_ledger_balances, migrations.RunPython.noop),
+    ]
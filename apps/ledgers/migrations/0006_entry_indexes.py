@@ -0,0 +1,29 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledgers', '0005_ledger_balances'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledgerentries',
+            index=models.Index(fields=['ledger', 'type', 'transaction_date'], name='entry_ledger_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentries',
+            index=models.Index(fields=['ledger', 'transaction_date'], name='entry_ledger_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentries',
+            index=models.Index(fields=['type', 'transaction_date'], name='entry_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentries',
+            index=models.Index(fields=['transaction_date'], name='entry_date_idx'),
+        ),
+    ]
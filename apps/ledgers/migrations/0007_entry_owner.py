@@ -0,0 +1,21 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ledgers', '0006_entry_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledgerentries',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+    ]
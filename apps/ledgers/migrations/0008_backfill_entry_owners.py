@@ -0,0 +1,28 @@
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 10000
+
+
+def backfill_entry_owners(apps, schema_editor):
+    Ledger = apps.get_model('ledgers', 'Ledger')
+    LedgerEntries = apps.get_model('ledgers', 'LedgerEntries')
+
+    owner = Subquery(Ledger.objects.filter(pk=OuterRef('ledger_id')).values('farm__owner_id')[:1])
+    last_pk = LedgerEntries.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic():
+            LedgerEntries.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(owner_id=owner)
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own, the entries are not rewritten in one transaction.
+    atomic = False
+
+    dependencies = [
+        ('ledgers', '0007_entry_owner'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_entry_owners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledgers', '0008_backfill_entry_owners'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentries',
+            name='owner',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentries',
+            index=models.Index(fields=['owner', 'transaction_date'], name='entry_owner_date_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.0.13 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledgers', '0009_entry_owner_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ledgerentries',
+            name='entry_ledger_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentries',
+            index=models.Index(fields=['ledger', 'transaction_date', 'type', 'amount'], name='entry_ledger_balance_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledgers', '0010_entry_balance_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='The first day of the month.', verbose_name='Month')),
+                ('total_debt', models.FloatField(default=0, verbose_name='Total Debt')),
+                ('total_credit', models.FloatField(default=0, verbose_name='Total Credit')),
+                ('ledger', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='ledgers.Ledger', verbose_name='Ledger')),
+            ],
+            options={
+                'verbose_name': 'Ledger checkpoint',
+                'verbose_name_plural': 'Ledger checkpoints',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='ledgercheckpoint',
+            unique_together={('ledger', 'month')},
+        ),
+    ]
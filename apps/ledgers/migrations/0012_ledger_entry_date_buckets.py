@@ -0,0 +1,56 @@
+# Generated by Django 2.0.13 on 2026-10-18 11:11
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def backfill_buckets(apps, schema_editor):
+    LedgerEntries = apps.get_model('ledgers', 'LedgerEntries')
+    LedgerEntryDateBucket = apps.get_model('ledgers', 'LedgerEntryDateBucket')
+    LedgerEntryDateBucket.objects.bulk_create(
+        LedgerEntryDateBucket(ledger_id=row['ledger_id'], owner_id=row['owner_id'], date=row['day'],
+                              records=row['count'])
+        for row in LedgerEntries.objects.annotate(day=TruncDate('transaction_date')).values(
+            'ledger_id', 'owner_id', 'day').annotate(count=Count('pk')).order_by().iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ledgers', '0011_ledger_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntryDateBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('records', models.PositiveIntegerField(default=0, verbose_name='Records')),
+                ('ledger', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ledgers.Ledger', verbose_name='Ledger')),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+            ],
+            options={
+                'verbose_name': 'Ledger entry date',
+                'verbose_name_plural': 'Ledger entry dates',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentrydatebucket',
+            index=models.Index(fields=['owner', 'date'], name='entry_bucket_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentrydatebucket',
+            index=models.Index(fields=['date'], name='entry_bucket_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='ledgerentrydatebucket',
+            unique_together={('ledger', 'date')},
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations, transaction
+from django.db.models import Max, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.timezone import now
+
+from apps.ledgers.models import add_months, month_boundary, month_start
+
+# Ledgers per batch, each batch reads the entries of its ledgers once.
+BATCH_SIZE = 200
+DEBIT, CREDIT = 1, 2
+
+
+def backfill_checkpoints(apps, schema_editor):
+    """
+    Add the checkpoints of every closed month of the ledgers that have none, from the month of
+    their first entry on, as LedgerCheckpoint.objects.extend() would.
+    """
+    Ledger = apps.get_model('ledgers', 'Ledger')
+    LedgerEntries = apps.get_model('ledgers', 'LedgerEntries')
+    LedgerCheckpoint = apps.get_model('ledgers', 'LedgerCheckpoint')
+
+    current = month_start(now())
+    last_pk = Ledger.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic():
+            ledger_ids = list(Ledger.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).exclude(
+                pk__in=LedgerCheckpoint.objects.values('ledger_id')).values_list('pk', flat=True))
+            if not ledger_ids:
+                continue
+            rows = LedgerEntries.objects.filter(
+                ledger_id__in=ledger_ids, transaction_date__lt=month_boundary(current),
+            ).annotate(month=TruncMonth('transaction_date')).values('ledger_id', 'month').annotate(
+                debt=Sum('amount', filter=Q(type=DEBIT)), credit=Sum('amount', filter=Q(type=CREDIT)),
+            ).order_by().values_list('ledger_id', 'month', 'debt', 'credit')
+            totals, first_months = {}, {}
+            for ledger_id, month, debt, credit in rows:
+                month = month_start(month)
+                totals[ledger_id, month] = (debt or 0, credit or 0)
+                first_months[ledger_id] = min(month, first_months.get(ledger_id, month))
+
+            checkpoints = []
+            for ledger_id, month in first_months.items():
+                total_debt = total_credit = 0
+                while month < current:
+                    debt, credit = totals.get((ledger_id, month), (0, 0))
+                    total_debt += debt
+                    total_credit += credit
+                    checkpoints.append(LedgerCheckpoint(
+                        ledger_id=ledger_id, month=month, total_debt=total_debt, total_credit=total_credit))
+                    month = add_months(month, 1)
+            LedgerCheckpoint.objects.bulk_create(checkpoints)
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own, the entries are not read in one transaction.
+    atomic = False
+
+    dependencies = [
+        ('ledgers', '0013_notes_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_checkpoints, migrations.RunPython.noop),
+    ]
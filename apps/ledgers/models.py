@@ -1,12 +1,161 @@
+import datetime
+
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.utils.timezone import now
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils.timezone import localtime, make_aware, now
 from django.utils.translation import ugettext_lazy as _
 
-from apps.farms.models import TimeStampedModel, Farm
+from apps.farms.models import DateBucket, TimeStampedModel, Farm
+from apps.users.models import User
+
+
+def entries_before(transaction_date, pk):
+    """Entries ordered before the entry at transaction_date with pk, the order statements list them in."""
+    # The redundant bound lets the OR be a range scan of an index on the date.
+    return Q(transaction_date__lte=transaction_date) & (
+        Q(transaction_date__lt=transaction_date) | Q(transaction_date=transaction_date, pk__lt=pk))
+
+
+def entries_from(transaction_date, pk):
+    return Q(transaction_date__gte=transaction_date) & (
+        Q(transaction_date__gt=transaction_date) | Q(transaction_date=transaction_date, pk__gte=pk))
+
+
+def month_start(moment):
+    """First day of the month of an aware datetime, in the current time zone."""
+    return localtime(moment).date().replace(day=1)
+
+
+def add_months(month, months):
+    month = month.year * 12 + month.month - 1 + months
+    return datetime.date(month // 12, month % 12 + 1, 1)
+
+
+def month_boundary(month):
+    """The moment a month starts."""
+    return make_aware(datetime.datetime.combine(month, datetime.time.min))
+
+
+class LedgerManager(models.Manager):
+
+    def refresh_balances(self, ledger_ids=None):
+        """Recompute the stored balances of the given ledgers, or of every ledger if no ids are given."""
+        entries = LedgerEntries.objects.all()
+        ledgers = self.all()
+        if ledger_ids is not None:
+            ledger_ids = {ledger_id for ledger_id in ledger_ids if ledger_id is not None}
+            if not ledger_ids:
+                return
+            entries = entries.filter(ledger_id__in=ledger_ids)
+            ledgers = ledgers.filter(pk__in=ledger_ids)
+
+        totals = {
+            row['ledger_id']: row for row in entries.values('ledger_id').annotate(
+                debt=Sum('amount', filter=Q(type=LedgerEntries.DEBIT)),
+                credit=Sum('amount', filter=Q(type=LedgerEntries.CREDIT))).order_by()
+        }
+        with transaction.atomic():
+            for ledger_id in ledgers.values_list('pk', flat=True).iterator():
+                row = totals.get(ledger_id, {})
+                total_debt = row.get('debt') or 0
+                total_credit = row.get('credit') or 0
+                self.filter(pk=ledger_id).update(
+                    total_debt=total_debt, total_credit=total_credit, net_balance=total_credit - total_debt)
+
+    def balances_before(self, points):
+        """
+        Balance (credit less debt) of each ledger's entries ordered before a point, given as
+        {ledger id: (transaction_date, pk)}: the checkpoint of the month before the point's plus
+        the entries of its month up to it, so no point costs more than a month of entries.
+        """
+        if not points:
+            return {}
+        closed = add_months(month_start(now()), -1)
+        months = {
+            ledger_id: min(add_months(month_start(transaction_date), -1), closed)
+            for ledger_id, (transaction_date, pk) in points.items()
+        }
+        checkpoints = LedgerCheckpoint.objects.at(months)
+        # A ledger's checkpoints have no gaps, one stopping before the month was not extended since
+        # the month closed and is now. A ledger without any had no entries before the month.
+        stale = [ledger_id for ledger_id, checkpoint in checkpoints.items() if checkpoint.month < months[ledger_id]]
+        if stale:
+            LedgerCheckpoint.objects.extend(stale)
+            checkpoints.update(LedgerCheckpoint.objects.at({ledger_id: months[ledger_id] for ledger_id in stale}))
+
+        balances = {}
+        tails = []
+        for ledger_id, (transaction_date, pk) in points.items():
+            tail = LedgerEntries.objects.filter(entries_before(transaction_date, pk), ledger_id=ledger_id)
+            checkpoint = checkpoints.get(ledger_id)
+            balances[ledger_id] = 0
+            if checkpoint:
+                balances[ledger_id] = checkpoint.total_credit - checkpoint.total_debt
+                tail = tail.filter(transaction_date__gte=month_boundary(add_months(checkpoint.month, 1)))
+            tails.append(tail.values('ledger_id').annotate(
+                debt=Sum('amount', filter=Q(type=LedgerEntries.DEBIT)),
+                credit=Sum('amount', filter=Q(type=LedgerEntries.CREDIT))).order_by())
+        # A union of one index range per ledger, a single query ORing them would group in a temporary B-tree.
+        for row in tails[0].union(*tails[1:], all=True):
+            balances[row['ledger_id']] += (row['credit'] or 0) - (row['debt'] or 0)
+        return balances
+
+    def balance_at(self, ledger_id, moment):
+        """Balance of a ledger's entries dated before a moment."""
+        return self.balances_before({ledger_id: (moment, 0)})[ledger_id]
+
+    def running_balances(self, entries):
+        """
+        Return {entry pk: balance of its ledger after the entry} for entries of any ledgers. Entries
+        of the same ledger between them that are not given (filtered out of a page) still count.
+        """
+        bounds = {}
+        for entry in entries:
+            point = (entry.transaction_date, entry.pk)
+            first, last = bounds.get(entry.ledger_id, (point, point))
+            bounds[entry.ledger_id] = (min(first, point), max(last, point))
+        if not bounds:
+            return {}
+
+        balances = self.balances_before({ledger_id: first for ledger_id, (first, last) in bounds.items()})
+        between = Q()
+        for ledger_id, (first, last) in bounds.items():
+            # Through the last entry, the pk is an integer.
+            between |= Q(ledger_id=ledger_id) & entries_from(*first) & entries_before(last[0], last[1] + 1)
+        # Sorted here rather than by the database, the rows are few.
+        rows = sorted(LedgerEntries.objects.filter(between).order_by().values_list(
+            'ledger_id', 'transaction_date', 'pk', 'type', 'amount'))
+        running = {}
+        for ledger_id, transaction_date, pk, entry_type, amount in rows:
+            balances[ledger_id] += amount if entry_type == LedgerEntries.CREDIT else -amount
+            running[pk] = balances[ledger_id]
+        return running
+
+    def drift(self):
+        """Return the ids of ledgers whose stored balances differ from the sum of their entries."""
+        entries = LedgerEntries.objects.filter(ledger=OuterRef('pk')).order_by().values('ledger')
+        queryset = self.annotate(
+            actual_debt=Coalesce(Subquery(
+                entries.filter(type=LedgerEntries.DEBIT).annotate(total=Sum('amount')).values('total'),
+                output_field=models.FloatField()), 0),
+            actual_credit=Coalesce(Subquery(
+                entries.filter(type=LedgerEntries.CREDIT).annotate(total=Sum('amount')).values('total'),
+                output_field=models.FloatField()), 0),
+        )
+        return [
+            ledger_id for ledger_id, total_debt, total_credit, net_balance, actual_debt, actual_credit
+            in queryset.values_list(
+                'pk', 'total_debt', 'total_credit', 'net_balance', 'actual_debt', 'actual_credit').order_by('pk')
+            if abs(total_debt - actual_debt) > 0.01 or abs(total_credit - actual_credit) > 0.01
+            or abs(net_balance - (actual_credit - actual_debt)) > 0.01
+        ]
 
 
 class Ledger(TimeStampedModel):
+    BALANCE_FIELDS = ('total_debt', 'total_credit', 'net_balance')
+
     farm = models.ForeignKey(Farm, on_delete=models.PROTECT, verbose_name=_('Farm'), related_name='ledgers')
     name = models.CharField(max_length=500, verbose_name=_("Name"))
     description = models.TextField(blank=True, null=True, verbose_name=_("Description"))
@@ -14,14 +163,100 @@ class Ledger(TimeStampedModel):
     location = models.CharField(max_length=550, null=True, blank=True, verbose_name=_("Location"))
     is_active = models.BooleanField(default=True, verbose_name=_("Is Active"))
 
+    # Running totals of the entries, maintained by LedgerEntries and LedgerEntriesQuerySet.
+    total_debt = models.FloatField(default=0, editable=False, db_index=True, verbose_name=_("Total Debt"))
+    total_credit = models.FloatField(default=0, editable=False, db_index=True, verbose_name=_("Total Credit"))
+    net_balance = models.FloatField(default=0, editable=False, db_index=True, verbose_name=_("Net Balance"))
+
+    objects = LedgerManager()
+
+    # Searched through SQLite FTS5 tables, see farm_management_system.search.
+    full_text_fields = ('description', )
+
     def __str__(self):
         return f"{self.name}"
 
+    def save(self, *args, **kwargs):
+        # Never write back balances loaded earlier, the entries keep them up to date in the database.
+        if self.pk and not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.BALANCE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = _('Ledger')
         verbose_name_plural = _('Ledgers')
 
 
+class LedgerEntriesQuerySet(models.QuerySet):
+    """Keeps the ledger balances, checkpoints and date buckets in sync when entries are changed in bulk."""
+
+    def _date_ranges(self):
+        """{ledger id: (date of its earliest entry, date of its latest)} of the entries."""
+        return {
+            ledger_id: (earliest, latest) for ledger_id, earliest, latest in self.order_by().values(
+                'ledger_id').annotate(earliest=models.Min('transaction_date'), latest=models.Max('transaction_date'))
+            .values_list('ledger_id', 'earliest', 'latest')
+        }
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        owners = dict(
+            Ledger.objects.filter(pk__in={obj.ledger_id for obj in objs}).values_list('pk', 'farm__owner_id'))
+        for obj in objs:
+            obj.owner_id = owners.get(obj.ledger_id)
+        with transaction.atomic():
+            objs = super().bulk_create(objs, *args, **kwargs)
+            Ledger.objects.refresh_balances({obj.ledger_id for obj in objs})
+            LedgerCheckpoint.objects.invalidate((obj.ledger_id, obj.transaction_date) for obj in objs)
+            LedgerEntryDateBucket.objects.refresh((obj.ledger_id, obj.transaction_date) for obj in objs)
+        return objs
+
+    def update(self, **kwargs):
+        if not {'ledger', 'ledger_id', 'type', 'amount', 'transaction_date'} & set(kwargs):
+            return super().update(**kwargs)
+        ledger = kwargs.get('ledger', kwargs.get('ledger_id'))
+        if ledger is not None:
+            ledger = getattr(ledger, 'pk', ledger)
+            kwargs['owner_id'] = Ledger.objects.filter(pk=ledger).values_list('farm__owner_id', flat=True).first()
+        # An expression as the new date may move entries to any month, then their whole ledgers are rebuilt.
+        transaction_date = kwargs.get('transaction_date')
+        if transaction_date is not None and not isinstance(transaction_date, datetime.datetime):
+            transaction_date = None
+        with transaction.atomic():
+            ranges = self._date_ranges()
+            rows = super().update(**kwargs)
+            # The dates the entries spanned before and after the update, the earliest of a ledger counts for
+            # its checkpoints, both for its date buckets.
+            changes = []
+            for ledger_id, moments in ranges.items():
+                changes.extend((ledger_id, moment) for moment in moments)
+                if 'transaction_date' in kwargs:
+                    moments = [transaction_date]
+                changes.extend((ledger_id if ledger is None else ledger, moment) for moment in moments)
+            if {'ledger', 'ledger_id', 'type', 'amount'} & set(kwargs):
+                Ledger.objects.refresh_balances({ledger_id for ledger_id, moment in changes})
+            LedgerCheckpoint.objects.invalidate(changes)
+            if {'ledger', 'ledger_id', 'transaction_date'} & set(kwargs):
+                LedgerEntryDateBucket.objects.refresh(changes)
+        return rows
+
+    def delete(self):
+        with transaction.atomic():
+            ranges = self._date_ranges()
+            result = super().delete()
+            Ledger.objects.refresh_balances(ranges)
+            changes = [(ledger_id, moment) for ledger_id, moments in ranges.items() for moment in moments]
+            LedgerCheckpoint.objects.invalidate(changes)
+            LedgerEntryDateBucket.objects.refresh(changes)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class LedgerEntries(TimeStampedModel):
     DEBIT = 1
     CREDIT = 2
@@ -37,9 +272,235 @@ class LedgerEntries(TimeStampedModel):
     transaction_date = models.DateTimeField(blank=True, verbose_name=_("Transaction date"), default=now)
     notes = models.TextField(blank=True, null=True, verbose_name=_('Notes'))
 
+    # Copy of ledger.farm.owner, so owner scoped lists need no joins. Kept in sync by save(),
+    # LedgerEntriesQuerySet and apps.ledgers.signals.
+    owner = models.ForeignKey(
+        User, on_delete=models.PROTECT, editable=False, db_index=False, related_name='+', verbose_name=_('Owner'))
+
+    objects = LedgerEntriesQuerySet.as_manager()
+
+    str_select_related = ('ledger', )
+
+    full_text_fields = ('notes', )
+
     def __str__(self):
         return f"{self.ledger}({self.type}) {self.amount}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = LedgerEntries.objects.filter(pk=self.pk).values(
+                    'ledger_id', 'type', 'amount', 'transaction_date').first()
+            self.owner_id = Ledger.objects.filter(pk=self.ledger_id).values_list('farm__owner_id', flat=True).first()
+            super().save(*args, **kwargs)
+            changes = [(self.ledger_id, self.transaction_date)]
+            if previous:
+                self._apply_to_balance(previous['ledger_id'], previous['type'], -previous['amount'])
+                changes.append((previous['ledger_id'], previous['transaction_date']))
+            self._apply_to_balance(self.ledger_id, self.type, self.amount)
+            LedgerCheckpoint.objects.invalidate(changes)
+            LedgerEntryDateBucket.objects.refresh(changes)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self._apply_to_balance(self.ledger_id, self.type, -self.amount)
+            LedgerCheckpoint.objects.invalidate([(self.ledger_id, self.transaction_date)])
+            LedgerEntryDateBucket.objects.refresh([(self.ledger_id, self.transaction_date)])
+        return result
+
+    @staticmethod
+    def _apply_to_balance(ledger_id, entry_type, amount):
+        if entry_type == LedgerEntries.DEBIT:
+            changes = {'total_debt': F('total_debt') + amount, 'net_balance': F('net_balance') - amount}
+        else:
+            changes = {'total_credit': F('total_credit') + amount, 'net_balance': F('net_balance') + amount}
+        Ledger.objects.filter(pk=ledger_id).update(**changes)
+
     class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'transaction_date'], name='entry_owner_date_idx'),
+            models.Index(fields=['ledger', 'type', 'transaction_date'], name='entry_ledger_type_date_idx'),
+            # Covers the sums of balances_before() and of the checkpoints, the table is not read.
+            models.Index(fields=['ledger', 'transaction_date', 'type', 'amount'], name='entry_ledger_balance_idx'),
+            models.Index(fields=['type', 'transaction_date'], name='entry_type_date_idx'),
+            models.Index(fields=['transaction_date'], name='entry_date_idx'),
+        ]
         verbose_name = _('Ledger Entry')
         verbose_name_plural = _('Ledger Entries')
+
+
+class LedgerCheckpointManager(models.Manager):
+
+    def at(self, months):
+        """
+        {ledger id: its latest checkpoint at or before the month} of the given {ledger id: month},
+        for the ledgers that have one, read with one query whatever the number of ledgers.
+        """
+        if not months:
+            return {}
+        bound = models.Case(
+            *(models.When(pk=ledger_id, then=Value(month)) for ledger_id, month in months.items()),
+            output_field=models.DateField())
+        ledgers = Ledger.objects.filter(pk__in=months).annotate(bound=bound)
+        return {
+            ledger_id: checkpoint
+            for ledger_id, checkpoint in self.last_of(ledgers, month__lte=OuterRef('bound')).items() if checkpoint
+        }
+
+    def latest(self, ledger_ids=None):
+        """{ledger id: its latest checkpoint, or None} of the given ledgers, or of every ledger."""
+        return self.last_of(Ledger.objects.all() if ledger_ids is None else Ledger.objects.filter(pk__in=ledger_ids))
+
+    def last_of(self, ledgers, **conditions):
+        """{ledger id: its latest checkpoint meeting the conditions, or None} of a queryset of ledgers."""
+        checkpoints = self.filter(ledger=OuterRef('pk'), **conditions).order_by('-month')
+        rows = ledgers.annotate(
+            month=Subquery(checkpoints.values('month')[:1]),
+            last_debt=Subquery(checkpoints.values('total_debt')[:1]),
+            last_credit=Subquery(checkpoints.values('total_credit')[:1]),
+        ).values_list('pk', 'month', 'last_debt', 'last_credit')
+        return {
+            ledger_id: month and LedgerCheckpoint(
+                ledger_id=ledger_id, month=month, total_debt=total_debt, total_credit=total_credit)
+            for ledger_id, month, total_debt, total_credit in rows
+        }
+
+    def invalidate(self, changes):
+        """
+        Rebuild the checkpoints of the months at and after each change, given as (ledger id, entry
+        transaction date) pairs, a None date rebuilding all of the ledger's. Entries of the current
+        month change no checkpoint, so the usual new entry costs nothing, and a back-dated one only
+        the months from its own on.
+        """
+        current = month_start(now())
+        stale = {}
+        for ledger_id, moment in changes:
+            month = datetime.date.min if moment is None else month_start(moment)
+            if ledger_id is not None and month < current:
+                stale[ledger_id] = min(month, stale.get(ledger_id, month))
+        if not stale:
+            return
+        condition = Q()
+        for ledger_id, month in stale.items():
+            condition |= Q(ledger_id=ledger_id, month__gte=month)
+        self.filter(condition).delete()
+        self.extend(list(stale))
+
+    def extend(self, ledger_ids=None):
+        """
+        Add the checkpoints of the closed months after each ledger's latest one, or from the month
+        of its first entry, every month up to the last one so that a ledger's checkpoints have no
+        gaps. Returns the number of checkpoints added.
+        """
+        current = month_start(now())
+        latest = self.latest(ledger_ids)
+        starts = {
+            ledger_id: add_months(checkpoint.month, 1) for ledger_id, checkpoint in latest.items() if checkpoint
+        }
+        if len(starts) == len(latest) and all(start >= current for start in starts.values()):
+            return 0
+
+        # The entries after each ledger's latest checkpoint, ledgers starting the same month together.
+        by_start = {}
+        for ledger_id in latest:
+            by_start.setdefault(starts.get(ledger_id), []).append(ledger_id)
+        condition = Q()
+        for start, start_ledger_ids in by_start.items():
+            if start is None:
+                condition |= Q(ledger_id__in=start_ledger_ids)
+            elif start < current:
+                condition |= Q(ledger_id__in=start_ledger_ids, transaction_date__gte=month_boundary(start))
+        entries = LedgerEntries.objects.filter(condition, transaction_date__lt=month_boundary(current))
+        totals = {}
+        rows = entries.annotate(month=TruncMonth('transaction_date')).values('ledger_id', 'month', 'type').annotate(
+            total=Sum('amount')).order_by().values_list('ledger_id', 'month', 'type', 'total')
+        for ledger_id, month, entry_type, total in rows:
+            month = month_start(month)
+            debt, credit = totals.get((ledger_id, month), (0, 0))
+            if entry_type == LedgerEntries.DEBIT:
+                debt += total
+            else:
+                credit += total
+            totals[ledger_id, month] = (debt, credit)
+
+        first_months = {}
+        for ledger_id, month in totals:
+            first_months[ledger_id] = min(month, first_months.get(ledger_id, month))
+        checkpoints = []
+        for ledger_id, checkpoint in latest.items():
+            month = starts.get(ledger_id, first_months.get(ledger_id))
+            if month is None:
+                continue
+            total_debt, total_credit = (checkpoint.total_debt, checkpoint.total_credit) if checkpoint else (0, 0)
+            while month < current:
+                debt, credit = totals.get((ledger_id, month), (0, 0))
+                total_debt += debt
+                total_credit += credit
+                checkpoints.append(LedgerCheckpoint(
+                    ledger_id=ledger_id, month=month, total_debt=total_debt, total_credit=total_credit))
+                month = add_months(month, 1)
+        self.bulk_create(checkpoints)
+        return len(checkpoints)
+
+    def rebuild(self, ledger_ids=None):
+        """Replace the checkpoints of the given ledgers, or of every ledger, and return the number built."""
+        with transaction.atomic():
+            checkpoints = self.all() if ledger_ids is None else self.filter(ledger_id__in=ledger_ids)
+            checkpoints.delete()
+            return self.extend(ledger_ids)
+
+    def month_end_balances(self, ledger_id, start=None, end=None):
+        """The (month, total debt, total credit, balance) at the end of each closed month of a ledger."""
+        self.extend([ledger_id])
+        checkpoints = self.filter(ledger_id=ledger_id)
+        if start:
+            checkpoints = checkpoints.filter(month__gte=start)
+        if end:
+            checkpoints = checkpoints.filter(month__lte=end)
+        return [
+            (month, total_debt, total_credit, total_credit - total_debt)
+            for month, total_debt, total_credit
+            in checkpoints.order_by('month').values_list('month', 'total_debt', 'total_credit')
+        ]
+
+
+class LedgerCheckpoint(models.Model):
+    """
+    The debt and credit totals of a ledger's entries up to the end of a month, for every closed
+    month from its first entry on. Ledger.objects.balances_before() adds the entries after one to
+    answer the balance at any moment. Kept up to date by LedgerEntries and LedgerEntriesQuerySet.
+    """
+    ledger = models.ForeignKey(
+        Ledger, on_delete=models.CASCADE, related_name='checkpoints', verbose_name=_('Ledger'))
+    month = models.DateField(verbose_name=_('Month'), help_text=_('The first day of the month.'))
+    total_debt = models.FloatField(default=0, verbose_name=_("Total Debt"))
+    total_credit = models.FloatField(default=0, verbose_name=_("Total Credit"))
+
+    objects = LedgerCheckpointManager()
+
+    class Meta:
+        unique_together = ('ledger', 'month')
+        verbose_name = _('Ledger checkpoint')
+        verbose_name_plural = _('Ledger checkpoints')
+
+    def __str__(self):
+        return f"{self.ledger_id} {self.month:%Y-%m}"
+
+
+class LedgerEntryDateBucket(DateBucket):
+    ledger = models.ForeignKey(Ledger, on_delete=models.CASCADE, related_name='+', verbose_name=_('Ledger'))
+
+    source = LedgerEntries
+    parent = 'ledger'
+    source_date = 'transaction_date'
+
+    class Meta:
+        unique_together = ('ledger', 'date')
+        indexes = [
+            models.Index(fields=['owner', 'date'], name='entry_bucket_owner_idx'),
+            models.Index(fields=['date'], name='entry_bucket_date_idx'),
+        ]
+        verbose_name = _('Ledger entry date')
+        verbose_name_plural = _('Ledger entry dates')
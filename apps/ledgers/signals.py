@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.farms.models import Farm
+from apps.ledgers.models import Ledger, LedgerEntries, LedgerEntryDateBucket
+
+
+@receiver(post_save, sender=Farm)
+def sync_farm_entries_owner(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        for model in (LedgerEntries, LedgerEntryDateBucket):
+            model.objects.filter(ledger__farm=instance).exclude(owner_id=instance.owner_id).update(
+                owner_id=instance.owner_id)
+
+
+@receiver(post_save, sender=Ledger)
+def sync_ledger_entries_owner(sender, instance, created, raw=False, **kwargs):
+    """Entries and their date buckets follow their ledger when it is moved to a farm of another owner."""
+    if not created and not raw:
+        owner_id = Farm.objects.filter(pk=instance.farm_id).values_list('owner_id', flat=True).first()
+        for model in (LedgerEntries, LedgerEntryDateBucket):
+            model.objects.filter(ledger=instance).exclude(owner_id=owner_id).update(owner_id=owner_id)
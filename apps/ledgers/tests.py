@@ -0,0 +1,209 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import make_aware, now
+
+from apps.farms.tests.factories import create_entry, create_farm, create_ledger, create_owner
+from apps.ledgers.models import Ledger, LedgerCheckpoint, LedgerEntries
+from farm_management_system.filters import choices_version_key
+
+
+class LedgerBalanceTests(TestCase):
+    """An entry's save() and delete() move its stored amount out of the balances it was counted in."""
+
+    @classmethod
+    def setUpTestData(cls):
+        farm = create_farm(create_owner('owner'))
+        cls.ledger = create_ledger(farm)
+        cls.other_ledger = create_ledger(farm, name='Other')
+        create_entry(cls.ledger, 40, type=LedgerEntries.CREDIT)
+
+    def setUp(self):
+        self.entry = create_entry(self.ledger, 100)
+
+    def assertBalances(self, ledger, total_debt, total_credit):
+        ledger = Ledger.objects.get(pk=ledger.pk)
+        self.assertEqual(
+            (ledger.total_debt, ledger.total_credit, ledger.net_balance),
+            (total_debt, total_credit, total_credit - total_debt))
+
+    def assertNoDrift(self):
+        self.assertEqual(Ledger.objects.drift(), [])
+
+    def test_new_entry(self):
+        self.assertBalances(self.ledger, 100, 40)
+        self.assertNoDrift()
+
+    def test_debit_flipped_to_credit(self):
+        self.entry.type = LedgerEntries.CREDIT
+        self.entry.save()
+        self.assertBalances(self.ledger, 0, 140)
+        self.entry.type = LedgerEntries.DEBIT
+        self.entry.save()
+        self.assertBalances(self.ledger, 100, 40)
+        self.assertNoDrift()
+
+    def test_changed_amount(self):
+        self.entry.amount = 75
+        self.entry.save()
+        self.assertBalances(self.ledger, 75, 40)
+        self.assertNoDrift()
+
+    def test_moved_to_another_ledger(self):
+        self.entry.ledger = self.other_ledger
+        self.entry.save()
+        self.assertBalances(self.ledger, 0, 40)
+        self.assertBalances(self.other_ledger, 100, 0)
+        self.assertNoDrift()
+
+    def test_delete(self):
+        self.entry.delete()
+        self.assertBalances(self.ledger, 0, 40)
+        self.assertNoDrift()
+
+    def test_queryset_update_and_delete(self):
+        LedgerEntries.objects.filter(pk=self.entry.pk).update(type=LedgerEntries.CREDIT)
+        self.assertBalances(self.ledger, 0, 140)
+        LedgerEntries.objects.filter(ledger=self.ledger, type=LedgerEntries.CREDIT).update(ledger=self.other_ledger)
+        self.assertBalances(self.ledger, 0, 0)
+        self.assertBalances(self.other_ledger, 0, 140)
+        LedgerEntries.objects.filter(ledger=self.other_ledger).delete()
+        self.assertBalances(self.other_ledger, 0, 0)
+        self.assertNoDrift()
+
+    def test_ledger_save_keeps_its_balances(self):
+        # A ledger loaded before an entry was added must not write its stale totals back.
+        ledger = Ledger.objects.get(pk=self.ledger.pk)
+        create_entry(self.ledger, 10)
+        ledger.name = 'Renamed'
+        ledger.save()
+        self.assertBalances(self.ledger, 110, 40)
+
+
+class LedgerCheckpointTests(TestCase):
+    """Changes to entries of closed months rebuild the checkpoints from their month on, and only those."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ledger = create_ledger(create_farm(create_owner('owner')))
+        create_entry(cls.ledger, 100, transaction_date=datetime.datetime(2020, 1, 15))
+        create_entry(cls.ledger, 30, transaction_date=datetime.datetime(2020, 3, 15), type=LedgerEntries.CREDIT)
+
+    def setUp(self):
+        LedgerCheckpoint.objects.rebuild([self.ledger.pk])
+
+    def checkpoints(self):
+        return {
+            month: (pk, total_debt, total_credit) for pk, month, total_debt, total_credit
+            in self.ledger.checkpoints.values_list('pk', 'month', 'total_debt', 'total_credit')
+        }
+
+    def assertRebuiltFrom(self, before, month):
+        """The checkpoints before month kept their rows, and all of them match a rebuild."""
+        after = self.checkpoints()
+        self.assertEqual(
+            {key: row for key, row in after.items() if key < month},
+            {key: row for key, row in before.items() if key < month})
+        kept = {pk for pk, total_debt, total_credit in before.values()}
+        self.assertEqual([key for key in after if key >= month and after[key][0] in kept], [])
+        LedgerCheckpoint.objects.rebuild([self.ledger.pk])
+        self.assertEqual(
+            {key: row[1:] for key, row in after.items()}, {key: row[1:] for key, row in self.checkpoints().items()})
+
+    def test_checkpoints_run_from_the_first_entry_to_the_last_closed_month(self):
+        checkpoints = self.checkpoints()
+        self.assertEqual(min(checkpoints), datetime.date(2020, 1, 1))
+        self.assertEqual(checkpoints[datetime.date(2020, 2, 1)][1:], (100, 0))
+        self.assertEqual(checkpoints[max(checkpoints)][1:], (100, 30))
+        self.assertLess(max(checkpoints), now().date().replace(day=1))
+
+    def test_back_dated_entry_rebuilds_the_later_months(self):
+        before = self.checkpoints()
+        create_entry(self.ledger, 20, transaction_date=datetime.datetime(2020, 2, 10))
+        self.assertRebuiltFrom(before, datetime.date(2020, 2, 1))
+        self.assertEqual(self.checkpoints()[datetime.date(2020, 2, 1)][1:], (120, 0))
+        self.assertEqual(
+            Ledger.objects.balance_at(self.ledger.pk, make_aware(datetime.datetime(2020, 3, 1))), -120)
+
+    def test_entry_moved_later_rebuilds_from_its_old_month(self):
+        before = self.checkpoints()
+        entry = self.ledger.entries.get(amount=100)
+        entry.transaction_date = make_aware(datetime.datetime(2020, 4, 1))
+        entry.save()
+        self.assertRebuiltFrom(before, datetime.date(2020, 1, 1))
+        self.assertEqual(self.checkpoints()[datetime.date(2020, 3, 1)][1:], (0, 30))
+
+    def test_entry_flipped_in_bulk_rebuilds_from_its_month(self):
+        before = self.checkpoints()
+        self.ledger.entries.filter(amount=30).update(type=LedgerEntries.DEBIT)
+        self.assertRebuiltFrom(before, datetime.date(2020, 3, 1))
+        self.assertEqual(self.checkpoints()[datetime.date(2020, 3, 1)][1:], (130, 0))
+
+    def test_deleted_entry_rebuilds_from_its_month(self):
+        before = self.checkpoints()
+        self.ledger.entries.get(amount=30).delete()
+        self.assertRebuiltFrom(before, datetime.date(2020, 3, 1))
+
+    def test_entry_of_the_current_month_changes_no_checkpoint(self):
+        before = self.checkpoints()
+        LedgerEntries.objects.create(ledger=self.ledger, amount=50, type=LedgerEntries.DEBIT, transaction_date=now())
+        self.assertEqual(self.checkpoints(), before)
+
+
+class LedgerSearchTests(TestCase):
+    """The ledger admin mixes a plain name prefix with the full-text description."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        farm = create_farm(cls.owner)
+        create_ledger(farm, name='Diesel pump')
+        create_ledger(farm, name='Shop', description='diesel and urea on credit')
+        create_ledger(farm, name='Bank', description='crop loan')
+
+    def search(self, term):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('admin:ledgers_ledger_changelist'), {'q': term})
+        return sorted(ledger.name for ledger in response.context['cl'].result_list)
+
+    def test_name_prefix_or_description_words(self):
+        self.assertEqual(self.search('dies'), ['Diesel pump', 'Shop'])
+        self.assertEqual(self.search('urea cred'), ['Shop'])
+        self.assertEqual(self.search('pump loan'), [])
+
+
+class LedgerActionTests(TestCase):
+    """
+    Closing and reopening ledgers updates the selected ledgers of the owner in one UPDATE. Their
+    balances and checkpoints are built from the entries alone and are left as they are.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        cls.ledger = create_ledger(create_farm(cls.owner))
+        create_entry(cls.ledger, 100, transaction_date=datetime.datetime(2020, 1, 15))
+        cls.neighbour_ledger = create_ledger(create_farm(create_owner('neighbour')))
+        LedgerCheckpoint.objects.rebuild([cls.ledger.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.owner)
+
+    def act(self, action):
+        self.client.post(reverse('admin:ledgers_ledger_changelist'), {
+            'action': action, '_selected_action': [self.ledger.pk, self.neighbour_ledger.pk]})
+        return dict(Ledger.objects.values_list('pk', 'is_active'))
+
+    def test_close_and_reopen(self):
+        checkpoints = list(self.ledger.checkpoints.values_list('month', 'total_debt', 'total_credit'))
+        version = cache.get(choices_version_key(Ledger))
+        self.assertEqual(self.act('close_ledgers'), {self.ledger.pk: False, self.neighbour_ledger.pk: True})
+        self.assertNotEqual(cache.get(choices_version_key(Ledger)), version)
+        Ledger.objects.filter(pk=self.neighbour_ledger.pk).update(is_active=False)
+        self.assertEqual(self.act('reopen_ledgers'), {self.ledger.pk: True, self.neighbour_ledger.pk: False})
+        self.assertEqual(Ledger.objects.drift(), [])
+        self.assertEqual(
+            list(self.ledger.checkpoints.values_list('month', 'total_debt', 'total_credit')), checkpoints)
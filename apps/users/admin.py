@@ -7,12 +7,15 @@ from apps.users.models import User
 
 
 from farm_management_system.admin import ReadOnlyModelAdmin
+from farm_management_system.autocomplete import AutocompleteMixin
 
 
-class EmployeeAdmin(ReadOnlyModelAdmin, UserAdmin):
+class EmployeeAdmin(AutocompleteMixin, ReadOnlyModelAdmin, UserAdmin):
 
     list_display = ('id', '_name')
 
+    search_fields = ['^username', '^first_name', '^last_name']
+
     def get_queryset(self, request):
         queryset = super(EmployeeAdmin, self).get_queryset(request)
         if not request.user.is_superuser:
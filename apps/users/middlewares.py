@@ -1,3 +1,12 @@
+import heapq
+import json
+import logging
+from contextlib import ExitStack
+from fnmatch import fnmatchcase
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
 from django.utils import translation
 from django.utils.deprecation import MiddlewareMixin
 
@@ -7,3 +16,114 @@ class MyLocaleMiddleware(MiddlewareMixin):
         if request.user.is_authenticated and request.user.language:
             translation.activate(request.user.language)
             request.LANGUAGE_CODE = translation.get_language()
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_query_budget(view_name):
+    """The QUERY_BUDGETS entry for a URL name, exact names first, then the first matching pattern."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if view_name in budgets:
+        return budgets[view_name]
+    for pattern, budget in budgets.items():
+        if view_name and fnmatchcase(view_name, pattern):
+            return budget
+    return None
+
+
+class QueryMetrics:
+    """Database execute wrapper counting and timing the statements of a request."""
+
+    def __init__(self, slowest):
+        self.count = 0
+        self.duration = 0.0
+        self.keep = slowest
+        self.slowest = []
+        self.start = perf_counter()
+        self.view_start = self.render_start = self.render_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            # Only the statement text is kept, formatting the parameters costs more than the timing.
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, (duration, sql))
+            elif self.slowest and duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (duration, sql))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the queries, database time, view time and template render time of every request.
+    They are logged as one JSON line and sent back in a Server-Timing header. Requests to views
+    over their QUERY_BUDGETS entry are logged as warnings, or raise QueryBudgetExceeded when
+    QUERY_BUDGETS_STRICT is set. Time spent streaming a response body is not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slowest = getattr(settings, 'REQUEST_METRICS_SLOWEST', 3)
+        self.strict = getattr(settings, 'QUERY_BUDGETS_STRICT', False)
+
+    def __call__(self, request):
+        metrics = request.metrics = QueryMetrics(self.slowest)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        end = perf_counter()
+
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        view_start = metrics.view_start or metrics.start
+        view_end = metrics.render_start or end
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': metrics.count,
+            'db_ms': round(metrics.duration * 1000, 1),
+            'view_ms': round((view_end - view_start) * 1000, 1),
+            'render_ms': round((metrics.render_end - metrics.render_start) * 1000, 1) if metrics.render_end else 0,
+            'total_ms': round((end - metrics.start) * 1000, 1),
+            'slowest': [
+                {'ms': round(duration * 1000, 1), 'sql': sql}
+                for duration, sql in sorted(metrics.slowest, reverse=True)
+            ],
+        }
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={record["db_ms"]};desc="{metrics.count} queries"',
+            f'view;dur={record["view_ms"]}',
+            f'render;dur={record["render_ms"]}',
+            f'total;dur={record["total_ms"]}',
+        ])
+
+        budget = get_query_budget(view_name)
+        if budget is not None and metrics.count > budget:
+            record['budget'] = budget
+            logger.warning(json.dumps(record))
+            if self.strict:
+                raise QueryBudgetExceeded(f'{view_name} ran {metrics.count} queries, its budget is {budget}.')
+        else:
+            logger.info(json.dumps(record))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.view_start = perf_counter()
+
+    def process_template_response(self, request, response):
+        # Template response middleware runs innermost last, so list this middleware early to time
+        # the render alone.
+        request.metrics.render_start = perf_counter()
+        response.add_post_render_callback(lambda response: setattr(request.metrics, 'render_end', perf_counter()))
+        return response
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# The owner picker searches by case insensitive prefix, which SQLite only answers
+# from an index when the index uses the NOCASE collation.
+SEARCH_INDEXES = (
+    ('user_username_nocase_idx', 'users_user', 'username'),
+    ('user_first_name_nocase_idx', 'users_user', 'first_name'),
+    ('user_last_name_nocase_idx', 'users_user', 'last_name'),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, table, column in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ("{column}" COLLATE NOCASE)')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, table, column in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,37 @@
+import json
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.farms.tests.factories import create_farm, create_owner
+from apps.users.middlewares import QueryBudgetExceeded
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_owner('owner')
+        create_farm(cls.owner)
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def test_budgets_are_strict_under_the_test_runner(self):
+        self.assertTrue(settings.QUERY_BUDGETS_STRICT)
+
+    @override_settings(QUERY_BUDGETS={'admin:farms_farm_changelist': 1})
+    def test_strict_budget_raises(self):
+        with self.assertLogs('apps.users.middlewares', 'WARNING'):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'admin:farms_farm_changelist ran'):
+                self.client.get(reverse('admin:farms_farm_changelist'))
+
+    @override_settings(QUERY_BUDGETS={'admin:*_changelist': 1}, QUERY_BUDGETS_STRICT=False)
+    def test_request_over_budget_is_logged_as_a_warning(self):
+        with self.assertLogs('apps.users.middlewares', 'WARNING') as logs:
+            response = self.client.get(reverse('admin:farms_farm_changelist'))
+        self.assertEqual(response.status_code, 200)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['view'], record['budget']), ('admin:farms_farm_changelist', 1))
+        self.assertIn(f'desc="{record["queries"]} queries"', response['Server-Timing'])
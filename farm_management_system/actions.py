@@ -0,0 +1,37 @@
+"""
+Set-based changelist actions, see BulkUpdateMixin.
+"""
+from django.contrib.admin.utils import model_ngettext
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.translation import gettext
+
+from farm_management_system.filters import invalidate_filter_choices
+
+
+class BulkUpdateMixin:
+    """
+    Admin whose actions change a column on many rows with update_rows(), which applies it to the
+    selected rows, or to every filtered row with Django's "select all", in one UPDATE.
+
+    update() sends no signals, so only the columns listed in bulk_update_fields may be set this
+    way: none of the crop summaries, expense rollups, date buckets or ledger checkpoints is built
+    from them. update_rows() refreshes what does read them. It expires the list filter choices
+    built from the model and stamps date_modified, which puts the rows in the next season cube refresh.
+    """
+    bulk_update_fields = ()
+
+    def update_rows(self, request, queryset, **values):
+        """Set values on the rows of queryset with a single UPDATE and report how many changed."""
+        unlisted = set(values) - set(self.bulk_update_fields)
+        if unlisted:
+            raise ImproperlyConfigured(
+                f'{type(self).__name__}.bulk_update_fields does not list {", ".join(sorted(unlisted))}.')
+        if any(field.name == 'date_modified' for field in self.opts.concrete_fields):
+            values.setdefault('date_modified', timezone.now())
+        count = queryset.update(**values)
+        if count:
+            invalidate_filter_choices(self.model)
+        self.message_user(request, gettext('Updated %(count)d %(items)s.') % {
+            'count': count, 'items': model_ngettext(self.opts, count)})
+        return count
@@ -0,0 +1,103 @@
+"""
+Changelist date drill-downs read from date buckets, see DateBucketMixin.
+"""
+import datetime
+
+from django.db.models import Max, Min
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext_lazy as _
+
+
+class DateBucketMixin:
+    """
+    Admin listing the years, months and days of its date_hierarchy from date_buckets, a manager
+    of rows with a date for each day that has records, whose rows(**filters) narrows them. Scoped
+    to the owner and to the changelist filters named in date_bucket_filters, the drill-down then
+    reads an index of the buckets instead of truncating the dates of every scoped row. Searches
+    and other filters fall back to Django's own drill-down over the filtered rows.
+    """
+    date_buckets = None
+    date_bucket_filters = ()
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist and self.date_hierarchy:
+            response.context_data['bucket_date_hierarchy'] = self.bucket_date_hierarchy(request, changelist)
+        return response
+
+    def get_date_buckets(self, request, filters):
+        if not request.user.is_superuser:
+            filters = dict(filters, owner=request.user)
+        return self.date_buckets.rows(**filters)
+
+    def bucket_date_hierarchy(self, request, changelist):
+        """
+        The context of the admin/date_hierarchy.html drill-down, as Django's date_hierarchy tag
+        builds it, read from the date buckets. None when the changelist is searched or filtered
+        on something the buckets do not carry.
+        """
+        field_name = self.date_hierarchy
+        date_params = [f'{field_name}__{part}' for part in ('year', 'month', 'day')]
+        filters = {
+            name: value for name, value in changelist.get_filters_params().items() if name not in date_params}
+        if changelist.query or set(filters) - set(self.date_bucket_filters):
+            return None
+        try:
+            year, month, day = [int(changelist.params[name]) if changelist.params.get(name) else None
+                                for name in date_params]
+        except ValueError:
+            return None
+        buckets = self.get_date_buckets(request, filters)
+
+        def link(filters):
+            return changelist.get_query_string(filters, [f'{field_name}__'])
+
+        if not (year or month or day):
+            # Start the drill-down at the only year, or month, there is.
+            date_range = buckets.aggregate(first=Min('date'), last=Max('date'))
+            if date_range['first'] and date_range['first'].year == date_range['last'].year:
+                year = date_range['first'].year
+                if date_range['first'].month == date_range['last'].month:
+                    month = date_range['first'].month
+
+        if year and month and day:
+            day = datetime.date(year, month, day)
+            return {
+                'show': True,
+                'back': {
+                    'link': link({date_params[0]: year, date_params[1]: month}),
+                    'title': capfirst(formats.date_format(day, 'YEAR_MONTH_FORMAT')),
+                },
+                'choices': [{'title': capfirst(formats.date_format(day, 'MONTH_DAY_FORMAT'))}],
+            }
+        if year and month:
+            start = datetime.date(year, month, 1)
+            end = (start + datetime.timedelta(days=32)).replace(day=1)
+            days = buckets.filter(date__gte=start, date__lt=end).dates('date', 'day')
+            return {
+                'show': True,
+                'back': {'link': link({date_params[0]: year}), 'title': str(year)},
+                'choices': [{
+                    'link': link({date_params[0]: year, date_params[1]: month, date_params[2]: day.day}),
+                    'title': capfirst(formats.date_format(day, 'MONTH_DAY_FORMAT')),
+                } for day in days],
+            }
+        if year:
+            months = buckets.filter(
+                date__gte=datetime.date(year, 1, 1), date__lt=datetime.date(year + 1, 1, 1)).dates('date', 'month')
+            return {
+                'show': True,
+                'back': {'link': link({}), 'title': _('All dates')},
+                'choices': [{
+                    'link': link({date_params[0]: year, date_params[1]: month.month}),
+                    'title': capfirst(formats.date_format(month, 'YEAR_MONTH_FORMAT')),
+                } for month in months],
+            }
+        return {
+            'show': True,
+            'choices': [{
+                'link': link({date_params[0]: str(year.year)}), 'title': str(year.year),
+            } for year in buckets.dates('date', 'year')],
+        }
@@ -0,0 +1,106 @@
+"""
+Changelist list filters: related field filters whose choices are cached until one of the
+models they are read from changes, and range filters on numeric columns.
+"""
+import hashlib
+import uuid
+
+from django.contrib import admin
+from django.contrib.admin.filters import RelatedFieldListFilter
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.cache import cache
+from django.utils.translation import get_language, gettext_lazy as _
+
+from farm_management_system.admin import str_select_related
+from farm_management_system.keyset import AFTER_VAR, BEFORE_VAR
+
+
+def str_related_models(model):
+    """Return model and the models its str() reads, following str_select_related."""
+    models = [model]
+    for relation in str_select_related(model):
+        related = model
+        for name in relation.split('__'):
+            related = related._meta.get_field(name).related_model
+        models.append(related)
+    return models
+
+
+def choices_version_key(model):
+    return f'filter-choices-version:{model._meta.label_lower}'
+
+
+def invalidate_filter_choices(*models):
+    """Expire every cached list filter choice built from one of models, see CachedRelatedFieldListFilter."""
+    cache.set_many({choices_version_key(model): uuid.uuid4().hex for model in models}, None)
+
+
+class CachedRelatedFieldListFilter(RelatedFieldListFilter):
+    """
+    Related field filter caching its (pk, label) choices per user and language. The cache key
+    carries a version of every model the choices are read from: the related model, the models
+    its str() follows and choices_models. Saving or deleting one of them replaces its version
+    through invalidate_filter_choices(), so stale choices are never read again.
+
+    Subclasses narrow the choices in choices_queryset() and list the models that narrowing
+    depends on in choices_models.
+    """
+    choices_models = ()
+    choices_timeout = 3600
+
+    def field_choices(self, field, request, model_admin):
+        models = {*str_related_models(field.related_model), *self.choices_models}
+        version_keys = sorted(choices_version_key(model) for model in models)
+        versions = cache.get_many(version_keys)
+        missing = {key: uuid.uuid4().hex for key in version_keys if key not in versions}
+        if missing:
+            cache.set_many(missing, None)
+            versions.update(missing)
+        digest = hashlib.md5(repr([versions[key] for key in version_keys]).encode()).hexdigest()
+        key = (f'filter-choices:{model_admin.model._meta.label_lower}:{self.field_path}:{request.user.pk}:'
+               f'{get_language()}:{digest}')
+        choices = cache.get(key)
+        if choices is None:
+            choices = [(obj.pk, str(obj)) for obj in self.choices_queryset(field, request, model_admin)]
+            cache.set(key, choices, self.choices_timeout)
+        return choices
+
+    def choices_queryset(self, field, request, model_admin):
+        model = field.related_model
+        queryset = model._default_manager.complex_filter(field.get_limit_choices_to())
+        relations = str_select_related(model)
+        return queryset.select_related(*relations) if relations else queryset
+
+
+class RangeListFilter(admin.FieldListFilter):
+    """
+    Filter on a numeric field path with a lower (>=) and an upper (<) bound typed into the
+    sidebar, e.g. ('summary__net_profit_per_acre', RangeListFilter) for the crops below a profit.
+    """
+    template = 'admin/range_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg_gte = f'{field_path}__gte'
+        self.lookup_kwarg_lt = f'{field_path}__lt'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # An empty box is no bound, not a lookup on ''.
+        self.used_parameters = {key: value for key, value in self.used_parameters.items() if value != ''}
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg_gte, self.lookup_kwarg_lt]
+
+    def choices(self, changelist):
+        own = self.expected_parameters()
+        yield {
+            'selected': not self.used_parameters,
+            'query_string': changelist.get_query_string({}, own),
+            'display': _('All'),
+            'gte_name': self.lookup_kwarg_gte,
+            'gte': self.used_parameters.get(self.lookup_kwarg_gte, ''),
+            'lt_name': self.lookup_kwarg_lt,
+            'lt': self.used_parameters.get(self.lookup_kwarg_lt, ''),
+            # The form replaces the query string, so it carries the other filters, search and ordering.
+            'hidden': sorted(
+                (name, value) for name, value in changelist.params.items()
+                if name not in own and name not in (PAGE_VAR, AFTER_VAR, BEFORE_VAR)),
+        }
@@ -0,0 +1,160 @@
+"""
+Batched CSV imports for the admin upload views, see ImportMixin, and the import_records command.
+
+Rows are streamed from the file, turned into unsaved model instances and validated with the
+model's own field validation, then inserted with bulk_create() in batches that each run in a
+single transaction. References to other rows are resolved through lookup maps that importers
+build once per file, so no row costs a query of its own.
+"""
+import csv
+import io
+
+from django import forms
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.translation import gettext as _, gettext_lazy
+
+NON_FIELD_COLUMN = '-'
+
+
+class CsvImporter:
+    """
+    Subclasses set model, columns and required_columns, build their lookup maps in
+    load_lookups() and turn a row (a dict keyed on lower case column names) into field
+    values in row_values(), adding problems to the errors dict keyed on the column.
+    Foreign keys are given as their attname (crop_id) and are not validated again.
+    column_choices maps the columns that take a fixed set of values to their (code, label)
+    choices, which the upload page lists.
+    """
+    model = None
+    columns = ()
+    required_columns = ()
+    column_choices = {}
+    batch_size = 5000
+
+    # Admins expose the class as importer_class, keep templates from instantiating it.
+    do_not_call_in_templates = True
+
+    def __init__(self, user, dry_run=False, batch_size=None):
+        self.user = user
+        self.dry_run = dry_run
+        self.batch_size = batch_size or self.batch_size
+        self.errors = []
+        self.imported = 0
+
+    def load_lookups(self):
+        pass
+
+    def row_values(self, row, errors):
+        raise NotImplementedError
+
+    def saved(self, objects):
+        """Called inside the transaction of every inserted batch, bulk_create() sends no signals."""
+
+    def run(self, lines):
+        """Import the CSV lines, collecting (line, column, message) for every rejected row in errors."""
+        reader = csv.DictReader(lines)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        missing = [column for column in self.required_columns if column not in reader.fieldnames]
+        if missing:
+            self.errors.append((1, NON_FIELD_COLUMN, _('Missing columns: %s') % ', '.join(missing)))
+            return self
+        unknown = [column for column in reader.fieldnames if column not in self.columns]
+        if unknown:
+            self.errors.append((1, NON_FIELD_COLUMN, _('Unknown columns: %s') % ', '.join(unknown)))
+            return self
+
+        self.load_lookups()
+        batch = []
+        for row in reader:
+            try:
+                batch.append(self.build({key: (value or '').strip() for key, value in row.items() if key}))
+            except ValidationError as e:
+                for column, messages in e.message_dict.items():
+                    self.errors.extend((reader.line_num, column, message) for message in messages)
+                continue
+            if len(batch) >= self.batch_size:
+                self.save(batch)
+                batch = []
+        if batch:
+            self.save(batch)
+        return self
+
+    def build(self, row):
+        errors = {}
+        values = self.row_values(row, errors)
+        obj = self.model(**values)
+        relations = [field.name for field in self.model._meta.concrete_fields if field.is_relation]
+        try:
+            obj.clean_fields(exclude=relations + list(errors))
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        if errors:
+            raise ValidationError(errors)
+        return obj
+
+    def save(self, objects):
+        self.imported += len(objects)
+        if self.dry_run:
+            return
+        with transaction.atomic():
+            self.model.objects.bulk_create(objects)
+            self.saved(objects)
+
+
+class CsvImportForm(forms.Form):
+    file = forms.FileField(label=gettext_lazy('CSV file'))
+    dry_run = forms.BooleanField(
+        label=gettext_lazy('Only validate'), required=False, initial=True,
+        help_text=gettext_lazy('Check every row and report the errors without importing anything.'))
+
+
+class ImportMixin:
+    """
+    Admin importing the CSV files uploaded to a view next to the add button with
+    importer_class, a CsvImporter, showing at most import_errors_shown rejected rows.
+    """
+    importer_class = None
+    import_errors_shown = 500
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='%s_%s_import' % info),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Validate or import an uploaded CSV file, listing the rejected rows."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        opts = self.model._meta
+        importer = None
+        form = CsvImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            importer = self.importer_class(request.user, dry_run=form.cleaned_data['dry_run'])
+            lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                importer.run(lines)
+            except UnicodeDecodeError:
+                form.add_error('file', _('The file is not UTF-8 encoded CSV.'))
+                importer = None
+            if importer and not importer.errors and not importer.dry_run:
+                self.message_user(request, _('Imported %(count)s %(name)s.') % {
+                    'count': importer.imported, 'name': opts.verbose_name_plural})
+                return HttpResponseRedirect(reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'))
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title=_('Import %s') % opts.verbose_name_plural,
+            opts=opts,
+            form=form,
+            importer=importer,
+            columns=self.importer_class.columns,
+            column_choices=self.importer_class.column_choices.items(),
+            errors=importer.errors[:self.import_errors_shown] if importer else [],
+            rejected=len({line for line, column, message in importer.errors}) if importer else 0,
+        )
+        return TemplateResponse(request, 'admin/import_csv.html', context)
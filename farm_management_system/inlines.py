@@ -0,0 +1,180 @@
+"""
+Paginated tabular inlines, see PaginatedInline.
+"""
+import math
+
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.forms import ModelChoiceField, Select
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+from farm_management_system.admin import str_select_related
+
+
+class FormsetAutocompleteSelect(AutocompleteSelect):
+    """
+    AutocompleteSelect taking the label of its selected option from labels, which the forms
+    of a PaginatedInlineFormSet share, instead of querying it for every row.
+    """
+    labels = None
+
+    def optgroups(self, name, value, attr=None):
+        if self.labels is None:
+            return super().optgroups(name, value, attr)
+        default = (None, [], 0)
+        if not self.is_required and not self.allow_multiple_selected:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        for option_value in value:
+            if str(option_value) in self.labels:
+                default[1].append(self.create_option(
+                    name, option_value, self.labels[str(option_value)], True, len(default[1])))
+        return [default]
+
+
+class LoadedObjectField(ModelChoiceField):
+    """
+    ModelChoiceField of a formset's primary key, looking the submitted value up with lookup(pk)
+    among the rows the formset loaded instead of querying each one.
+    """
+
+    def __init__(self, lookup, *args, **kwargs):
+        self.lookup = lookup
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            obj = self.lookup(self.queryset.model._meta.pk.to_python(value))
+        except ValidationError:
+            obj = None
+        if obj is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        return obj
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset showing one page of per_page rows, chosen by the <prefix>-page parameter.
+    Bound to a submitted page, it only loads and validates the rows that page submitted, in
+    one query; a primary key of another row is an invalid choice.
+    The choices of its selects and the labels of its autocompletes are read once for all rows.
+    """
+    per_page = 20
+    params = {}
+
+    @property
+    def page_param(self):
+        return f'{self.prefix}-page'
+
+    @cached_property
+    def count(self):
+        return super().get_queryset().count()
+
+    @cached_property
+    def page_count(self):
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    @cached_property
+    def page(self):
+        try:
+            page = int(self.params.get(self.page_param, 1))
+        except ValueError:
+            page = 1
+        return min(max(page, 1), self.page_count)
+
+    def page_url(self, page):
+        params = self.params.copy()
+        params[self.page_param] = page
+        return '?' + params.urlencode()
+
+    @property
+    def previous_url(self):
+        return self.page > 1 and self.page_url(self.page - 1)
+
+    @property
+    def next_url(self):
+        return self.page < self.page_count and self.page_url(self.page + 1)
+
+    def get_queryset(self):
+        if not hasattr(self, '_page_queryset'):
+            queryset = super().get_queryset()
+            if self.is_bound:
+                queryset = queryset.filter(pk__in=self.submitted_pks())
+            else:
+                start = (self.page - 1) * self.per_page
+                queryset = queryset[start:start + self.per_page]
+            self._page_queryset = queryset
+        return self._page_queryset
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if self.is_bound:
+            field = form.fields[self._pk_field.name]
+            form.fields[self._pk_field.name] = LoadedObjectField(
+                self._existing_object, field.queryset, initial=field.initial, required=False, widget=field.widget)
+
+    def submitted_pks(self):
+        pk_name = self.model._meta.pk.name
+        pks = []
+        for index in range(self.initial_form_count()):
+            try:
+                pks.append(self.model._meta.pk.to_python(self.data.get(f'{self.add_prefix(index)}-{pk_name}')))
+            except ValidationError:
+                continue
+        return [pk for pk in pks if pk is not None]
+
+    @cached_property
+    def forms(self):
+        forms = super().forms
+        for name, field in (forms[0].fields.items() if forms else ()):
+            widget = getattr(field.widget, 'widget', field.widget)
+            if not isinstance(field, ModelChoiceField) or not isinstance(widget, Select):
+                continue
+            if isinstance(widget, FormsetAutocompleteSelect):
+                values = {str(form[name].value()) for form in forms} - {str(value) for value in field.empty_values}
+                queryset = field.queryset.filter(**{f'{field.to_field_name or "pk"}__in': values})
+                relations = str_select_related(queryset.model)
+                labels = {
+                    str(field.prepare_value(obj)): field.label_from_instance(obj)
+                    for obj in (queryset.select_related(*relations) if relations else queryset)
+                }
+                for form in forms:
+                    getattr(form.fields[name].widget, 'widget', form.fields[name].widget).labels = labels
+            else:
+                choices = list(field.choices)
+                for form in forms:
+                    form.fields[name].choices = choices
+        return forms
+
+
+class PaginatedInline(admin.TabularInline):
+    """
+    Tabular inline rendering per_page rows at a time, in the inline's ordering, with links to
+    the other pages, see PaginatedInlineFormSet. The rows' str() relations are joined.
+    """
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/paginated_tabular.html'
+    per_page = 20
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        relations = str_select_related(self.model)
+        return queryset.select_related(*relations) if relations else queryset
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.params = request.GET
+        return formset
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        widget = formfield.widget
+        if type(widget) is AutocompleteSelect:
+            formfield.widget = FormsetAutocompleteSelect(widget.rel, widget.admin_site, widget.attrs, widget.choices,
+                                                         widget.db)
+            formfield.widget.is_required = widget.is_required
+        return formfield
@@ -0,0 +1,105 @@
+"""
+Keyset pagination of admin changelists on an indexed date column.
+"""
+import hashlib
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR, SEARCH_VAR
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist paging on (keyset_field, pk) instead of OFFSET, newest first. Next and previous
+    links carry a cursor built from the last and first row shown, so every page costs one
+    indexed range scan. The row count comes from the cache and is only recounted when it expires.
+    Sorting by a column or searching, whose results are ranked, falls back to the regular paginator.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        lookup_params.pop(BEFORE_VAR, None)
+        return lookup_params
+
+    def get_ordering(self, request, queryset):
+        if ORDER_VAR in self.params or self.query:
+            return super().get_ordering(request, queryset)
+        return ['-' + self.model_admin.keyset_field, '-pk']
+
+    def get_results(self, request):
+        self.keyset = ORDER_VAR not in self.params and not self.query
+        if not self.keyset:
+            return super().get_results(request)
+
+        field = self.model_admin.keyset_field
+        after, before = request.GET.get(AFTER_VAR), request.GET.get(BEFORE_VAR)
+        queryset = self.queryset
+        if before:
+            value, pk = self.parse_cursor(before)
+            queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk}))
+            queryset = queryset.order_by(field, 'pk')
+        elif after:
+            value, pk = self.parse_cursor(after)
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+
+        rows = list(queryset[:self.list_per_page + 1])
+        has_more = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        if before:
+            rows.reverse()
+        has_next = bool(before) or has_more
+        has_previous = bool(after) or (bool(before) and has_more)
+
+        self.result_list = rows
+        self.result_count = self.cached_count(request, self.queryset)
+        self.full_result_count = self.cached_count(request, self.root_queryset)
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = has_next or has_previous
+        self.paginator = None
+        remove = [AFTER_VAR, BEFORE_VAR, PAGE_VAR]
+        self.next_url = rows and has_next and self.get_query_string({AFTER_VAR: self.cursor(rows[-1])}, remove)
+        self.previous_url = rows and has_previous and self.get_query_string({BEFORE_VAR: self.cursor(rows[0])}, remove)
+
+    def cursor(self, obj):
+        return f'{obj.pk}:{getattr(obj, self.model_admin.keyset_field).isoformat()}'
+
+    def parse_cursor(self, cursor):
+        try:
+            pk, value = cursor.split(':', 1)
+            value = self.opts.get_field(self.model_admin.keyset_field).to_python(value)
+            return value, int(pk)
+        except (ValueError, ValidationError) as e:
+            raise IncorrectLookupParameters(e)
+
+    def cached_count(self, request, queryset):
+        filters = sorted(self.get_filters_params().items()) + [('q', self.params.get(SEARCH_VAR, ''))]
+        if queryset is self.root_queryset:
+            filters = []
+        digest = hashlib.md5(repr(filters).encode()).hexdigest()
+        key = f'changelist-count:{self.opts.label_lower}:{request.user.pk}:{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.model_admin.keyset_count_timeout)
+        return count
+
+
+class KeysetMixin:
+    """
+    Admin listing its changelist with keyset_changelist, a KeysetChangeList, paging on
+    keyset_field, an indexed date column. Counts are cached for keyset_count_timeout seconds.
+    """
+    keyset_field = None
+    keyset_count_timeout = 300
+    keyset_changelist = KeysetChangeList
+
+    def get_changelist(self, request, **kwargs):
+        return self.keyset_changelist
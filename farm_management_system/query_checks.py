@@ -0,0 +1,96 @@
+"""
+The SQL an admin changelist runs, and what SQLite plans for it.
+
+Shared by the changelist tests and the check_query_plans and check_changelist_queries commands,
+which run the same checks on a copy of real or synthetic data.
+"""
+import re
+
+from django.contrib.admin.filters import RelatedFieldListFilter
+from django.db import connection
+from django.test import RequestFactory
+
+FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?! USING)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)')
+TABLE_ALIAS = re.compile(r'"(\w+)" ([UT]\d+)\b')
+PLAN_TABLE = re.compile(r'\b[UT]\d+\b')
+
+
+def admin_request(user, query_string=''):
+    request = RequestFactory().get(f'/?{query_string}')
+    request.user = user
+    return request
+
+
+def render_changelist(model_admin, user, per_page):
+    """The rendered changelist response of a user with per_page rows to a page."""
+    default_per_page = model_admin.list_per_page
+    model_admin.list_per_page = per_page
+    try:
+        return model_admin.changelist_view(admin_request(user)).render()
+    finally:
+        model_admin.list_per_page = default_per_page
+
+
+def changelist_query_strings(model_admin, user, every_choice=False):
+    """
+    The bare changelist followed by the first choice of every list filter, or by each of them
+    but for the related object filters, whose choices only differ in the id they compare.
+    """
+    query_strings = ['']
+    changelist = model_admin.get_changelist_instance(admin_request(user))
+    for spec in changelist.filter_specs:
+        for choice in spec.choices(changelist):
+            if not choice['selected']:
+                query_strings.append(choice['query_string'].lstrip('?'))
+                if not every_choice or isinstance(spec, RelatedFieldListFilter):
+                    break
+    return query_strings
+
+
+def changelist_plans(model_admin, user, query_string=''):
+    """
+    (sql, plan lines) of the count and result queries of a changelist, the subqueries' table
+    aliases such as U0 replaced by their table names in the plan.
+    """
+    statements = []
+
+    # Only the count and result queries, the sidebar choices legitimately list whole tables.
+    table = model_admin.model._meta.db_table
+
+    def capture(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT') and f'FROM "{table}"' in sql:
+            statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        changelist = model_admin.get_changelist_instance(admin_request(user, query_string))
+        list(changelist.result_list)
+
+    plans = []
+    with connection.cursor() as cursor:
+        for sql, params in statements:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            aliases = dict((alias, table) for table, alias in TABLE_ALIAS.findall(sql))
+            plans.append((sql, [
+                PLAN_TABLE.sub(lambda match: aliases.get(match.group(0), match.group(0)), row[-1])
+                for row in cursor.fetchall()
+            ]))
+    return plans
+
+
+def plan_issues(plan, large_tables):
+    """The full scans of large tables in a plan, and its temporary B-trees when it reads one."""
+    issues = []
+    touches_large_table = False
+    for line in plan:
+        match = FULL_SCAN.search(line)
+        if match and match.group(1) in large_tables:
+            issues.append(f'full scan of {match.group(1)}')
+        if any(re.search(rf'\b{table}\b', line) for table in large_tables):
+            touches_large_table = True
+    for line in plan:
+        match = TEMP_SORT.search(line)
+        if match and touches_large_table:
+            issues.append(f'temporary B-tree for {match.group(1)}')
+    return issues
@@ -0,0 +1,274 @@
+"""
+Full-text search over free text columns with SQLite FTS5.
+
+Each indexed column has an FTS5 table named <table>_<column>_fts whose rowids are the primary
+keys of the rows, created by the app's migration together with triggers that index every
+insert, update and delete, so bulk_create(), queryset updates and imports are covered too.
+
+Urdu is written with Arabic letters that keyboards produce in several forms (Arabic yeh, kaf
+and heh against their Urdu counterparts), with optional vowel marks, joiners and Eastern digits.
+The triggers fold the text through FOLDED before indexing and search terms are folded the same
+way in Python, so either spelling finds the other. The unicode61 tokenizer then case folds,
+removes Latin diacritics and keeps combining marks inside words.
+
+Models list their indexed columns in full_text_fields, admins search them with '@column' in
+search_fields, see FullTextSearchMixin.
+
+SQLite alters most columns and constraints by copying a table into a new one, which drops its
+triggers without an error. Migrations altering an indexed table wrap their operations in
+keeping_full_text_indexes(), and check_full_text_triggers() reports triggers gone missing.
+"""
+import operator
+from functools import reduce
+
+from django.contrib.admin.utils import lookup_needs_distinct
+from django.contrib.admin.views.main import ORDER_VAR
+from django.core import checks
+from django.db import connection, migrations
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Character code: replacement, applied to indexed text and to search terms alike.
+FOLDED = {
+    0x064A: 'ی',  # Arabic yeh to Farsi yeh
+    0x0649: 'ی',  # Alef maksura
+    0x0643: 'ک',  # Arabic kaf to keheh
+    0x0647: 'ہ',  # Arabic heh to heh goal
+    0x0623: 'ا',  # Alef with hamza above
+    0x0625: 'ا',  # Alef with hamza below
+    0x0640: '',  # Tatweel
+    0x200C: '',  # Zero width non-joiner
+    0x200D: '',  # Zero width joiner
+    **{code: '' for code in range(0x064B, 0x0660)},  # Harakat
+    0x0670: '',  # Superscript alef
+    **{0x0660 + digit: str(digit) for digit in range(10)},  # Arabic-Indic digits
+    **{0x06F0 + digit: str(digit) for digit in range(10)},  # Urdu digits
+}
+
+TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+
+
+def fold(text):
+    return text.translate(FOLDED)
+
+
+def fold_sql(expression, stage=20):
+    """
+    SQL expressions applying FOLDED, the first to expression and each following one to the
+    result of the previous as body. SQLite's parser overflows on a few dozen nested calls, even
+    spread over nested subqueries, so the replacements run as separate statements of stage each.
+    """
+    replacements = list(FOLDED.items())
+    stages = []
+    for start in range(0, len(replacements), stage):
+        folded = expression if start == 0 else 'body'
+        for code, replacement in replacements[start:start + stage]:
+            folded = f"replace({folded}, char({code}), '{replacement}')"
+        stages.append(folded)
+    return stages
+
+
+def match_query(term):
+    """
+    FTS5 query matching the rows holding every word of term, each as a word prefix. Quoting
+    the words keeps FTS5 operators and punctuation typed in the search box literal.
+    """
+    words = [word for word in fold(term).split() if any(char.isalnum() for char in word)]
+    return ' '.join('"%s"*' % word.replace('"', '""') for word in words)
+
+
+def full_text_indexes(model):
+    """{column: FullTextIndex} of the model's full_text_fields."""
+    return {column: FullTextIndex(model._meta.db_table, column) for column in getattr(model, 'full_text_fields', ())}
+
+
+def all_full_text_indexes():
+    from django.apps import apps
+    return [index for model in apps.get_models() for index in full_text_indexes(model).values()]
+
+
+def restore_full_text_indexes(apps, schema_editor):
+    """Create the triggers missing from the existing indexes and index their rows again."""
+    for index in all_full_text_indexes():
+        index.restore(schema_editor)
+
+
+def keeping_full_text_indexes(*operations):
+    """
+    The operations of a migration altering tables with full-text indexes, followed by the
+    restoring of their triggers in either direction.
+    """
+    return [
+        migrations.RunPython(migrations.RunPython.noop, restore_full_text_indexes),
+        *operations,
+        migrations.RunPython(restore_full_text_indexes, migrations.RunPython.noop),
+    ]
+
+
+def check_full_text_triggers(app_configs, **kwargs):
+    """System check (tagged database) that every indexed table has its index and triggers."""
+    if connection.vendor != 'sqlite':
+        return []
+    tables = set(connection.introspection.table_names())
+    errors = []
+    for index in all_full_text_indexes():
+        missing = index.missing() if index.table in tables else []
+        if missing:
+            errors.append(checks.Error(
+                f"{index.table}.{index.column} is missing its full-text search {', '.join(missing)}.",
+                hint='manage.py rebuild_search_indexes creates them and indexes the rows again. Migrations '
+                     'altering the table keep them with keeping_full_text_indexes().',
+                id='search.E001'))
+    return errors
+
+
+class RawSubquery(RawSQL):
+    """
+    RawSQL of a subquery for an __in lookup, which adds its own parentheses. SQLite reads
+    id IN ((SELECT ...)) as a scalar subquery and only compares the first row.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+class FullTextIndex:
+
+    def __init__(self, table, column):
+        self.table = table
+        self.column = column
+        self.name = f'{table}_{column}_fts'
+
+    def create(self, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        name, table, column = self.name, self.table, self.column
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{name}" USING fts5(body, tokenize="{TOKENIZER}", prefix=\'2 3\')')
+        first, *rest = fold_sql(f'new.{column}')
+        add = f'INSERT INTO "{name}" (rowid, body) SELECT new.id, {first} WHERE new.{column} <> \'\';' + ''.join(
+            f' UPDATE "{name}" SET body = {folded} WHERE rowid = new.id;' for folded in rest)
+        remove = f'DELETE FROM "{name}" WHERE rowid = old.id;'
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{name}_insert" AFTER INSERT ON "{table}" BEGIN {add} END')
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{name}_update" AFTER UPDATE OF {column} ON "{table}" '
+            f'BEGIN {remove} {add} END')
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS "{name}_delete" AFTER DELETE ON "{table}" BEGIN {remove} END')
+        for statement in self.rebuild_statements():
+            schema_editor.execute(statement)
+
+    def drop(self, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for trigger in self.triggers():
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{trigger}"')
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{self.name}"')
+
+    def triggers(self):
+        return [f'{self.name}_{trigger}' for trigger in ('insert', 'update', 'delete')]
+
+    def missing(self, connection=connection):
+        """The names of the FTS5 table and triggers of the index missing from the database."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE tbl_name IN (%s, %s)", [self.table, self.name])
+            existing = {name for name, in cursor.fetchall()}
+        return [name for name in [self.name, *self.triggers()] if name not in existing]
+
+    def restore(self, schema_editor):
+        """Create the missing triggers of an index whose FTS5 table exists, and index every row again."""
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        missing = self.missing(schema_editor.connection)
+        if missing and self.name not in missing:
+            self.create(schema_editor)
+
+    def rebuild_statements(self):
+        first, *rest = fold_sql(self.column)
+        return [
+            f'DELETE FROM "{self.name}"',
+            f'INSERT INTO "{self.name}" (rowid, body) SELECT id, {first} FROM "{self.table}" '
+            f'WHERE {self.column} <> \'\'',
+            *(f'UPDATE "{self.name}" SET body = {folded}' for folded in rest),
+        ]
+
+    def rebuild(self):
+        """Index every row again."""
+        with connection.cursor() as cursor:
+            for statement in self.rebuild_statements():
+                cursor.execute(statement)
+
+    def drift(self):
+        """Ids of the rows whose indexed text differs from their folded column, or that are only indexed."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT t.id, t.{self.column}, f.rowid, f.body FROM "{self.table}" t '
+                f'LEFT JOIN "{self.name}" f ON f.rowid = t.id '
+                f'UNION ALL SELECT NULL, NULL, f.rowid, f.body FROM "{self.name}" f '
+                f'WHERE NOT EXISTS (SELECT 1 FROM "{self.table}" t WHERE t.id = f.rowid)')
+            return sorted(
+                pk if pk is not None else rowid for pk, text, rowid, body in cursor.fetchall()
+                if body != (fold(text) if text else None))
+
+    def matches(self, query):
+        """Subquery of the ids of the rows matching a match_query(), for a pk__in filter."""
+        return RawSubquery(f'SELECT rowid FROM "{self.name}" WHERE "{self.name}" MATCH %s', [query])
+
+    def rank(self, query):
+        """
+        The bm25 rank of each row for a match_query(), lower is better. FTS5 ranks are negative,
+        the rows not matching rank 0 after all the matching ones.
+
+        The matching rows are ranked once into a materialized table each row looks its rank up
+        in, a MATCH for every row would rank all the matching rows again for each of them.
+        SQLite before 3.35 has no MATERIALIZED and flattens the table back into that.
+        """
+        materialized = 'MATERIALIZED ' if connection.Database.sqlite_version_info >= (3, 35) else ''
+        return RawSQL(
+            f'IFNULL((WITH ranked AS {materialized}(SELECT rowid AS id, rank FROM "{self.name}" '
+            f'WHERE "{self.name}" MATCH %s) SELECT rank FROM ranked WHERE id = "{self.table}"."id"), 0)', [query])
+
+
+def search_lookup(search_field):
+    """The lookup Django's admin searches a search_fields entry with, @ fields as plain ones."""
+    prefixes = {'^': 'istartswith', '=': 'iexact', '@': 'icontains'}
+    if search_field[0] in prefixes:
+        return f'{search_field[1:]}__{prefixes[search_field[0]]}'
+    return f'{search_field}__icontains'
+
+
+class FullTextSearchMixin:
+    """
+    Admin matching the search fields prefixed with @, Django's full-text prefix, through the
+    FTS5 index of the model's full_text_fields they name, and the others as Django does.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Rows matching every word of search_term in one of the plain search fields, as Django
+        matches them, or all of them in one of the full-text fields. Unless a column is sorted,
+        the results are ordered by their rank in the first full-text field.
+        """
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term.split():
+            return queryset, False
+        indexes = full_text_indexes(self.model) if connection.vendor == 'sqlite' else {}
+        # Without an index @ fields are matched like plain ones.
+        full_text = [name[1:] for name in search_fields if name.startswith('@') and name[1:] in indexes]
+        lookups = [search_lookup(name) for name in search_fields if name[1:] not in full_text or name[0] != '@']
+
+        condition = Q()
+        if lookups:
+            condition = reduce(operator.and_, [
+                reduce(operator.or_, [Q(**{lookup: word}) for lookup in lookups]) for word in search_term.split()])
+        query = match_query(search_term)
+        if full_text and query:
+            for column in full_text:
+                condition |= Q(pk__in=indexes[column].matches(query))
+            if ORDER_VAR not in request.GET:
+                queryset = queryset.annotate(search_rank=indexes[full_text[0]].rank(query)).order_by(
+                    'search_rank', *(queryset.query.order_by or ['-pk']))
+        if not condition:
+            return queryset.none(), False
+        return queryset.filter(condition), any(lookup_needs_distinct(self.opts, lookup) for lookup in lookups)
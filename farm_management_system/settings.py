@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.users.middlewares.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -141,3 +142,36 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.0/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# Query budgets of views by URL name, exact names or fnmatch patterns. RequestMetricsMiddleware logs
+# requests over budget as warnings, and raises QueryBudgetExceeded instead when QUERY_BUDGETS_STRICT is set,
+# as it is under the test runner.
+QUERY_BUDGETS = {
+    'admin:*_autocomplete': 5,
+    'admin:*_changelist': 12,
+    'admin:*_add': 10,
+    'admin:*_change': 20,
+}
+QUERY_BUDGETS_STRICT = False
+
+TEST_RUNNER = 'farm_management_system.test_runner.StrictQueryBudgetRunner'
+
+# Number of slowest statements logged per request.
+REQUEST_METRICS_SLOWEST = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # Requests over their query budget are warnings, lower the level to INFO for a line per request.
+        'apps.users.middlewares': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
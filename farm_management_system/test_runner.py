@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class StrictQueryBudgetRunner(DiscoverRunner):
+    """Runs the tests with QUERY_BUDGETS_STRICT set, so a view running over its query budget fails its test."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.query_budgets_strict = settings.QUERY_BUDGETS_STRICT
+        settings.QUERY_BUDGETS_STRICT = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.QUERY_BUDGETS_STRICT = self.query_budgets_strict
+        super().teardown_test_environment(**kwargs)